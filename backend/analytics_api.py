@@ -0,0 +1,53 @@
+# backend/analytics_api.py
+# Aggregates over the trip history (trip_log): cost per lane per week, efficiency per vehicle, and so on.
+
+from flask import Blueprint, request, jsonify
+import time
+import logging
+from trip_log import trip_log, journey_day, GROUP_COLUMNS, CATEGORICAL_COLUMNS, PERIODS
+from serialization import json_response
+from auth_api import check_admin
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+analytics_api_bp = Blueprint('analytics_api', __name__)
+
+
+@analytics_api_bp.route('/api/analytics/trips', methods=['GET'])
+def trip_analytics_api():
+    """
+    ?group=lane,vehicle (any of GROUP_COLUMNS, comma-separated; empty for totals)
+    &period=week (day, week, month or none) &since=YYYY-MM-DD &until=YYYY-MM-DD (journey dates, until exclusive)
+    plus optional equality filters on the categorical columns, e.g. &vehicle=...&origin=...
+    """
+    is_admin, response, status_code = check_admin()
+    if not is_admin:
+        return response, status_code
+    if trip_log is None:
+        return jsonify({"success": False, "error": "Trip history is disabled."}), 503
+    try:
+        group_by = tuple(column for column in request.args.get('group', 'lane').split(',') if column)
+        period = request.args.get('period', 'week')
+        period = None if period == 'none' else period
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = journey_day(since) if since else None
+        until = journey_day(until) if until else None
+        filters = {column: request.args[column] for column in CATEGORICAL_COLUMNS if request.args.get(column)}
+
+        started = time.perf_counter()
+        rows = trip_log.aggregate(group_by, period, since, until, filters)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"{e}. group: {', '.join(GROUP_COLUMNS)}; period: {', '.join(PERIODS)} or none; dates: YYYY-MM-DD."}), 400
+    except Exception as e:
+        logger.error(f"Trip analytics failed: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "An internal server error occurred."}), 500
+
+    logger.info(f"Trip analytics group={group_by} period={period}: {len(rows)} rows in {elapsed_ms:.1f} ms")
+    return json_response({
+        "success": True, "group_by": list(group_by), "period": period, "filters": filters,
+        "rows": rows, "query_ms": round(elapsed_ms, 2), "history": trip_log.stats(),
+    })
@@ -8,13 +8,25 @@ from flask import (
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
 from config import Config
-from diesel_api import diesel_api_bp
+from logging_setup import configure_logging, logging_stats
+configure_logging() # Before the app modules load, so their "if not logger.hasHandlers()" fallbacks stay unused
+from diesel_api import diesel_api_bp, model_registry
 from auth_api import auth_api_bp
+from planning_api import planning_api_bp
+from analytics_api import analytics_api_bp
+from tiles_api import tiles_api_bp
+from lanes_api import lanes_api_bp
+from profiling_api import profiling_api_bp
+from circuit_breaker import breaker_states
+from rate_limit import limiter
+from cache import cache_stats
+from route_store import route_store
+from prewarm import start_prewarmer, lane_freshness
+from db import get_pool
 
 app = Flask(__name__)
 app.config.from_object(Config)  
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(threadName)s : %(message)s')
 
 # for dev only
 # !!!!!IMPORTANT!!!!!!!!
@@ -25,19 +37,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name
 def init_db():
     db_path = app.config.get('DATABASE_PATH', 'users.db')
     try:
-        with sqlite3.connect(db_path) as conn:
-            c = conn.cursor()
-            c.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                is_approved INTEGER NOT NULL DEFAULT 0
-            )
-            ''')
-            conn.commit()
-            app.logger.info(f"Database initialized successfully at {db_path}")
+        get_pool(db_path) # Opens the WAL connection pool and ensures the users table and indexes once per process
+        app.logger.info(f"Database initialized successfully at {db_path}")
     except sqlite3.Error as e:
         app.logger.error(f"Database initialization error at {db_path}: {e}")
     except Exception as e:
@@ -48,6 +49,16 @@ with app.app_context():
 
 app.register_blueprint(diesel_api_bp)
 app.register_blueprint(auth_api_bp) 
+app.register_blueprint(planning_api_bp)
+app.register_blueprint(analytics_api_bp)
+app.register_blueprint(tiles_api_bp)
+app.register_blueprint(lanes_api_bp)
+app.register_blueprint(profiling_api_bp)
+
+# Lane cache pre-warmer (one leader across workers; starts per worker process, so don't rely on it with --preload)
+start_prewarmer()
+# Watches the model artifact and hot-swaps validated new versions (per worker)
+model_registry.start()
   
 
 @app.errorhandler(404)
@@ -75,6 +86,40 @@ def handle_exception(e):
 @app.route('/api/status')
 def api_status():
     return jsonify({"status": "OK", "message": "API is running"})
+
+# Upstream circuit breaker state for monitoring
+@app.route('/api/status/upstreams')
+def api_upstream_status():
+    return jsonify({"status": "OK", "breakers": breaker_states()})
+
+@app.route('/api/status/caches')
+def api_cache_status():
+    """Hit rates (this worker) and size/entries (shared store) for every upstream cache."""
+    return jsonify({"status": "OK", "caches": cache_stats(),
+                    "route_store": route_store.stats() if route_store is not None else None})
+
+@app.route('/api/status/freshness')
+def api_freshness_status():
+    """How fresh the cached route/forecast/traffic data is for every depot lane, plus the last pre-warm run."""
+    return jsonify({"status": "OK", **lane_freshness()})
+
+@app.route('/api/status/model')
+def api_model_status():
+    """Active model version, shadow model comparison (if configured), swap count and the last rejected artifact."""
+    return jsonify({"status": "OK", **model_registry.status()})
+
+@app.route('/api/status/logging')
+def api_logging_status():
+    """Log records waiting on the queue and records dropped (queue full or sampled out) in this worker."""
+    return jsonify({"status": "OK", **logging_stats()})
+
+@app.route('/api/status/quotas')
+def api_quota_status():
+    """Upstream calls and shed calls per provider per day (UTC), across all workers. ?days=N for history."""
+    if limiter is None:
+        return jsonify({"status": "OK", "enabled": False, "providers": {}})
+    days = min(max(request.args.get('days', 1, type=int), 1), 90)
+    return jsonify({"status": "OK", "enabled": True, "providers": limiter.usage(days)})
 # ------------------------
 
 # for dev only
@@ -1,10 +1,21 @@
 from flask import Blueprint, request, jsonify, session, current_app
 import sqlite3
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
+from db import user_db
+from passwords import hasher, PasswordPoolBusy
 
 auth_api_bp = Blueprint('auth_api', __name__)
 
+def rehash_password(user_id, old_hash, password):
+    """Upgrades a hash made with old parameters; skipped if the password changed meanwhile. Failures don't block login."""
+    try:
+        new_hash = hasher.hash(password)
+        with user_db().connection() as conn:
+            conn.execute('UPDATE users SET password = ? WHERE id = ? AND password = ?', (new_hash, user_id, old_hash))
+        current_app.logger.info(f"Rehashed password for user {user_id} with {hasher.method}.")
+    except (PasswordPoolBusy, sqlite3.Error) as e:
+        current_app.logger.warning(f"Password rehash for user {user_id} skipped: {e}")
+
 @auth_api_bp.route('/api/auth/login', methods=['POST'])
 def login_api():
     try:
@@ -14,52 +25,54 @@ def login_api():
         admin_user = current_app.config.get('ADMIN_USERNAME')
         admin_pass = current_app.config.get('ADMIN_PASSWORD')
 
-        db_path = current_app.config.get('DATABASE_PATH', 'users.db')
+        is_admin_login = False
+        if admin_user and admin_pass: 
+            if email == admin_user and password == admin_pass:
+                is_admin_login = True
 
-        with sqlite3.connect(db_path) as conn:
-            c = conn.cursor()
+        if is_admin_login:
+            session['logged_in'] = True
+            session['role'] = 'admin'
+            session['email'] = email
+
+            return jsonify({
+                "success": True,
+                "role": "admin",
+                "message": "Admin login successful."
+            })
+        else:
+            # Don't hold a pooled connection while the hash is verified
+            with user_db().connection() as conn:
+                user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
 
-            is_admin_login = False
-            if admin_user and admin_pass: 
-                if email == admin_user and password == admin_pass:
-                    is_admin_login = True
+            # Verified once, off the request thread
+            password_ok = bool(user) and hasher.verify(user[3], password)
+            if password_ok and hasher.needs_rehash(user[3]):
+                rehash_password(user[0], user[3], password)
 
-            if is_admin_login:
+            if password_ok and user[4] == 1:
                 session['logged_in'] = True
-                session['role'] = 'admin'
+                session['role'] = 'user'
                 session['email'] = email
 
                 return jsonify({
                     "success": True,
-                    "role": "admin",
-                    "message": "Admin login successful."
+                    "role": "user",
+                    "message": "Login successful."
                 })
             else:
-                c.execute('SELECT * FROM users WHERE email = ?', (email,))
-                user = c.fetchone() 
-
-                if user and check_password_hash(user[3], password) and user[4] == 1:
-                    session['logged_in'] = True
-                    session['role'] = 'user'
-                    session['email'] = email
-
-                    return jsonify({
-                        "success": True,
-                        "role": "user",
-                        "message": "Login successful."
-                    })
-                else:
-                    if user and not check_password_hash(user[3], password):
-                         message = "Invalid credentials."
-                    elif user and user[4] == 0:
-                        message = "Your account is pending approval."
-                    else: 
-                        message = "Invalid credentials."
-
-                    return jsonify({
-                        "success": False,
-                        "message": message
-                    })
+                if password_ok and user[4] == 0:
+                    message = "Your account is pending approval."
+                else: 
+                    message = "Invalid credentials."
+
+                return jsonify({
+                    "success": False,
+                    "message": message
+                })
+    except PasswordPoolBusy:
+        current_app.logger.warning("Login rejected: password hashing pool saturated.")
+        return jsonify({"success": False, "message": "Too many logins in progress. Please retry shortly."}), 503, {"Retry-After": "2"}
     except Exception as e:
         current_app.logger.error(f"Login error: {e}")
         return jsonify({"success": False, "message": "An unexpected error occurred during login."}), 500
@@ -71,16 +84,12 @@ def signup_api():
         username = request.form['username']
         email = request.form['email']
         password = request.form['password']
-        password_hash = generate_password_hash(password)
-
-        db_path = current_app.config.get('DATABASE_PATH', 'users.db')
+        password_hash = hasher.hash(password)
 
-        with sqlite3.connect(db_path) as conn:
-            c = conn.cursor()
+        with user_db().connection() as conn:
             try:
-                c.execute('INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
-                          (username, email, password_hash))
-                conn.commit()
+                conn.execute('INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+                             (username, email, password_hash))
                 return jsonify({
                     "success": True,
                     "message": "Signup successful! Awaiting admin approval."
@@ -90,6 +99,9 @@ def signup_api():
                     "success": False,
                     "message": "Email already registered."
                 }), 409 
+    except PasswordPoolBusy:
+        current_app.logger.warning("Signup rejected: password hashing pool saturated.")
+        return jsonify({"success": False, "message": "Too many requests in progress. Please retry shortly."}), 503, {"Retry-After": "2"}
     except Exception as e:
         current_app.logger.error(f"Signup error: {e}") 
         return jsonify({"success": False, "message": "An unexpected error occurred during signup."}), 500
@@ -122,45 +134,179 @@ def check_admin():
         return False, jsonify({"success": False, "message": "Access denied."}), 403 
     return True, None, None
 
+USER_STATUS_FILTERS = {"pending": "is_approved = 0", "approved": "is_approved = 1", "all": None}
+
+def _user_json(user):
+    return {"id": user["id"], "username": user["username"], "email": user["email"], "isApproved": bool(user["is_approved"])}
+
+def _page_args():
+    """(after_id, limit) from the query string; raises ValueError on bad input."""
+    after = int(request.args.get('after', 0))
+    limit = int(request.args.get('limit', current_app.config.get('ADMIN_PAGE_SIZE', 50)))
+    if after < 0 or limit < 1: raise ValueError("after must be >= 0 and limit >= 1")
+    return after, min(limit, current_app.config.get('ADMIN_PAGE_MAX', 200))
+
+def list_users_page(status, after, limit, search=None):
+    """
+    One page of users ordered by id, starting after `after` (keyset pagination: each page is an index
+    range scan, so cost doesn't grow with the table). `search` matches the start of the email or username,
+    case-insensitively. Returns (users, next_cursor or None).
+    """
+    clauses, params = ["id > ?"], [after]
+    if USER_STATUS_FILTERS[status]: clauses.append(USER_STATUS_FILTERS[status])
+    if search:
+        # Served from the NOCASE email/username indexes; the unary + keeps the planner from walking the
+        # id or status index instead, which scans every row when few users match
+        clauses = ["+" + clause for clause in clauses]
+        pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append("(email LIKE ? ESCAPE '\\' OR username LIKE ? ESCAPE '\\')")
+        params += [pattern, pattern]
+    with user_db().connection() as conn:
+        rows = conn.execute(
+            f"SELECT id, username, email, is_approved FROM users WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+    # The extra row only tells us whether another page exists
+    users = [_user_json(row) for row in rows[:limit]]
+    next_cursor = users[-1]["id"] if len(rows) > limit else None
+    return users, next_cursor
+
+def user_counts():
+    """Pending/approved totals from the trigger-maintained user_counts rows (see db.SCHEMA)."""
+    with user_db().connection() as conn:
+        rows = conn.execute('SELECT approved, count FROM user_counts').fetchall()
+    counts = {"pending": 0, "approved": 0}
+    for approved, count in rows:
+        counts["approved" if approved else "pending"] = count
+    return counts
+
+@auth_api_bp.route('/api/admin/users', methods=['GET'])
+def list_users_api():
+    is_admin, response, status_code = check_admin()
+    if not is_admin:
+        return response, status_code
+
+    try:
+        status = request.args.get('status', 'all')
+        if status not in USER_STATUS_FILTERS:
+            return jsonify({"success": False, "message": f"status must be one of {', '.join(USER_STATUS_FILTERS)}."}), 400
+        after, limit = _page_args()
+        users, next_cursor = list_users_page(status, after, limit, request.args.get('q', '').strip() or None)
+
+        result = {"success": True, "users": users, "nextCursor": next_cursor}
+        if after == 0: result["counts"] = user_counts() # First page only, for the tab labels
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Invalid paging parameters: {e}"}), 400
+    except Exception as e:
+        current_app.logger.error(f"List users error: {e}")
+        return jsonify({"success": False, "message": "Error fetching users."}), 500
+
+
 @auth_api_bp.route('/api/admin/pending-users', methods=['GET'])
 def pending_users_api():
     is_admin, response, status_code = check_admin()
     if not is_admin:
         return response, status_code
 
-    db_path = current_app.config.get('DATABASE_PATH', 'users.db')
     try:
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row 
-            c = conn.cursor()
-            c.execute('SELECT id, username, email FROM users WHERE is_approved = 0')
-            pending_users = c.fetchall()
+        after, limit = _page_args()
+        users, next_cursor = list_users_page("pending", after, limit)
 
-            users_list = [dict(user) for user in pending_users]
-
-            return jsonify({
-                "success": True,
-                "pendingUsers": users_list
-            })
+        return jsonify({
+            "success": True,
+            "pendingUsers": [{"id": user["id"], "username": user["username"], "email": user["email"]} for user in users],
+            "nextCursor": next_cursor
+        })
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Invalid paging parameters: {e}"}), 400
     except Exception as e:
         current_app.logger.error(f"Pending users fetch error: {e}")
         return jsonify({"success": False, "message": "Error fetching pending users."}), 500
 
 
+def _bulk_emails():
+    """Emails from a JSON body {"emails": [...]} or repeated 'emails' form fields, de-duplicated in order."""
+    payload = request.get_json(silent=True)
+    emails = payload.get('emails') if isinstance(payload, dict) else request.form.getlist('emails')
+    if not isinstance(emails, list) or not emails or not all(isinstance(email, str) and email for email in emails):
+        raise KeyError('emails')
+    return list(dict.fromkeys(emails))
+
+@auth_api_bp.route('/api/admin/users/approve', methods=['POST'])
+def bulk_approve_users_api():
+    is_admin, response, status_code = check_admin()
+    if not is_admin:
+        return response, status_code
+
+    try:
+        emails = _bulk_emails()
+        max_batch = current_app.config.get('ADMIN_BULK_MAX', 500)
+        if len(emails) > max_batch:
+            return jsonify({"success": False, "message": f"At most {max_batch} users per request."}), 400
+
+        with user_db().transaction() as conn:
+            c = conn.executemany('UPDATE users SET is_approved = 1 WHERE email = ? AND is_approved = 0',
+                                 [(email,) for email in emails])
+            approved = c.rowcount
+
+        return jsonify({
+            "success": True,
+            "approved": approved,
+            "skipped": len(emails) - approved,
+            "message": f"{approved} user(s) approved."
+        })
+    except KeyError:
+        return jsonify({"success": False, "message": "Missing 'emails' list in request."}), 400
+    except Exception as e:
+        current_app.logger.error(f"Bulk approve error: {e}")
+        return jsonify({"success": False, "message": "An unexpected error occurred."}), 500
+
+
+@auth_api_bp.route('/api/admin/users/delete', methods=['POST'])
+def bulk_delete_users_api():
+    is_admin, response, status_code = check_admin()
+    if not is_admin:
+        return response, status_code
+
+    try:
+        emails = _bulk_emails()
+        max_batch = current_app.config.get('ADMIN_BULK_MAX', 500)
+        if len(emails) > max_batch:
+            return jsonify({"success": False, "message": f"At most {max_batch} users per request."}), 400
+
+        admin_user_email = current_app.config.get('ADMIN_USERNAME')
+        if admin_user_email in emails or session.get('email') in emails:
+            return jsonify({"success": False, "message": "Admin cannot delete their own account."}), 403
+
+        with user_db().transaction() as conn:
+            c = conn.executemany('DELETE FROM users WHERE email = ?', [(email,) for email in emails])
+            deleted = c.rowcount
+
+        return jsonify({
+            "success": True,
+            "deleted": deleted,
+            "skipped": len(emails) - deleted,
+            "message": f"{deleted} user(s) deleted."
+        })
+    except KeyError:
+        return jsonify({"success": False, "message": "Missing 'emails' list in request."}), 400
+    except Exception as e:
+        current_app.logger.error(f"Bulk delete error: {e}")
+        return jsonify({"success": False, "message": "An unexpected error occurred."}), 500
+
+
 @auth_api_bp.route('/api/admin/approve-user', methods=['POST'])
 def approve_user_api():
     is_admin, response, status_code = check_admin()
     if not is_admin:
         return response, status_code
 
-    db_path = current_app.config.get('DATABASE_PATH', 'users.db')
     try:
         email = request.form['email']
 
-        with sqlite3.connect(db_path) as conn:
-            c = conn.cursor()
-            c.execute('UPDATE users SET is_approved = 1 WHERE email = ? AND is_approved = 0', (email,))
-            conn.commit()
+        with user_db().connection() as conn:
+            c = conn.execute('UPDATE users SET is_approved = 1 WHERE email = ? AND is_approved = 0', (email,))
 
             if c.rowcount > 0: 
                 return jsonify({
@@ -168,8 +314,7 @@ def approve_user_api():
                     "message": f"User {email} approved successfully."
                 })
             else:
-                c.execute('SELECT COUNT(*) FROM users WHERE email = ?', (email,))
-                user_exists = c.fetchone()[0] > 0
+                user_exists = conn.execute('SELECT COUNT(*) FROM users WHERE email = ?', (email,)).fetchone()[0] > 0
                 message = "User not found or already approved." if user_exists else "User not found."
                 return jsonify({
                     "success": False,
@@ -189,7 +334,6 @@ def delete_user_api():
     if not is_admin:
         return response, status_code
 
-    db_path = current_app.config.get('DATABASE_PATH', 'users.db')
     try:
         email = request.form['email']
 
@@ -197,10 +341,8 @@ def delete_user_api():
         if email == admin_user_email or email == session.get('email'):
              return jsonify({"success": False, "message": "Admin cannot delete their own account."}), 403
 
-        with sqlite3.connect(db_path) as conn:
-            c = conn.cursor()
-            c.execute('DELETE FROM users WHERE email = ?', (email,))
-            conn.commit()
+        with user_db().connection() as conn:
+            c = conn.execute('DELETE FROM users WHERE email = ?', (email,))
 
             if c.rowcount > 0:
                 return jsonify({
@@ -226,23 +368,17 @@ def get_all_users_api():
     if not is_admin:
         return response, status_code
 
-    db_path = current_app.config.get('DATABASE_PATH', 'users.db')
     try:
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row 
-            c = conn.cursor()
-            c.execute('SELECT id, username, email, is_approved FROM users')
-            all_users = c.fetchall()
-
-            users_list = [
-                {"id": user["id"], "username": user["username"], "email": user["email"], "isApproved": bool(user["is_approved"])}
-                for user in all_users
-            ]
+        after, limit = _page_args()
+        users, next_cursor = list_users_page("all", after, limit)
 
-            return jsonify({
-                "success": True,
-                "users": users_list
-            })
+        return jsonify({
+            "success": True,
+            "users": users,
+            "nextCursor": next_cursor
+        })
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Invalid paging parameters: {e}"}), 400
     except Exception as e:
         current_app.logger.error(f"Get all users error: {e}")
         return jsonify({"success": False, "message": "Error fetching users."}), 500
\ No newline at end of file
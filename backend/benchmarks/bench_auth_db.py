@@ -0,0 +1,113 @@
+# backend/benchmarks/bench_auth_db.py
+# Login/signup database throughput at N threads: the old access pattern (sqlite3.connect per request,
+# rollback journal) vs db.ConnectionPool (pooled WAL connections). Password hashing is excluded - the
+# hash is computed once up front - so the numbers isolate the database work.
+#
+#   cd backend && python benchmarks/bench_auth_db.py [--threads 1 4 8 16] [--seconds 3] [--signup-share 0.1]
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import ConnectionPool, SCHEMA, init_schema # noqa: E402
+
+SEED_USERS = 5000
+PASSWORD_HASH = generate_password_hash("benchmark-password")
+
+
+def seed(db_path: str, wal: bool) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        for statement in SCHEMA: conn.execute(statement)
+        conn.executemany("INSERT INTO users (username, email, password, is_approved) VALUES (?, ?, ?, 1)",
+                         [(f"user{i}", f"user{i}@example.com", PASSWORD_HASH) for i in range(SEED_USERS)])
+
+
+def legacy_ops(db_path: str):
+    def login(email):
+        with sqlite3.connect(db_path) as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM users WHERE email = ?', (email,))
+            return c.fetchone()
+
+    def signup(email):
+        with sqlite3.connect(db_path) as conn:
+            c = conn.cursor()
+            c.execute('INSERT INTO users (username, email, password) VALUES (?, ?, ?)', (email, email, PASSWORD_HASH))
+            conn.commit()
+    return login, signup
+
+
+def pooled_ops(db_path: str):
+    pool = ConnectionPool(db_path, size=8)
+    init_schema(pool)
+
+    def login(email):
+        with pool.connection() as conn:
+            return conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+
+    def signup(email):
+        with pool.connection() as conn:
+            conn.execute('INSERT INTO users (username, email, password) VALUES (?, ?, ?)', (email, email, PASSWORD_HASH))
+    return login, signup
+
+
+def run(ops, n_threads: int, seconds: float, signup_share: float) -> dict:
+    login, signup = ops
+    latencies = [[] for _ in range(n_threads)]
+    errors = [0] * n_threads
+    stop_at = time.perf_counter() + seconds
+    barrier = threading.Barrier(n_threads)
+
+    def worker(index):
+        rng = random.Random(index)
+        barrier.wait()
+        counter = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                if rng.random() < signup_share:
+                    counter += 1
+                    signup(f"new-{index}-{counter}-{time.time_ns()}@example.com")
+                else:
+                    login(f"user{rng.randrange(SEED_USERS)}@example.com")
+            except sqlite3.OperationalError:
+                errors[index] += 1 # "database is locked" after the busy timeout
+            latencies[index].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    all_latencies = np.array([latency for per_thread in latencies for latency in per_thread]) * 1000
+    return {"ops_per_s": len(all_latencies) / seconds, "p50_ms": float(np.percentile(all_latencies, 50)),
+            "p95_ms": float(np.percentile(all_latencies, 95)), "errors": sum(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--signup-share", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7}  {'access':<22} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for n_threads in args.threads:
+        for name, make_ops, wal in (("connect per request", legacy_ops, False), ("pooled WAL", pooled_ops, True)):
+            with tempfile.TemporaryDirectory() as directory:
+                db_path = os.path.join(directory, "users.db")
+                seed(db_path, wal)
+                result = run(make_ops(db_path), n_threads, args.seconds, args.signup_share)
+            print(f"{n_threads:>7}  {name:<22} {result['ops_per_s']:>9,.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p95_ms']:>8.2f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
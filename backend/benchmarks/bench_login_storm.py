@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_login_storm.py
+# Login storm: N threads verifying passwords back to back while a probe thread runs a cheap request-sized
+# task (JSON round trip) every few ms. Compares hashing on the request threads (workers=0, the old
+# behaviour) with passwords.PasswordHasher's process pool. The probe latency shows how much a storm
+# slows unrelated requests in the same worker; logins/s shows hashing throughput.
+#
+#   cd backend && python benchmarks/bench_login_storm.py [--threads 8 32] [--workers 2] [--seconds 5]
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from passwords import PasswordHasher, PasswordPoolBusy # noqa: E402
+from config import Config # noqa: E402
+
+PASSWORD = "benchmark-password"
+PROBE_PAYLOAD = {"points": [[6.5 + i / 1000, 3.4 + i / 1000] for i in range(200)], "cost": 123.45}
+
+
+def probe(stop: threading.Event, latencies: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        json.loads(json.dumps(PROBE_PAYLOAD))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.005)
+
+
+def run(hasher: PasswordHasher, stored_hash: str, n_threads: int, seconds: float) -> dict:
+    hasher.verify(stored_hash, PASSWORD) # Start the pool outside the timed window
+    logins = [0] * n_threads
+    busy = [0] * n_threads
+    probe_latencies = []
+    stop = threading.Event()
+    stop_at = time.perf_counter() + seconds
+
+    def worker(index):
+        while time.perf_counter() < stop_at:
+            try:
+                if hasher.verify(stored_hash, PASSWORD): logins[index] += 1
+            except PasswordPoolBusy:
+                busy[index] += 1
+
+    probe_thread = threading.Thread(target=probe, args=(stop, probe_latencies))
+    probe_thread.start()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    stop.set()
+    probe_thread.join()
+    probe_ms = np.array(probe_latencies) * 1000
+    return {"logins_per_s": sum(logins) / seconds, "busy": sum(busy),
+            "probe_p50_ms": float(np.percentile(probe_ms, 50)), "probe_p95_ms": float(np.percentile(probe_ms, 95))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--workers", type=int, default=Config.PASSWORD_POOL_WORKERS)
+    parser.add_argument("--method", default=Config.PASSWORD_HASH_METHOD)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    stored_hash = PasswordHasher(args.method, workers=0).hash(PASSWORD)
+    print(f"method {args.method}, {os.cpu_count()} CPUs")
+    print(f"{'threads':>7}  {'hashing':<20} {'logins/s':>9} {'busy':>6} {'probe p50':>10} {'probe p95':>10}")
+    for n_threads in args.threads:
+        for name, workers in (("request thread", 0), (f"pool ({args.workers} procs)", args.workers)):
+            hasher = PasswordHasher(args.method, workers=workers, max_pending=Config.PASSWORD_POOL_MAX_PENDING,
+                                    timeout=Config.PASSWORD_POOL_TIMEOUT)
+            result = run(hasher, stored_hash, n_threads, args.seconds)
+            print(f"{n_threads:>7}  {name:<20} {result['logins_per_s']:>9.1f} {result['busy']:>6} "
+                  f"{result['probe_p50_ms']:>8.2f}ms {result['probe_p95_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
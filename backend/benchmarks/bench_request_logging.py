@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_request_logging.py
+# Logging cost of /api/diesel/route. Every upstream cache is seeded first, so each request makes no upstream calls
+# and logging is a large part of what is left. The same requests are timed under:
+#   - sync:   root StreamHandler, formatted and written on the request thread (what logging.basicConfig gave)
+#   - queue:  logging_setup.configure_logging() - queue handler, writer thread, no sampling
+#   - queue+sampling: the same plus Config.LOG_SAMPLE_RATES
+# and report request latency and CPU, split into the request thread and the whole process (incl. the writer thread).
+#
+#   cd backend && python benchmarks/bench_request_logging.py [--requests 2000] [--level INFO]
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP = tempfile.mkdtemp(prefix="bench_logging_")
+for key, value in {"PREWARM_ENABLED": "False", "MODEL_POLL_SECONDS": "0", "CACHE_BACKEND": "memory",
+                   "TRIP_LOG_ENABLED": "False", "RATE_LIMIT_ENABLED": "False", "ROUTE_STORE_DIR": os.path.join(TMP, "routes"),
+                   "PROFILE_DIR": os.path.join(TMP, "profiles"), "DATABASE_PATH": os.path.join(TMP, "users.db"),
+                   "HERE_API_KEY": "benchmark", "WEATHER_API_KEY": "benchmark"}.items():
+    os.environ.setdefault(key, value)
+sys.path.insert(0, BACKEND)
+from app import app # noqa: E402
+import diesel_api # noqa: E402
+from config import Config # noqa: E402
+from logging_setup import configure_logging, stop_logging, logging_stats, TEXT_FORMAT # noqa: E402
+
+ORIGIN, DESTINATION = "Lagos", "Abuja"
+JOURNEY_DATE = datetime.date.today().isoformat()
+
+
+def seed_caches() -> None:
+    """Lane geometry, forecast and traffic for one lane, as a previous request would have left them."""
+    t = np.linspace(0, 1, 3000)[:, None]
+    route = np.array([6.52, 3.38]) * (1 - t) + np.array([9.07, 7.40]) * t
+    diesel_api.lane_cache.set((ORIGIN, DESTINATION), {
+        "origin": ORIGIN, "destination": DESTINATION, "route_points": route.tolist(),
+        "weather_coords": route[::250].tolist(), "weather_weights": [45.0] * len(route[::250]),
+        "fuel_stations": route[200::400].tolist(), "start_coords": tuple(route[0]), "dest_coords": tuple(route[-1]),
+        "city_km": 60.0, "highway_km": 480.0, "total_km": 540.0, "fuel_search_complete": True,
+    })
+    diesel_api.forecast_cache.set((ORIGIN, DESTINATION), {JOURNEY_DATE: (29.5, "Low", "Medium")})
+    diesel_api.traffic_cache.put(ORIGIN, DESTINATION, 12.0)
+
+
+def use_sync_logging(stream, level: str) -> None:
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers): root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def run(client, n_requests: int) -> dict:
+    form = {"pallets": "10", "vehicleModel": diesel_api.vehicle_type_nigeria[0], "originDepot": ORIGIN,
+            "destinationDepot": DESTINATION, "vehicleAge": "5", "dispatchTime": "08:00", "journeyDate": JOURNEY_DATE}
+    for _ in range(20): client.post("/api/diesel/route", data=form) # Warm-up
+    latencies, thread_cpu = [], 0.0
+    process_cpu = time.process_time()
+    for _ in range(n_requests):
+        started, started_cpu = time.perf_counter(), time.thread_time()
+        response = client.post("/api/diesel/route", data=form)
+        thread_cpu += time.thread_time() - started_cpu
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.data[:200]
+    stop_logging() # Drain the queue so the writer thread's work is counted
+    process_cpu = time.process_time() - process_cpu
+    latencies = np.array(latencies) * 1000
+    return {"p50_ms": np.percentile(latencies, 50), "p95_ms": np.percentile(latencies, 95),
+            "thread_cpu_ms": thread_cpu / n_requests * 1000, "process_cpu_ms": process_cpu / n_requests * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--level", default="INFO")
+    args = parser.parse_args()
+    seed_caches()
+    client = app.test_client()
+
+    print(f"{args.requests} warm-cache route requests, level {args.level}")
+    print(f"{'logging':<16} {'p50':>8} {'p95':>8} {'req-thread CPU':>15} {'process CPU':>12} {'lines/req':>10}")
+    for name in ("sync", "queue", "queue+sampling"):
+        log_path = os.path.join(TMP, f"{name}.log")
+        with open(log_path, "w") as stream:
+            if name == "sync": use_sync_logging(stream, args.level)
+            else: configure_logging(args.level, "text", Config.LOG_SAMPLE_RATES if name == "queue+sampling" else "",
+                                    handler=logging.StreamHandler(stream))
+            result = run(client, args.requests)
+        with open(log_path) as f: lines = sum(1 for _ in f)
+        print(f"{name:<16} {result['p50_ms']:>6.2f}ms {result['p95_ms']:>6.2f}ms {result['thread_cpu_ms']:>13.2f}ms "
+              f"{result['process_cpu_ms']:>10.2f}ms {lines / (args.requests + 20):>10.1f}")
+    print(f"queue handler drops: {logging_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_route_serialization.py
+# Server CPU per response and bytes on the wire for /api/diesel/route-shaped payloads:
+# the old jsonify path (stdlib encoder over Python float lists) vs serialization.json_response's
+# encoder (rounded NumPy arrays, orjson when installed), each uncompressed / gzip / brotli.
+#
+#   cd backend && python benchmarks/bench_route_serialization.py [--points 2000 8000 20000] [--repeat 50]
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import serialization # noqa: E402
+from serialization import dumps, round_coordinates # noqa: E402
+from config import Config # noqa: E402
+
+
+def make_route(n_points: int) -> np.ndarray:
+    """Lagos -> Abuja-like polyline with some wiggle, stored as float32 like the route store."""
+    t = np.linspace(0.0, 1.0, n_points)
+    lat = 6.45 + 2.62 * t + 0.01 * np.sin(t * 300)
+    lon = 3.39 + 4.10 * t + 0.01 * np.cos(t * 250)
+    return np.column_stack([lat, lon]).astype(np.float32)
+
+
+def payload(coordinates) -> dict:
+    return {
+        "success": True, "degraded": [],
+        "route": {"origin": "Lagos", "destination": "Abuja", "coordinates": coordinates,
+                  "stations": [{"name": f"Fuel Station {i+1}", "coordinates": (7.1 + i / 10, 4.2 + i / 10)} for i in range(6)],
+                  "total_distance": 756.4},
+        "analytics": {"average_temperature": 29.4, "efficiency_prediction": 2.61, "total_final_cost": 412345.67},
+    }
+
+
+def old_path(points: np.ndarray) -> bytes:
+    # What the route endpoint did before: list of Python floats through Flask's stdlib JSON provider
+    return json.dumps(payload(points.astype(np.float64).tolist()), sort_keys=True).encode("utf-8")
+
+
+def new_path(points: np.ndarray) -> bytes:
+    return dumps(payload(round_coordinates(points)))
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    fn() # warm-up
+    started = time.process_time()
+    for _ in range(repeat): fn()
+    return (time.process_time() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[2000, 8000, 20000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    encoders = [("jsonify (old)", old_path), (f"fast ({'orjson' if serialization.orjson else 'stdlib'}, {Config.COORDINATE_DECIMALS} dp)", new_path)]
+    compressors = [("none", lambda body: body), (f"gzip-{Config.GZIP_LEVEL}", lambda body: gzip.compress(body, compresslevel=Config.GZIP_LEVEL))]
+    if serialization.brotli is not None:
+        compressors.append((f"br-{Config.BROTLI_QUALITY}", lambda body: serialization.brotli.compress(body, quality=Config.BROTLI_QUALITY)))
+    else:
+        print("(brotli not installed - skipping br)")
+
+    print(f"{'points':>7}  {'encoder':<28} {'encoding':<9} {'cpu ms/resp':>11} {'bytes':>10}")
+    for n_points in args.points:
+        points = make_route(n_points)
+        for encoder_name, encode in encoders:
+            body = encode(points)
+            for compressor_name, compress in compressors:
+                ms = cpu_ms(lambda: compress(encode(points)), args.repeat)
+                print(f"{n_points:>7}  {encoder_name:<28} {compressor_name:<9} {ms:>11.2f} {len(compress(body)):>10,}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
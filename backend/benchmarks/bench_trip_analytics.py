@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_trip_analytics.py
+# Trip history analytics on synthetic data: builds N trips as columnar segments, then times TripLog.aggregate()
+# (memory-mapped columns + np.bincount) against a pandas groupby over the same trips held as a DataFrame.
+# Also times the request-path cost of record().
+#
+#   cd backend && python benchmarks/bench_trip_analytics.py [--trips 2000000] [--segment-rows 250000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trip_log import TripLog, write_segment, journey_day, CATEGORICAL_COLUMNS, NUMERIC_COLUMNS # noqa: E402
+
+DEPOTS = [f"Depot {i}" for i in range(8)]
+VEHICLES = [f"Truck {i}" for i in range(12)]
+CATEGORIES = {"origin": DEPOTS, "destination": DEPOTS, "vehicle": VEHICLES, "dispatch_window": ["morning", "night", "noon"],
+              "traffic": ["heavy", "light", "moderate"], "rain": ["heavy", "light", "none"], "snow": ["none"]}
+FIRST_DAY = journey_day("2023-01-01")
+DAYS = 730
+
+
+def synthetic_segment(rng: np.random.Generator, rows: int) -> dict:
+    columns = {column: rng.integers(0, len(CATEGORIES[column]), rows).astype(np.uint16) for column in CATEGORICAL_COLUMNS}
+    columns["journey_day"] = (FIRST_DAY + rng.integers(0, DAYS, rows)).astype(np.int32)
+    columns["created_at"] = (columns["journey_day"].astype(np.int64) * 86400)
+    for column, dtype in NUMERIC_COLUMNS.items():
+        if column not in columns: columns[column] = rng.uniform(1, 1000, rows).astype(dtype)
+    return columns
+
+
+def timed(fn, repeat: int = 5) -> tuple:
+    """(first call ms, best of the repeats ms, result)."""
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return times[0] * 1000, min(times) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trips", type=int, default=2_000_000)
+    parser.add_argument("--segment-rows", type=int, default=250_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        frames = []
+        for offset in range(0, args.trips, args.segment_rows):
+            columns = synthetic_segment(rng, min(args.segment_rows, args.trips - offset))
+            write_segment(directory, columns, CATEGORIES)
+            frame = pd.DataFrame({column: columns[column] for column in NUMERIC_COLUMNS})
+            for column in CATEGORICAL_COLUMNS: frame[column] = np.array(CATEGORIES[column], dtype=object)[columns[column]]
+            frames.append(frame)
+        frame = pd.concat(frames, ignore_index=True)
+        frame["week"] = (frame["journey_day"] + 3) // 7
+        frame["lane"] = frame["origin"] + " -> " + frame["destination"]
+        log = TripLog(directory, flush_rows=10**9)
+        print(f"{log.count():,} trips in {len(log.segments())} segments, "
+              f"{sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(directory) for f in files) / 1e6:.0f} MB on disk")
+
+        queries = {
+            "cost per lane per week": (
+                lambda: log.aggregate(("lane",), "week"),
+                lambda: frame.groupby(["lane", "week"]).agg(total_cost=("total_cost", "sum"), fuel_cost=("fuel_cost", "sum"),
+                                                            total_km=("total_km", "sum"), trips=("total_cost", "size"))),
+            "efficiency per vehicle": (
+                lambda: log.aggregate(("vehicle",), None),
+                lambda: frame.groupby("vehicle").agg(total_km=("total_km", "sum"), fuel_litres=("fuel_litres", "sum"))),
+            "one vehicle, one quarter, per lane": (
+                lambda: log.aggregate(("lane",), None, journey_day("2024-01-01"), journey_day("2024-04-01"), {"vehicle": "Truck 3"}),
+                lambda: frame[(frame["vehicle"] == "Truck 3") & (frame["journey_day"] >= journey_day("2024-01-01")) &
+                              (frame["journey_day"] < journey_day("2024-04-01"))].groupby("lane")["total_cost"].sum()),
+        }
+        # Cold = first query over these segments; warm = later ones (per-segment partials memoized)
+        print(f"{'query':<36} {'cold ms':>8} {'warm ms':>8} {'pandas ms':>10} {'rows':>6}")
+        for name, (columnar, baseline) in queries.items():
+            cold_ms, warm_ms, rows = timed(columnar)
+            _, pandas_ms, _ = timed(baseline, repeat=2)
+            print(f"{name:<36} {cold_ms:>8.1f} {warm_ms:>8.1f} {pandas_ms:>10.1f} {len(rows):>6}")
+
+        trip = {"origin": DEPOTS[0], "destination": DEPOTS[1], "vehicle": VEHICLES[0], "dispatch_window": "noon",
+                "traffic": "light", "rain": "none", "snow": "none", "journey_day": "2024-05-01", "total_km": 500,
+                "fuel_litres": 150, "fuel_cost": 150000, "total_cost": 180000}
+        started = time.perf_counter()
+        for _ in range(10000): log.record(trip)
+        record_us = (time.perf_counter() - started) / 10000 * 1e6
+        flush_ms, _, _ = timed(log.flush, repeat=1)
+        print(f"record(): {record_us:.1f} us per trip on the request path; flushing 10,000 trips: {flush_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# backend/cache.py
+# TTL caches for upstream results (geocodes, routes, traffic, forecasts, predictions) over a pluggable backend:
+#   - MemoryBackend: per-process LRU, bounded by (pickled) byte size
+#   - SQLiteBackend: one WAL-mode file shared by every worker process on the node, so new workers start warm
+
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+_MISSING = object()
+_caches = [] # Every TTLCache created in this process, for cache_stats()
+
+
+class CacheBackend:
+    """
+    Storage for one named cache. Entries are (expires_at, value) with expires_at in epoch seconds.
+    Backends keep expired entries (for stale reads) and evict least-recently-used ones above max_bytes.
+    """
+
+    def load(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        raise NotImplementedError
+
+    def expires_at(self, key: Hashable) -> Optional[float]:
+        entry = self.load(key)
+        return None if entry is None else entry[0]
+
+    def store(self, key: Hashable, value: Any, expires_at: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[Hashable, float, Any]]:
+        """Yields (key, expires_at, value) for every stored entry."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU; entry sizes are measured as their pickled length."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None: return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def expires_at(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    def store(self, key, value, expires_at):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self._bytes -= old[2]
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self._bytes -= old[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def items(self):
+        with self._lock:
+            snapshot = [(key, entry[0], entry[1]) for key, entry in self._entries.items()]
+        yield from snapshot
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared by all processes that open the same file; each cache uses its own namespace.
+    Values are pickled (the file is local to the node and written only by this app).
+    Last-access times are refreshed at most every touch_interval seconds to keep reads mostly write-free.
+    """
+
+    def __init__(self, db_path: str, namespace: str, max_bytes: int, touch_interval: float = 60.0):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_entries (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                     "key_blob BLOB NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL, "
+                     "accessed REAL NOT NULL, PRIMARY KEY (namespace, key))")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return repr(key)
+
+    def load(self, key):
+        row = self._conn().execute(
+            "SELECT value, expires_at, accessed FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, self._key(key))
+        ).fetchone()
+        if row is None: return None
+        now = time.time()
+        if now - row[2] > self.touch_interval:
+            self._conn().execute("UPDATE cache_entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                                 (now, self.namespace, self._key(key)))
+        return row[1], pickle.loads(row[0])
+
+    def expires_at(self, key):
+        row = self._conn().execute("SELECT expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                                   (self.namespace, self._key(key))).fetchone()
+        return None if row is None else row[0]
+
+    def store(self, key, value, expires_at):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO cache_entries (namespace, key, key_blob, value, size, expires_at, accessed) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (self.namespace, self._key(key), pickle.dumps(key), blob, len(blob), expires_at, time.time()))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+            if total > self.max_bytes:
+                # Evict least recently used entries (never the one just written) until under the bound
+                for evict_key, size in conn.execute(
+                    "SELECT key, size FROM cache_entries WHERE namespace = ? AND key != ? ORDER BY accessed",
+                    (self.namespace, self._key(key))
+                ).fetchall():
+                    if total <= self.max_bytes: break
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, evict_key))
+                    total -= size
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, self._key(key)))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def items(self):
+        rows = self._conn().execute("SELECT key_blob, expires_at, value FROM cache_entries WHERE namespace = ?",
+                                    (self.namespace,)).fetchall()
+        for key_blob, expires_at, value in rows:
+            yield pickle.loads(key_blob), expires_at, pickle.loads(value)
+
+    def stats(self):
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return {"backend": "sqlite", "path": self.db_path, "entries": count, "bytes": total, "max_bytes": self.max_bytes}
+
+
+def make_backend(name: str, max_bytes: Optional[int] = None) -> CacheBackend:
+    """Backend for the named cache as selected by Config.CACHE_BACKEND ("memory" or "sqlite")."""
+    max_bytes = Config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if Config.CACHE_BACKEND == "sqlite":
+        try:
+            return SQLiteBackend(Config.CACHE_DB_PATH, name, max_bytes)
+        except sqlite3.Error as e:
+            logger.error(f"Shared cache unavailable ({Config.CACHE_DB_PATH}: {e}); '{name}' falls back to in-memory.")
+    return MemoryBackend(max_bytes)
+
+
+class TTLCache:
+    """
+    Cache whose entries expire after ttl_seconds. Expired entries stay readable through get_stale()
+    until evicted. get_or_compute() is single-flight within a process: concurrent misses for the same
+    key run the factory once. Hit/miss counters are per process.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, backend: Optional[CacheBackend] = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.backend = make_backend(name) if backend is None else backend
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        _caches.append(self)
+
+    def _load(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        try:
+            return self.backend.load(key)
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Cache '{self.name}' read failed for {key!r}: {e}")
+            return None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._load(key)
+        with self._lock:
+            if entry is None or entry[0] < time.time():
+                self.misses += 1
+                return default
+            self.hits += 1
+        return entry[1]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the last stored value even if expired (kept until evicted) - for degraded-mode fallbacks."""
+        entry = self._load(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        try:
+            self.backend.store(key, value, expires_at)
+        except (sqlite3.Error, pickle.PicklingError) as e:
+            logger.warning(f"Cache '{self.name}' write failed for {key!r}: {e}")
+
+    def get_or_compute(self, key: Hashable, factory: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Returns the cached value or computes, stores and returns it.
+        None results (and results rejected by `cacheable`) are returned but not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING: return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another thread (or worker, with a shared backend) may have filled the entry while we waited
+            value = self.get(key, _MISSING)
+            if value is not _MISSING: return value
+            try:
+                value = factory()
+                if value is not None and (cacheable is None or cacheable(value)): self.set(key, value)
+                return value
+            finally:
+                with self._lock: self._key_locks.pop(key, None)
+
+    def invalidate(self, key: Hashable = _MISSING) -> None:
+        """Drops one key, or everything when called without a key."""
+        if key is _MISSING: self.backend.clear()
+        else: self.backend.delete(key)
+
+    def items(self) -> Iterator[Tuple[Hashable, float, Any]]:
+        return self.backend.items()
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry expires (negative once expired), or None if it is not stored."""
+        try:
+            expires_at = self.backend.expires_at(key)
+        except sqlite3.Error:
+            return None
+        return None if expires_at is None else expires_at - time.time()
+
+    def __contains__(self, key: Hashable) -> bool:
+        try:
+            expires_at = self.backend.expires_at(key)
+        except sqlite3.Error:
+            return False
+        return expires_at is not None and expires_at >= time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            counters = {
+                "name": self.name, "ttl_seconds": self.ttl_seconds, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+        try:
+            counters.update(self.backend.stats())
+        except sqlite3.Error as e:
+            counters["backend_error"] = str(e)
+        return counters
+
+
+def cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in _caches}
@@ -0,0 +1,154 @@
+# backend/circuit_breaker.py
+# Per-provider circuit breakers for upstream HTTP calls (HERE, Mapbox, geocode.maps.co, WeatherAPI).
+
+import threading
+import time
+import logging
+from collections import deque
+import requests
+from config import Config
+from deadline import clip_timeout
+from rate_limit import limiter, PRIORITY_NORMAL
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a provider whose breaker is open. Existing RequestException handlers apply."""
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker. Opens when, over the last window_seconds (and at least min_calls calls),
+    the error rate or the slow-call rate (latency > slow_call_seconds) reaches its threshold.
+    After open_seconds one half-open probe is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, window_seconds: float = 60, min_calls: int = 5, error_rate: float = 0.5,
+                 slow_call_seconds: float = 5.0, slow_call_rate: float = 0.5, open_seconds: float = 30):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self._calls = deque() # (timestamp, ok, latency_seconds)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CLOSED: return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record(self, ok: bool, latency_seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and latency_seconds <= self.slow_call_seconds:
+                    logger.info(f"Circuit '{self.name}' closed after successful probe.")
+                    self.state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._trip(now)
+                return
+            self._calls.append((now, ok, latency_seconds))
+            self._prune(now)
+            total = len(self._calls)
+            if self.state == CLOSED and total >= self.min_calls:
+                errors = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+                slow = sum(1 for _, _, latency in self._calls if latency > self.slow_call_seconds)
+                if errors / total >= self.error_rate or slow / total >= self.slow_call_rate:
+                    self._trip(now)
+
+    def cancel_probe(self) -> None:
+        """Releases a half-open probe without recording an outcome (the call was aborted on our side)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _trip(self, now: float) -> None:
+        logger.warning(f"Circuit '{self.name}' OPEN for {self.open_seconds}s.")
+        self.state = OPEN
+        self.opened_at = now
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._prune(time.monotonic())
+            total = len(self._calls)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            return {
+                "state": self.state, "calls_in_window": total,
+                "error_rate": round(sum(1 for _, ok, _ in self._calls if not ok) / total, 3) if total else 0.0,
+                "p95_latency_ms": round(latencies[int(0.95 * (total - 1))] * 1000, 1) if total else None,
+                "short_circuited": self.short_circuited,
+            }
+
+
+breakers = {
+    name: CircuitBreaker(
+        name, window_seconds=Config.BREAKER_WINDOW_SECONDS, min_calls=Config.BREAKER_MIN_CALLS,
+        error_rate=Config.BREAKER_ERROR_RATE, slow_call_seconds=Config.BREAKER_SLOW_CALL_SECONDS,
+        open_seconds=Config.BREAKER_OPEN_SECONDS,
+    )
+    for name in ("here", "mapbox", "geocode", "weather")
+}
+
+
+def guarded_get(provider: str, url: str, priority: str = PRIORITY_NORMAL, **kwargs) -> requests.Response:
+    """
+    requests.get through the provider's rate limiter and breaker, with the timeout cut to the request deadline.
+    5xx/429 and transport errors count as failures (except timeouts caused by our own deadline cut).
+    Raises RateLimited when the call is shed (priority="low") or would queue past its wait budget.
+    """
+    requested_timeout = kwargs.get("timeout")
+    clip_timeout(requested_timeout) # A spent deadline fails here, before it costs a probe or a token
+    breaker = breakers[provider]
+    if not breaker.allow(): # An open circuit must not spend tokens or daily quota, nor queue for them
+        raise CircuitOpenError(f"Circuit for '{provider}' is open; skipping {url}")
+    try:
+        if limiter is not None: limiter.acquire(provider, priority)
+        kwargs["timeout"] = clip_timeout(requested_timeout) # Cut again: waiting for a token used up budget
+    except Exception:
+        breaker.cancel_probe() # Admitted as the half-open probe but never sent
+        raise
+    deadline_cut = kwargs["timeout"] != requested_timeout
+    started = time.monotonic()
+    try:
+        response = requests.get(url, **kwargs)
+    except requests.exceptions.Timeout:
+        if deadline_cut: breaker.cancel_probe() # Our budget ran out, not the provider's fault
+        else: breaker.record(False, time.monotonic() - started)
+        raise
+    except requests.exceptions.RequestException:
+        breaker.record(False, time.monotonic() - started)
+        raise
+    breaker.record(response.status_code < 500 and response.status_code != 429, time.monotonic() - started)
+    return response
+
+
+def breaker_states() -> dict:
+    return {name: breaker.stats() for name, breaker in breakers.items()}
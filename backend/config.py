@@ -21,6 +21,136 @@ class Config:
 
     
     DATABASE_PATH = os.environ.get("DATABASE_PATH", "users.db")
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+    # Password hashing: werkzeug method string (e.g. "scrypt:32768:8:1", "pbkdf2:sha256:600000"); stored hashes
+    # with other parameters are upgraded on the next successful login. 0 workers = hash on the request thread.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_POOL_WORKERS = int(os.environ.get("PASSWORD_POOL_WORKERS", 2))
+    PASSWORD_POOL_MAX_PENDING = int(os.environ.get("PASSWORD_POOL_MAX_PENDING", 32))
+    PASSWORD_POOL_TIMEOUT = float(os.environ.get("PASSWORD_POOL_TIMEOUT", 10))
+    # Admin user listing: keyset pages of ADMIN_PAGE_SIZE (clients may ask for up to ADMIN_PAGE_MAX); bulk ops cap
+    ADMIN_PAGE_SIZE = int(os.environ.get("ADMIN_PAGE_SIZE", 50))
+    ADMIN_PAGE_MAX = int(os.environ.get("ADMIN_PAGE_MAX", 200))
+    ADMIN_BULK_MAX = int(os.environ.get("ADMIN_BULK_MAX", 500))
+    # Trip history: columnar segments under TRIP_LOG_DIR, flushed every TRIP_LOG_FLUSH_ROWS trips or
+    # TRIP_LOG_FLUSH_SECONDS; once more than TRIP_LOG_COMPACT_SEGMENTS small segments exist they are merged
+    TRIP_LOG_ENABLED = os.environ.get("TRIP_LOG_ENABLED", "True") == "True"
+    TRIP_LOG_DIR = os.environ.get("TRIP_LOG_DIR", "trip_log")
+    TRIP_LOG_FLUSH_ROWS = int(os.environ.get("TRIP_LOG_FLUSH_ROWS", 500))
+    TRIP_LOG_FLUSH_SECONDS = float(os.environ.get("TRIP_LOG_FLUSH_SECONDS", 5))
+    TRIP_LOG_SEGMENT_ROWS = int(os.environ.get("TRIP_LOG_SEGMENT_ROWS", 1_000_000))
+    TRIP_LOG_COMPACT_SEGMENTS = int(os.environ.get("TRIP_LOG_COMPACT_SEGMENTS", 32))
+
+    # "here": one HERE routing call gives geometry, city/highway split and traffic.
+    # "mapbox": legacy - HERE geometry + Mapbox for distances and traffic.
+    ROUTING_MODE = os.environ.get("ROUTING_MODE", "here").lower()
+
+    # Upstream caches. "memory": per-worker LRU; "sqlite": one WAL file shared by all workers on the node
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "sqlite").lower()
+    CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", "cache.db")
+    CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024)) # Per cache
+    GEOCODE_CACHE_TTL = int(os.environ.get("GEOCODE_CACHE_TTL", 7 * 24 * 3600))
+    LANE_CACHE_TTL = int(os.environ.get("LANE_CACHE_TTL", 6 * 3600))
+    WEATHER_CACHE_TTL = int(os.environ.get("WEATHER_CACHE_TTL", 3600))
+    PREDICTION_CACHE_TTL = int(os.environ.get("PREDICTION_CACHE_TTL", 24 * 3600))
+    # Prediction model: the artifact is re-checked every MODEL_POLL_SECONDS (0 = never) and swapped in once it
+    # validates; deploy by renaming a new file over it. MODEL_SHADOW_PATH (optional) is scored alongside for comparison.
+    MODEL_PATH = os.environ.get("MODEL_PATH", "Fossil_model.pkl")
+    MODEL_POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", 30))
+    MODEL_SHADOW_PATH = os.environ.get("MODEL_SHADOW_PATH", "")
+    MODEL_SHADOW_SAMPLE_RATE = float(os.environ.get("MODEL_SHADOW_SAMPLE_RATE", 1.0))
+    # Full route polylines: packed coordinate file + lane index, memory-mapped by every worker
+    ROUTE_STORE_DIR = os.environ.get("ROUTE_STORE_DIR", "route_store")
+    ROUTE_STORE_DTYPE = os.environ.get("ROUTE_STORE_DTYPE", "float32") # or "float64"
+    # Fleet route overlay tiles: lines simplified to ROUTE_TILE_TOLERANCE_PX at each zoom, stations from
+    # ROUTE_TILE_STATION_MIN_ZOOM up; browsers may reuse a tile for ROUTE_TILE_MAX_AGE seconds, then revalidate
+    ROUTE_TILE_MAX_ZOOM = int(os.environ.get("ROUTE_TILE_MAX_ZOOM", 18))
+    ROUTE_TILE_TOLERANCE_PX = float(os.environ.get("ROUTE_TILE_TOLERANCE_PX", 1.0))
+    ROUTE_TILE_BUFFER_PX = float(os.environ.get("ROUTE_TILE_BUFFER_PX", 8))
+    ROUTE_TILE_STATION_MIN_ZOOM = int(os.environ.get("ROUTE_TILE_STATION_MIN_ZOOM", 8))
+    ROUTE_TILE_MAX_AGE = int(os.environ.get("ROUTE_TILE_MAX_AGE", 300))
+
+    # GET /api/lanes/<origin>/<destination>: browsers and proxies may reuse a lane's geometry for LANE_MAX_AGE seconds, then revalidate
+    LANE_MAX_AGE = int(os.environ.get("LANE_MAX_AGE", 3600))
+
+    # Route responses: coordinate precision (5 decimals ~ 1 m) and compression of bodies >= COMPRESS_MIN_BYTES
+    COORDINATE_DECIMALS = int(os.environ.get("COORDINATE_DECIMALS", 5))
+    COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+    GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+    BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+
+    # Logging: records go through a bounded queue to one writer thread (dropped, not blocking, when full).
+    # LOG_SAMPLE_RATES keeps that share of each repeated INFO/DEBUG message per logger ("tracking=0.1,...");
+    # warnings and errors are never sampled. LOG_FORMAT "json" adds request summaries as structured fields.
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+    LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "tracking=0.1,diesel_routing_here=0.1")
+
+    # Request profiling: admins send "X-Profile: sample|cprofile|1"; PROFILE_SAMPLE_RATE also profiles that share of
+    # /api/ requests. The last PROFILE_RING_SIZE profiles are kept in PROFILE_DIR (shared by the workers)
+    PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "True") == "True"
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+    PROFILE_RING_SIZE = int(os.environ.get("PROFILE_RING_SIZE", 50))
+    PROFILE_MODE = os.environ.get("PROFILE_MODE", "sample") # "sample" (stack sampler) or "cprofile"
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", 5))
+
+    # Async route jobs (per worker pool; records kept JOB_RESULT_TTL seconds after their last update)
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+    JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 32))
+    JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", 900))
+
+    # Lane prefetch (StartForm warms a lane as soon as both depots are picked); a finished prefetch is reused for PREFETCH_RESULT_TTL
+    PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", 2))
+    PREFETCH_MAX_PENDING = int(os.environ.get("PREFETCH_MAX_PENDING", 16))
+    PREFETCH_RESULT_TTL = int(os.environ.get("PREFETCH_RESULT_TTL", 60))
+
+    # Lane cache pre-warmer: runs every interval while the local hour is in [start, end) - before and through the morning peak
+    PREWARM_ENABLED = os.environ.get("PREWARM_ENABLED", "True") == "True"
+    PREWARM_TIMEZONE = os.environ.get("PREWARM_TIMEZONE", "Africa/Lagos")
+    PREWARM_START_HOUR = int(os.environ.get("PREWARM_START_HOUR", 4))
+    PREWARM_END_HOUR = int(os.environ.get("PREWARM_END_HOUR", 10))
+    PREWARM_INTERVAL_SECONDS = int(os.environ.get("PREWARM_INTERVAL_SECONDS", 1800))
+    PREWARM_LANE_PAUSE_SECONDS = float(os.environ.get("PREWARM_LANE_PAUSE_SECONDS", 1))
+    PREWARM_MAX_QUOTA_SHARE = float(os.environ.get("PREWARM_MAX_QUOTA_SHARE", 0.8)) # Leave the rest of the daily quota to users
+    PREWARM_LOCK_PATH = os.environ.get("PREWARM_LOCK_PATH", "prewarm.lock")
+    TRAFFIC_BUCKET_SECONDS = int(os.environ.get("TRAFFIC_BUCKET_SECONDS", 600))
+    TRAFFIC_MAX_STALE_SECONDS = int(os.environ.get("TRAFFIC_MAX_STALE_SECONDS", 1800))
+
+    # Upstream circuit breakers (per provider, rolling window)
+    BREAKER_WINDOW_SECONDS = float(os.environ.get("BREAKER_WINDOW_SECONDS", 60))
+    BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", 5))
+    BREAKER_ERROR_RATE = float(os.environ.get("BREAKER_ERROR_RATE", 0.5))
+    BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", 5))
+    BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", 30))
+
+    # End-to-end request budget; optional stages (weather, fuel stations) are skipped below the minimum
+    REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 20))
+    DEADLINE_OPTIONAL_STAGE_MIN_SECONDS = float(os.environ.get("DEADLINE_OPTIONAL_STAGE_MIN_SECONDS", 3))
+    DEADLINE_MIN_CALL_SECONDS = float(os.environ.get("DEADLINE_MIN_CALL_SECONDS", 0.25))
+
+    # Upstream rate limits, shared by all workers through a local SQLite file.
+    # Per provider: "calls_per_second,burst,daily_quota" (0 quota = unlimited) - set to your plan's limits.
+    RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "True") == "True"
+    RATE_LIMIT_DB_PATH = os.environ.get("RATE_LIMIT_DB_PATH", "ratelimits.db")
+    RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get("RATE_LIMIT_MAX_WAIT_SECONDS", 2))
+    RATE_LIMITS = {
+        "here": os.environ.get("RATE_LIMIT_HERE", "10,30,8000"),
+        "mapbox": os.environ.get("RATE_LIMIT_MAPBOX", "5,10,3000"),
+        "geocode": os.environ.get("RATE_LIMIT_GEOCODE", "1,2,3000"),
+        "weather": os.environ.get("RATE_LIMIT_WEATHER", "10,30,30000"),
+    }
+    # Share of each bucket kept back for normal-priority calls; low-priority work is shed below it
+    RATE_LIMIT_LOW_PRIORITY_RESERVE = float(os.environ.get("RATE_LIMIT_LOW_PRIORITY_RESERVE", 0.2))
+    # Weather points always fetched; points beyond this are shed first when the WeatherAPI budget runs low
+    WEATHER_MIN_POINTS = int(os.environ.get("WEATHER_MIN_POINTS", 2))
+    # Weather sampling along a route: one point per WEATHER_SAMPLE_SPACING_KM (at least WEATHER_MIN_POINTS, at most
+    # WEATHER_MAX_POINTS); points in the same WEATHER_GRID_DEGREES cell share one forecast call
+    WEATHER_SAMPLE_SPACING_KM = float(os.environ.get("WEATHER_SAMPLE_SPACING_KM", 50))
+    WEATHER_MAX_POINTS = int(os.environ.get("WEATHER_MAX_POINTS", 25))
+    WEATHER_GRID_DEGREES = float(os.environ.get("WEATHER_GRID_DEGREES", 0.25))
 
     #default state
     DEBUG = os.environ.get("DEBUG", "False") == "True"
\ No newline at end of file
@@ -0,0 +1,154 @@
+# backend/db.py
+# Pooled SQLite access for the users database: WAL journal (readers don't block on writers), long-lived
+# connections so sqlite3's per-connection statement cache is reused, and the schema/indexes ensured once per process.
+
+import queue
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from flask import current_app
+from config import Config
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        is_approved INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    # email lookups use the UNIQUE index; the admin pending list filters on is_approved
+    'CREATE INDEX IF NOT EXISTS idx_users_is_approved ON users (is_approved, id)',
+    # Admin search is a case-insensitive prefix match, which LIKE 'q%' serves from NOCASE indexes
+    'CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users (email COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_users_username_nocase ON users (username COLLATE NOCASE)',
+    # Pending/approved totals for the admin tabs, kept current by triggers instead of a GROUP BY per page view.
+    # Seeded from the table the first time only; the triggers exist before the seed, so no write is missed.
+    'CREATE TABLE IF NOT EXISTS user_counts (approved INTEGER PRIMARY KEY, count INTEGER NOT NULL)',
+    """
+    CREATE TRIGGER IF NOT EXISTS users_count_insert AFTER INSERT ON users BEGIN
+        UPDATE user_counts SET count = count + 1 WHERE approved = (NEW.is_approved != 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_count_delete AFTER DELETE ON users BEGIN
+        UPDATE user_counts SET count = count - 1 WHERE approved = (OLD.is_approved != 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_count_update AFTER UPDATE OF is_approved ON users
+    WHEN (OLD.is_approved != 0) != (NEW.is_approved != 0) BEGIN
+        UPDATE user_counts SET count = count - 1 WHERE approved = (OLD.is_approved != 0);
+        UPDATE user_counts SET count = count + 1 WHERE approved = (NEW.is_approved != 0);
+    END
+    """,
+    'INSERT OR IGNORE INTO user_counts (approved, count) SELECT 0, COUNT(*) FROM users WHERE is_approved = 0',
+    'INSERT OR IGNORE INTO user_counts (approved, count) SELECT 1, COUNT(*) FROM users WHERE is_approved != 0',
+)
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """No pooled connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Up to `size` connections to one database file, opened lazily and handed out one thread at a time.
+    Connections run in autocommit mode; use transaction() for multi-statement writes.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, timeout: float = 5.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue() # Most recently used first: its pages and statements are warm
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None,
+                               check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"No free connection to {self.db_path} after {self.timeout}s")
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction: conn.rollback() # Never hand back a connection mid-transaction
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error) - takes the write lock up front, so no busy upgrade."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        return {"path": self.db_path, "size": self.size, "open": self._created, "idle": self._idle.qsize()}
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def init_schema(pool: ConnectionPool) -> None:
+    # One transaction, so a worker starting alongside another never seeds counts from a half-built schema
+    with pool.transaction() as conn:
+        for statement in SCHEMA: conn.execute(statement)
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Pool for db_path, created (and its schema ensured) on first use in this process."""
+    pool = _pools.get(db_path)
+    if pool is not None: return pool
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path, Config.DB_POOL_SIZE, Config.DB_POOL_TIMEOUT)
+            init_schema(pool)
+            logger.info(f"Database pool ready at {db_path} (WAL, {pool.size} connections).")
+            _pools[db_path] = pool
+    return pool
+
+
+def user_db() -> ConnectionPool:
+    """Pool for the current app's DATABASE_PATH."""
+    return get_pool(current_app.config.get('DATABASE_PATH', 'users.db'))
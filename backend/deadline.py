@@ -0,0 +1,60 @@
+# backend/deadline.py
+# Request-level deadline, propagated implicitly (contextvars) to every upstream call.
+
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Optional
+import requests
+from config import Config
+
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of starting an upstream call when the request's time budget is spent."""
+
+
+@contextmanager
+def request_deadline(seconds: float = None):
+    """Sets the deadline for everything called inside the block (defaults to Config.REQUEST_DEADLINE_SECONDS)."""
+    token = _deadline.set(time.monotonic() + (Config.REQUEST_DEADLINE_SECONDS if seconds is None else seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def with_request_deadline(view):
+    """Decorator: runs a Flask view under the default request deadline."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with request_deadline():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, or None when no deadline is set."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget_below(seconds: float) -> bool:
+    """True when a deadline is set and less than `seconds` remain - used to skip optional stages."""
+    left = remaining()
+    return left is not None and left < seconds
+
+
+def optional_stage_allowed() -> bool:
+    return not budget_below(Config.DEADLINE_OPTIONAL_STAGE_MIN_SECONDS)
+
+
+def clip_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Cuts an upstream call's timeout to the remaining budget; raises DeadlineExceeded if none is left."""
+    left = remaining()
+    if left is None: return timeout
+    if left < Config.DEADLINE_MIN_CALL_SECONDS:
+        raise DeadlineExceeded(f"Request deadline exceeded ({left:.2f}s left)")
+    return left if timeout is None else min(timeout, left)
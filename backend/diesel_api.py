@@ -1,33 +1,33 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for
 # Ensure tracking functions return km now
-from tracking import get_coordinates as tracking_get_coordinates, calculate_distances, get_route_traffic_data, get_weather_data
+from tracking import get_coordinates as tracking_get_coordinates, calculate_distances, get_route_traffic_data, get_weather_forecast_days
 # Ensure HERE functions use Nigeria context if needed, and return lat,lon
-from diesel_routing_here import get_here_directions, get_coordinates as here_get_coordinates, get_fuel_station_coordinates, get_route_with_fuel_stations
-import joblib
-import pandas as pd
+from diesel_routing_here import get_here_directions, get_coordinates as here_get_coordinates, get_fuel_station_coordinates, get_route_with_fuel_stations, plan_here_route, get_here_traffic_data
 import numpy as np
 import random
+import hashlib
+import json
+import sqlite3
 import requests # Keep for potential future Nigerian fuel API
 from config import Config
-import traceback # Import traceback for detailed error logging
+from cache import TTLCache
+from traffic_cache import TrafficSnapshotCache
+from route_store import route_store, EMPTY_ROUTE
+from serialization import json_response, round_coordinates
+from jobs import JobManager, JobQueueFull, report_progress
+from trip_log import trip_log
+from model_registry import ModelRegistry
+from logging_setup import with_request_summary, note, note_stage
+from rate_limit import background_work
+import deadline
 import logging # Import logging
+from typing import Optional, Tuple, Dict
 
 # --- Setup Logger ---
 logger = logging.getLogger(__name__)
 if not logger.hasHandlers():
      logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
 
-# --- Configuration & Model Loading ---
-try:
-    model = joblib.load('Fossil_model.pkl')
-    logger.info("Diesel prediction model loaded successfully.")
-except FileNotFoundError:
-    logger.error("Fossil_model.pkl not found. Predictions will fail.")
-    model = None
-except Exception as e:
-    logger.error(f"ERROR loading Fossil_model.pkl: {e}", exc_info=True)
-    model = None
-
 # --- Nigerian & Original UK Context Data (for workaround) ---
 nigerian_depots = [
     'Lagos', 'Abuja', 'Kano', 'Ibadan',
@@ -73,7 +73,7 @@ MPG_TO_KML = 0.425144 # 1 MPG = 0.425144 km/L
 # --- Fuel Price Handling (Nigeria) ---
 DEFAULT_NAIRA_PER_LITRE = 280.0
 def get_diesel_price_ng(city_name: str) -> float:
-    logger.info(f"Using default diesel price: {DEFAULT_NAIRA_PER_LITRE} NGN/Litre for {city_name}")
+    logger.debug("Using default diesel price: %s NGN/Litre for %s", DEFAULT_NAIRA_PER_LITRE, city_name)
     return DEFAULT_NAIRA_PER_LITRE
 
 # --- Helper Functions ---
@@ -87,13 +87,361 @@ def convert_time_to_window(time_str: str) -> str:
         logger.warning(f"Could not parse time string: {time_str}. Defaulting to 'noon'.")
         return "noon"
 
+def classify_traffic(traffic_delay_minutes: float) -> str:
+    return "high" if traffic_delay_minutes > 30 else "medium" if traffic_delay_minutes > 7 else "low"
+
+def classify_temperature(average_temperature: float) -> str:
+    return "high" if average_temperature > 30 else "medium" if average_temperature > 20 else "low"
+
+
+# --- Model Feature Layout ---
+# The model expects the base 14 features followed by the 10 original UK vehicle dummies (24 total),
+# using the ORIGINAL feature names and IMPERIAL values.
+base_model_features = [
+    "Vehicle_age", "Goods_weight", "Total_distance_miles", "Avg_traffic_congestion",
+    "Avg_temp", "Avg_Precipitation", "Avg_snow", "Origin_depot", "Destination_depot",
+    "Avg_Speed_mph", "Distance_highway", "Distance_city", "dispatch_time", "total_payload"
+]
+expected_model_features = base_model_features + vehicle_type_encoded_original_uk_list
+
+KG_PER_PALLET = 880.0
+# Use original hardcoded Avg_Speed_mph=65 that the model likely trained on
+AVG_SPEED_MPH_INPUT = 65.0
+FALLBACK_EFFICIENCY_KML = 2.0
+OVERHEAD_RATE = 0.10
+
+def map_vehicle_to_uk_dummy(vehicle_type: str) -> Optional[str]:
+    """Crude mapping of a Nigerian vehicle to the closest original UK dummy (needs refinement based on vehicle similarity)."""
+    if "DAF" in vehicle_type: return 'DAF XG 530'
+    elif "SCANIA" in vehicle_type: return 'SCANIA R 450'
+    elif "Volvo" in vehicle_type: return 'VOLVO FH 520'
+    elif "MAN" in vehicle_type: return 'MAN TGX 18.400' # Map TGS to TGX?
+    elif "IVECO" in vehicle_type: return 'IVECO NP 460' # Map Stralis to NP?
+    # Mercedes, SINOTRUK, TATA, MACK have no clear UK counterpart - all UK dummies stay 0.
+    return None
+
+# One dummy row per Nigerian vehicle (same order as vehicle_type_nigeria), plus an all-zero row for unknown vehicles.
+vehicle_dummy_table = np.zeros((len(vehicle_type_nigeria) + 1, len(vehicle_type_encoded_original_uk_list)))
+for _i, _vehicle in enumerate(vehicle_type_nigeria):
+    _uk_vehicle = map_vehicle_to_uk_dummy(_vehicle)
+    if _uk_vehicle in vehicle_type_encoded_original_uk_list:
+        vehicle_dummy_table[_i, vehicle_type_encoded_original_uk_list.index(_uk_vehicle)] = 1
+vehicle_index_ng = { name: i for i, name in enumerate(vehicle_type_nigeria) }
+
+def _encode(mapping: dict, values, default: int, lower: bool = False) -> np.ndarray:
+    """Encodes a scalar or sequence of category labels with the given mapping."""
+    if isinstance(values, str):
+        values = [values]
+    return np.asarray([mapping.get(str(v).lower() if lower else v, default) for v in values])
+
+def build_feature_matrix(vehicle_age, pallets, vehicle_type, dispatch_window, origin_depot, destination_depot,
+                         city_dist_km, highway_dist_km, traffic_severity, temp_category,
+                         rain_classification, snow_classification) -> np.ndarray:
+    """
+    Builds the (n, 24) model input matrix in expected_model_features order.
+    Every argument may be a scalar or a 1-D sequence; they are broadcast against each other,
+    so a whole scenario grid is encoded in one pass. Distances are METRIC in, IMPERIAL out.
+    """
+    payload_kg = np.atleast_1d(np.asarray(pallets, dtype=float)) * KG_PER_PALLET
+    city_miles = np.atleast_1d(np.asarray(city_dist_km, dtype=float)) * KM_TO_MILES
+    highway_miles = np.atleast_1d(np.asarray(highway_dist_km, dtype=float)) * KM_TO_MILES
+    (vehicle_age, payload_kg, city_miles, highway_miles, traffic, temp, rain, snow,
+     origin, destination, dispatch, vehicle_idx) = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(vehicle_age, dtype=float)), payload_kg, city_miles, highway_miles,
+        _encode(traffic_congestion_encoded, traffic_severity, -1, lower=True),
+        _encode(temp_encoded, temp_category, -1, lower=True),
+        _encode(precipitation_encoded, rain_classification, -1, lower=True),
+        _encode(snow_encoded, snow_classification, 0, lower=True),
+        _encode(origin_encoded_ng, origin_depot, -1),
+        _encode(origin_encoded_ng, destination_depot, -1),
+        _encode(dispatch_encoded, dispatch_window, -1),
+        _encode(vehicle_index_ng, vehicle_type, len(vehicle_type_nigeria)),
+    )
+    base = np.column_stack([
+        vehicle_age,
+        payload_kg, # Goods_weight - assume model can handle kg or value range is similar
+        city_miles + highway_miles, # Total_distance_miles
+        traffic, temp, rain, snow,
+        origin, destination, # Encoded using NG map - *potential issue if model expects UK encoding*
+        np.full(vehicle_age.shape, AVG_SPEED_MPH_INPUT),
+        highway_miles, city_miles,
+        dispatch,
+        payload_kg, # total_payload
+    ])
+    return np.hstack([base, vehicle_dummy_table[vehicle_idx]])
+
+# Predictions are deterministic for a given model and feature matrix - repeated quotes/sweeps skip the model
+prediction_cache = TTLCache("prediction", Config.PREDICTION_CACHE_TTL)
+
+# --- Model Registry ---
+# The model is loaded (and later hot-swapped) by the registry; validation batch = every vehicle x dispatch window
+# on a typical lane, encoded exactly as requests are.
+_validation_vehicles = np.repeat(vehicle_type_nigeria, len(dispatch_encoded))
+model_validation_features = build_feature_matrix(
+    5, 10, _validation_vehicles, np.tile(list(dispatch_encoded), len(vehicle_type_nigeria)),
+    nigerian_depots[0], nigerian_depots[1], 40.0, 400.0, "medium", "medium", "low", "none"
+)
+model_registry = ModelRegistry(
+    Config.MODEL_PATH, expected_model_features, model_validation_features, Config.MODEL_POLL_SECONDS,
+    Config.MODEL_SHADOW_PATH, Config.MODEL_SHADOW_SAMPLE_RATE
+)
+def _drop_stale_predictions(previous, current):
+    # Cache keys carry the model version, so a swap never serves the old model's numbers; this only frees the space
+    if previous is not None: prediction_cache.invalidate()
+model_registry.on_swap(_drop_stale_predictions)
+model_registry.load_initial()
+
+def predict_mpg(features: np.ndarray) -> np.ndarray:
+    """Runs a single batched model call over the feature matrix (cached by content). Returns raw MPG predictions."""
+    active = model_registry.active # One version for the whole batch, even if a swap lands meanwhile
+    if active is None:
+        raise RuntimeError("Prediction model unavailable.")
+    features = np.ascontiguousarray(features, dtype=float)
+    key = f"{active.version}:{features.shape}:{hashlib.blake2b(features.tobytes(), digest_size=16).hexdigest()}"
+    predictions = prediction_cache.get_or_compute(key, lambda: _run_model(active, features))
+    model_registry.score_shadow(features, predictions)
+    return predictions
+
+def _run_model(active, features: np.ndarray) -> np.ndarray:
+    predictions = active.predict(features)
+    predictions.setflags(write=False) # Shared through the cache
+    return predictions
+
+def calculate_fuel_costs(total_dist_km, efficiency_kml, fuel_price_per_litre_ngn) -> dict:
+    """Vectorised fuel metrics (km, km/L, NGN). Non-positive efficiencies use the fallback km/L."""
+    efficiency_kml = np.where(np.asarray(efficiency_kml) > 0, efficiency_kml, FALLBACK_EFFICIENCY_KML)
+    total_required_fuel_litres = np.asarray(total_dist_km) / efficiency_kml
+    total_fuel_cost_ngn = total_required_fuel_litres * fuel_price_per_litre_ngn
+    overhead_cost_ngn = total_fuel_cost_ngn * OVERHEAD_RATE
+    return {
+        "efficiency_kml": efficiency_kml,
+        "total_required_fuel": total_required_fuel_litres,
+        "total_fuel_cost": total_fuel_cost_ngn,
+        "overhead_cost": overhead_cost_ngn,
+        "total_final_cost": total_fuel_cost_ngn + overhead_cost_ngn,
+    }
+
+
+# --- Upstream Route Context ---
+# Lane geometry (route, stations, distances) is effectively static and reused across requests and legs;
+# forecasts change hourly; traffic snapshots are reused within a time bucket (stale-while-revalidate).
+lane_cache = TTLCache("lane", Config.LANE_CACHE_TTL)
+forecast_cache = TTLCache("forecast", Config.WEATHER_CACHE_TTL)
+traffic_cache = TrafficSnapshotCache(
+    get_here_traffic_data if Config.ROUTING_MODE == "here" else get_route_traffic_data,
+    Config.TRAFFIC_BUCKET_SECONDS, Config.TRAFFIC_MAX_STALE_SECONDS
+)
+
+class RouteContextError(Exception):
+    """Raised when the upstream data for a lane (route, distances, weather) cannot be assembled."""
+
+def _stash_route_points(geometry: dict) -> dict:
+    """
+    Moves the full polyline into the route store so the cached geometry stays small; kept inline if the store fails.
+    The lane version is recorded with it only when the geometry will be cached (complete station search), so the
+    store's version always names the stations lane_cache holds.
+    """
+    if route_store is None: return geometry
+    lane_key = (geometry["origin"], geometry["destination"])
+    try:
+        route_store.put(lane_key, geometry["route_points"])
+        if geometry["fuel_search_complete"]: route_store.set_version(lane_key, geometry["version"])
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.error(f"Could not store route geometry for {geometry['origin']} -> {geometry['destination']}: {e}")
+        return geometry
+    return {k: v for k, v in geometry.items() if k != "route_points"}
+
+def lane_route_points(geometry: dict) -> np.ndarray:
+    """(n, 2) [lat, lon] array for the lane - a read-only view into the mmapped route store when stored there."""
+    if "route_points" in geometry: return np.asarray(geometry["route_points"], dtype=float).reshape(-1, 2)
+    points = route_store.get((geometry["origin"], geometry["destination"])) if route_store is not None else None
+    return EMPTY_ROUTE if points is None else points
+
+def lane_version(geometry: dict) -> str:
+    """
+    Content hash of what a lane resource shows: coordinates at the served precision, stations and distances.
+    Computed once when the geometry is fetched; a re-fetch that finds the same route keeps the same version.
+    """
+    if "version" in geometry: return geometry["version"]
+    digest = hashlib.blake2b(round_coordinates(lane_route_points(geometry)).tobytes(), digest_size=16)
+    digest.update(repr((round_coordinates(geometry["fuel_stations"]).tolist(), round(geometry["total_km"], 2),
+                        round(geometry["city_km"], 2), round(geometry["highway_km"], 2))).encode())
+    return digest.hexdigest()
+
+def lane_station_points(geometry: dict) -> list:
+    return [{"name": f"Fuel Station {i+1}", "coordinates": fs_coord} for i, fs_coord in enumerate(geometry["fuel_stations"])]
+
+def _new_lane_geometry(origin_depot: str, destination_depot: str) -> dict:
+    geometry = _fetch_lane_geometry(origin_depot, destination_depot)
+    return _stash_route_points({**geometry, "version": lane_version(geometry)})
+
+def _fetch_lane_geometry(origin_depot: str, destination_depot: str) -> dict:
+    here_api_key = Config.HERE_API_KEY
+    if not here_api_key: raise RouteContextError("Config error: Missing HERE API key.")
+    if Config.ROUTING_MODE == "here":
+        return _fetch_lane_geometry_here(here_api_key, origin_depot, destination_depot)
+    plan = plan_here_route(here_api_key, origin_depot, destination_depot)
+    if not plan or not plan["sampled_weather_coords"]:
+         raise RouteContextError("Failed to calculate route.")
+    route_coords_weather, route_points_polyline, fuel_station_coords = plan["sampled_weather_coords"], plan["route"].points, plan["fuel_station_coords"]
+    logger.info("HERE route for %s -> %s: %d fuel stations.", origin_depot, destination_depot, len(fuel_station_coords))
+
+    start_coords_track = tracking_get_coordinates(origin_depot)
+    dest_coords_track = tracking_get_coordinates(destination_depot)
+    if not start_coords_track or not dest_coords_track:
+        raise RouteContextError("Failed to verify depot coordinates.")
+    city_dist_km, highway_dist_km = calculate_distances(start_coords_track, dest_coords_track)
+    total_dist_km = city_dist_km + highway_dist_km
+    if total_dist_km <= 0: raise RouteContextError("Failed to calculate valid route distance.")
+    logger.info("Distances (km): City=%.2f, Highway=%.2f, Total=%.2f", city_dist_km, highway_dist_km, total_dist_km)
+
+    return {
+        "origin": origin_depot, "destination": destination_depot,
+        "route_points": route_points_polyline, "weather_coords": route_coords_weather,
+        "weather_weights": plan["weather_weights"],
+        "fuel_stations": fuel_station_coords,
+        "start_coords": start_coords_track, "dest_coords": dest_coords_track,
+        "city_km": city_dist_km, "highway_km": highway_dist_km, "total_km": total_dist_km,
+        "fuel_search_complete": plan["fuel_search_complete"],
+    }
+
+def _fetch_lane_geometry_here(here_api_key: str, origin_depot: str, destination_depot: str) -> dict:
+    """HERE-only mode: geometry, city/highway split and traffic all come from one routing response."""
+    plan = plan_here_route(here_api_key, origin_depot, destination_depot)
+    if not plan or not plan["sampled_weather_coords"]:
+        raise RouteContextError("Failed to calculate route.")
+    here_route = plan["route"]
+    logger.info("HERE route for %s -> %s: %d fuel stations.", origin_depot, destination_depot, len(plan['fuel_station_coords']))
+    if here_route.total_km <= 0: raise RouteContextError("Failed to calculate valid route distance.")
+    logger.info("Distances (km): City=%.2f, Highway=%.2f, Total=%.2f", here_route.city_km, here_route.highway_km, here_route.total_km)
+    # Seed the traffic snapshot from the same response so the first request makes no extra call
+    traffic_cache.put(origin_depot, destination_depot, here_route.traffic_delay_minutes)
+    return {
+        "origin": origin_depot, "destination": destination_depot,
+        "route_points": here_route.points, "weather_coords": plan["sampled_weather_coords"],
+        "weather_weights": plan["weather_weights"],
+        "fuel_stations": plan["fuel_station_coords"],
+        "start_coords": plan["start_coords"], "dest_coords": plan["end_coords"],
+        "city_km": here_route.city_km, "highway_km": here_route.highway_km, "total_km": here_route.total_km,
+        "fuel_search_complete": plan["fuel_search_complete"],
+    }
+
+def fetch_lane_geometry(origin_depot: str, destination_depot: str) -> Tuple[dict, list]:
+    """
+    HERE route + fuel stations, tracking coordinates and city/highway distances (km), from lane_cache when
+    available. Returns (geometry, degraded): when the route fetch fails the last cached geometry is used
+    and "route" is listed; "fuel_stations" is listed when the station search was cut short.
+    """
+    degraded = []
+    lane_key = (origin_depot, destination_depot)
+    try:
+        # Geometry whose fuel-station search was cut short by the deadline is used once, not cached
+        geometry = lane_cache.get_or_compute(
+            lane_key, lambda: _new_lane_geometry(origin_depot, destination_depot),
+            cacheable=lambda g: g["fuel_search_complete"]
+        )
+    except RouteContextError:
+        geometry = lane_cache.get_stale(lane_key)
+        if geometry is None: raise
+        logger.warning(f"Route fetch failed for {origin_depot} -> {destination_depot}; using last cached geometry.")
+        degraded.append("route")
+    if not geometry["fuel_search_complete"]: degraded.append("fuel_stations")
+    return geometry, degraded
+
+def fetch_lane_context(origin_depot: str, destination_depot: str) -> dict:
+    """
+    Fetches everything about a lane that does not depend on the vehicle, load or journey date:
+    the geometry from fetch_lane_geometry() plus traffic, served from traffic_cache when available.
+    When an upstream is down (or its circuit is open) the last cached value or the neutral default
+    is used instead, and the input is listed in lane["degraded"].
+    """
+    geometry, degraded = fetch_lane_geometry(origin_depot, destination_depot)
+
+    traffic_delay_minutes, traffic_source = traffic_cache.get(
+        origin_depot, destination_depot, geometry["start_coords"], geometry["dest_coords"]
+    )
+    if traffic_source in ("fallback", "default"): degraded.append("traffic")
+    traffic_severity = classify_traffic(traffic_delay_minutes)
+    note(traffic_delay_min=round(traffic_delay_minutes, 1), traffic=traffic_severity, traffic_source=traffic_source)
+
+    return {**geometry, "route_points": lane_route_points(geometry),
+            "traffic_delay_minutes": traffic_delay_minutes, "traffic_severity": traffic_severity,
+            "traffic_source": traffic_source, "degraded": degraded}
+
+def refresh_lane_context(origin_depot: str, destination_depot: str, min_remaining_seconds: float) -> list:
+    """
+    Re-fetches the lane's cached route geometry and forecast when missing or expiring within
+    min_remaining_seconds, and brings its traffic snapshot up to date. Returns the refreshed parts (route/weather).
+    Geocodes are refreshed as part of the route fetch.
+    """
+    lane_key = (origin_depot, destination_depot)
+    refreshed = []
+    remaining = lane_cache.ttl_remaining(lane_key)
+    # The entry can be evicted between the TTL check and the read; fetch it anew then
+    geometry = None if remaining is None or remaining < min_remaining_seconds else lane_cache.get_stale(lane_key)
+    if geometry is None:
+        geometry = _new_lane_geometry(origin_depot, destination_depot)
+        if geometry["fuel_search_complete"]:
+            lane_cache.set(lane_key, geometry)
+            refreshed.append("route")
+    traffic_cache.get(origin_depot, destination_depot, geometry["start_coords"], geometry["dest_coords"])
+    remaining = forecast_cache.ttl_remaining(lane_key)
+    if Config.WEATHER_API_KEY and (remaining is None or remaining < min_remaining_seconds):
+        forecast_days, complete = get_weather_forecast_days(Config.WEATHER_API_KEY, geometry["weather_coords"], geometry.get("weather_weights"))
+        if forecast_days and complete: # A cut-short sample set is no lane forecast; leave it to the next refresh
+            forecast_cache.set(lane_key, forecast_days)
+            refreshed.append("weather")
+    return refreshed
+
+def _cached_lane_forecast(lane: dict) -> Dict[str, Tuple[float, str, str]]:
+    weather_api_key = Config.WEATHER_API_KEY
+    if not weather_api_key: raise RouteContextError("Config error: Missing Weather API key.")
+    if lane.get("weather_coords") is None: raise RouteContextError("Missing route coords for weather.")
+    lane_key = (lane["origin"], lane["destination"])
+    if lane_key in forecast_cache or deadline.optional_stage_allowed():
+        complete = [] # Set by fetch(); a cache hit leaves it empty
+        def fetch():
+            forecast_days, is_complete = get_weather_forecast_days(weather_api_key, lane["weather_coords"], lane.get("weather_weights"))
+            complete.append(is_complete)
+            return forecast_days or None # Empty results are returned as None so they are not cached
+        # Forecasts from a cut-short sample set are used for this request only, never cached as the lane's
+        forecast_days = forecast_cache.get_or_compute(lane_key, fetch, cacheable=lambda _: complete[-1])
+        if forecast_days and complete and not complete[-1]: lane.setdefault("degraded", []).append("weather")
+    else:
+        logger.warning("Request deadline nearly spent; skipping weather fetch.")
+        forecast_days = None
+    if forecast_days: return forecast_days
+    # WeatherAPI down or circuit open: last known forecast, else the neutral defaults
+    logger.warning(f"No fresh forecast for {lane_key[0]} -> {lane_key[1]}; falling back to last cached forecast/defaults.")
+    lane.setdefault("degraded", []).append("weather")
+    return forecast_cache.get_stale(lane_key) or {}
+
+def fetch_lane_weather(lane: dict, target_date: str) -> Tuple[float, str, str]:
+    """Averages the forecast along the lane's sampled weather points. Returns (avg_temp_c, snow, rain)."""
+    forecast_days = _cached_lane_forecast(lane)
+    if target_date in forecast_days:
+        average_temperature, snow_classification, rain_classification = forecast_days[target_date]
+    else:
+        logger.warning("No forecast for %s along route (available: %s). Using defaults.", target_date, list(forecast_days))
+        average_temperature, snow_classification, rain_classification = 0.0, "Low", "Low"
+    note(temp_c=round(average_temperature, 1), rain=rain_classification, snow=snow_classification)
+    return average_temperature, snow_classification, rain_classification
+
+def fetch_lane_forecast(lane: dict) -> Dict[str, Tuple[float, str, str]]:
+    """Summarises every forecast day along the lane from one set of weather fetches. Keyed by 'YYYY-MM-DD'."""
+    forecast_days = _cached_lane_forecast(lane)
+    if not forecast_days: raise RouteContextError("No weather forecast available for route.")
+    note(forecast_days=len(forecast_days))
+    return forecast_days
+
 # --- Blueprint Definition ---
 diesel_api_bp = Blueprint('diesel_api', __name__)
 
 # --- API Route ---
 @diesel_api_bp.route('/api/diesel/route', methods=['POST'])
+@deadline.with_request_deadline # Every upstream call below gets its timeout cut to what is left of the budget
+@with_request_summary("route", logger) # One INFO record per request with stage timings, instead of a line per step
 def diesel_route_api():
-    logger.info("Received request for /api/diesel/route")
     try:
         # --- 1. Get and Validate Form Data ---
         pallets_str = request.form.get('pallets')
@@ -109,7 +457,7 @@ def diesel_route_api():
         if origin_depot not in nigerian_depots or destination_depot not in nigerian_depots: return jsonify({...}), 400
         # Check against the list of *current* Nigerian vehicles for validation
         if vehicle_type not in vehicle_type_nigeria:
-             logger.warning(f"Invalid vehicle model received: {vehicle_type}")
+             logger.warning("Invalid vehicle model received: %s", vehicle_type)
              return jsonify({"success": False, "error": f"Invalid Vehicle Model specified: {vehicle_type}"}), 400
 
         try:
@@ -117,233 +465,109 @@ def diesel_route_api():
         except ValueError: return jsonify({...}), 400
 
         dispatch_window = convert_time_to_window(dispatch_time_str)
-        total_payload_kg = pallets * 880.0
-        goods_weight_kg = total_payload_kg
-        logger.info(f"Request Details: From={origin_depot}, To={destination_depot}, Vehicle={vehicle_type}, Date={target_date}")
-
-        # --- 2. Get Coordinates and Route using HERE API ---
-        logger.info("Getting route and fuel stations from HERE API...")
-        here_api_key = Config.HERE_API_KEY
-        if not here_api_key: return jsonify({"success": False, "error": "Config error: Missing HERE API key."}), 500
-        route_coords_weather, route_points_polyline, fuel_station_coords = get_route_with_fuel_stations(
-             here_api_key, origin_city=origin_depot, destination_city=destination_depot
-        )
-        if not route_points_polyline or not route_coords_weather:
-             return jsonify({"success": False, "error": "Failed to calculate route."}), 500
-        logger.info(f"HERE route successful. Found {len(fuel_station_coords)} fuel stations.")
-        station_points = [{"name": f"Fuel Station {i+1}", "coordinates": fs_coord} for i, fs_coord in enumerate(fuel_station_coords)]
-
-        # --- 3. Get Coordinates for other APIs (Tracking Geocoder) ---
-        logger.info("Getting coordinates via tracking.py geocoder...")
-        start_coords_track = tracking_get_coordinates(origin_depot)
-        dest_coords_track = tracking_get_coordinates(destination_depot)
-        if not start_coords_track or not dest_coords_track:
-            return jsonify({"success": False, "error": "Failed to verify depot coordinates."}), 500
-        logger.info("Tracking coordinates obtained.")
-
-        # --- 4. Calculate Distances (METRIC - km) ---
-        logger.info("Calculating distances (km)...")
-        city_dist_km, highway_dist_km = calculate_distances(start_coords_track, dest_coords_track)
-        total_dist_km = city_dist_km + highway_dist_km
-        if total_dist_km <= 0: return jsonify({"success": False, "error": "Failed to calculate valid route distance."}), 500
-        logger.info(f"Distances (km): City={city_dist_km:.2f}, Highway={highway_dist_km:.2f}, Total={total_dist_km:.2f}")
-
-        # --- 5. Get Traffic Data ---
-        logger.info("Getting traffic data...")
-        _, traffic_delay_minutes = get_route_traffic_data(start_coords_track, dest_coords_track)
-        traffic_severity = "high" if traffic_delay_minutes > 30 else "medium" if traffic_delay_minutes > 7 else "low"
-        logger.info(f"Traffic: Delay={traffic_delay_minutes:.1f} min, Severity={traffic_severity}")
-
-        # --- 6. Get Weather Data ---
-        logger.info("Getting weather data...")
-        weather_api_key = Config.WEATHER_API_KEY
-        if not weather_api_key: return jsonify({"success": False, "error": "Config error: Missing Weather API key."}), 500
-        if route_coords_weather is None: return jsonify({"success": False, "error": "Missing route coords for weather."}), 500
-        average_temperature, snow_classification, rain_classification = get_weather_data(
-            weather_api_key, route_coords_weather, target_date
-        )
-        logger.info(f"Weather Data Received: Avg Temp={average_temperature:.1f}C, Rain={rain_classification}, Snow={snow_classification}")
+        note(origin=origin_depot, destination=destination_depot, vehicle=vehicle_type, date=target_date)
+
+        # --- 2-5. Route, Coordinates, Distances (METRIC - km) and Traffic ---
+        try:
+            report_progress("route")
+            lane = fetch_lane_context(origin_depot, destination_depot)
+            report_progress("weather", total_distance=round(lane["total_km"], 2), traffic_severity=lane["traffic_severity"])
+            # --- 6. Get Weather Data ---
+            average_temperature, snow_classification, rain_classification = fetch_lane_weather(lane, target_date)
+        except RouteContextError as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+        route_points_polyline = lane["route_points"]
+        station_points = lane_station_points(lane)
+        city_dist_km, highway_dist_km, total_dist_km = lane["city_km"], lane["highway_km"], lane["total_km"]
 
         # --- 7. Prepare Data for Prediction Model (WORKAROUND) ---
-        logger.info("Preparing data for prediction model (WORKAROUND APPLIED)...")
-
-        # --- a) Convert METRIC values to IMPERIAL for model input ---
-        total_dist_miles = total_dist_km * KM_TO_MILES
-        highway_dist_miles = highway_dist_km * KM_TO_MILES
-        city_dist_miles = city_dist_km * KM_TO_MILES
-        # Use original hardcoded Avg_Speed_mph=65 that the model likely trained on
-        avg_speed_mph_input = 65.0
-        logger.debug(f"Converted inputs: TotalDistMi={total_dist_miles:.2f}, HwyMi={highway_dist_miles:.2f}, CityMi={city_dist_miles:.2f}, AvgSpeedMPH={avg_speed_mph_input}")
-
-        # --- b) Encode features using Nigerian maps where appropriate ---
-        encoded_origin = origin_encoded_ng.get(origin_depot, -1)
-        encoded_destination = origin_encoded_ng.get(destination_depot, -1)
-        encoded_dispatch_time = dispatch_encoded.get(dispatch_window, -1)
-        encoded_avg_traffic_congestion = traffic_congestion_encoded.get(traffic_severity, -1)
-        temp_category = "high" if average_temperature > 30 else "medium" if average_temperature > 20 else "low"
-        encoded_avg_temp = temp_encoded.get(temp_category, -1)
-        encoded_avg_precipitation = precipitation_encoded.get(rain_classification.lower(), -1)
-        encoded_avg_snow = snow_encoded.get(snow_classification.lower(), 0)
-
-        # --- c) Create input dict using ORIGINAL feature names & IMPERIAL values ---
-        input_data = {
-            "Vehicle_age": [vehicle_age],
-            "Goods_weight": [goods_weight_kg], # Assume model can handle kg or value range is similar
-            "Total_distance_miles": [total_dist_miles], # ORIGINAL KEY, IMPERIAL VALUE
-            "Avg_traffic_congestion": [encoded_avg_traffic_congestion],
-            "Avg_temp": [encoded_avg_temp],
-            "Avg_Precipitation": [encoded_avg_precipitation],
-            "Avg_snow": [encoded_avg_snow],
-            "Origin_depot": [encoded_origin], # Encoded using NG map - *potential issue if model expects UK encoding*
-            "Destination_depot": [encoded_destination], # Encoded using NG map - *potential issue*
-            "Avg_Speed_mph": [avg_speed_mph_input], # ORIGINAL KEY, IMPERIAL VALUE (hardcoded)
-            "Distance_highway": [highway_dist_miles], # ORIGINAL KEY (implied), IMPERIAL VALUE
-            "Distance_city": [city_dist_miles],       # ORIGINAL KEY (implied), IMPERIAL VALUE
-            "dispatch_time": [encoded_dispatch_time],
-            "total_payload": [total_payload_kg] # Assume model handles kg payload ok
-        }
-        logger.debug(f"Base input_data created with {len(input_data)} features.")
-
-        # --- d) Create dummy variables based on ORIGINAL UK vehicle list ---
-        # The model expects columns for all 10 UK vehicles.
-        # We set the current Nigerian vehicle's corresponding UK dummy (if any) to 1, others to 0.
-        # This is imperfect as NG vehicles might not map cleanly to UK ones.
-        # A simple approach: Set all original UK dummies to 0, except for the placeholder.
-        dummy_variables = {vehicle_uk: [0] for vehicle_uk in vehicle_type_encoded_original_uk_list}
-
-        # Identify if the selected Nigerian vehicle corresponds to one in the original UK list
-        # This mapping is crude - needs refinement based on vehicle similarity
-        selected_ng_vehicle = vehicle_type # The actual NG vehicle selected
-        corresponding_uk_vehicle = None
-        # Example crude mapping (needs improvement)
-        if "DAF" in selected_ng_vehicle: corresponding_uk_vehicle = 'DAF XG 530'
-        elif "SCANIA" in selected_ng_vehicle: corresponding_uk_vehicle = 'SCANIA R 450'
-        elif "Volvo" in selected_ng_vehicle: corresponding_uk_vehicle = 'VOLVO FH 520'
-        elif "MAN" in selected_ng_vehicle: corresponding_uk_vehicle = 'MAN TGX 18.400' # Map TGS to TGX?
-        elif "IVECO" in selected_ng_vehicle: corresponding_uk_vehicle = 'IVECO NP 460' # Map Stralis to NP?
-        # Add mappings for Mercedes, SINOTRUK, TATA, MACK if they relate to the UK list? Unlikely.
-
-        # If a corresponding UK vehicle is found in the original list, set its dummy to 1
-        if corresponding_uk_vehicle and corresponding_uk_vehicle in dummy_variables:
-            dummy_variables[corresponding_uk_vehicle] = [1]
-            logger.debug(f"Mapped NG vehicle '{selected_ng_vehicle}' to UK dummy '{corresponding_uk_vehicle}'.")
-        else:
-            logger.debug(f"No clear mapping found for NG vehicle '{selected_ng_vehicle}' to original UK dummies. All UK dummies (except placeholder) set to 0.")
-
-        # Add the dummy variables to input_data
-        input_data.update(dummy_variables)
-        logger.debug(f"input_data updated with {len(dummy_variables)} UK vehicle dummies. Total keys: {len(input_data)}")
-
-        # --- e) Add the placeholder dummy if it's not already there ---
-        # This step ensures we always have 24 features if one UK dummy was missing
-        # Now redundant because we create all 10 UK dummies above. Remove this.
-        # if MISSING_PLACEHOLDER_VEHICLE not in input_data:
-        #    input_data[MISSING_PLACEHOLDER_VEHICLE] = [0] # Add placeholder to reach 24
-        #    logger.debug(f"Added placeholder dummy '{MISSING_PLACEHOLDER_VEHICLE}'")
-
-
-        # --- f) Create DataFrame and Verify Columns ---
+        report_progress("prediction", average_temperature=round(average_temperature, 2))
         try:
-            # Get the exact feature list the model expects (replace with actual list from training)
-            # Assuming the base 14 + the 10 UK vehicles
-            expected_model_features = [
-                "Vehicle_age", "Goods_weight", "Total_distance_miles", "Avg_traffic_congestion",
-                "Avg_temp", "Avg_Precipitation", "Avg_snow", "Origin_depot", "Destination_depot",
-                "Avg_Speed_mph", "Distance_highway", "Distance_city", "dispatch_time", "total_payload"
-            ] + vehicle_type_encoded_original_uk_list
-
-            # Create DataFrame using only the expected features and in the correct order
-            input_data_ordered = {key: input_data.get(key, [0]) for key in expected_model_features} # Ensure all expected keys exist
-            raw_input_df = pd.DataFrame(input_data_ordered)
-            raw_input_df = raw_input_df[expected_model_features] # Enforce order
-
-            logger.info(f"Prediction DataFrame created successfully with {len(raw_input_df.columns)} features.")
-            if len(raw_input_df.columns) != 24:
-                 logger.error(f"FATAL: DataFrame column count ({len(raw_input_df.columns)}) does not match expected 24!")
-                 # Log columns for comparison:
-                 logger.error(f"DF Columns: {list(raw_input_df.columns)}")
-                 logger.error(f"Expected:   {expected_model_features}")
+            raw_input = build_feature_matrix(
+                vehicle_age, pallets, vehicle_type, dispatch_window, origin_depot, destination_depot,
+                city_dist_km, highway_dist_km, lane["traffic_severity"], classify_temperature(average_temperature),
+                rain_classification, snow_classification
+            )
+            if raw_input.shape[1] != len(expected_model_features):
+                 logger.error("FATAL: Feature count (%d) does not match expected %d!", raw_input.shape[1], len(expected_model_features))
                  return jsonify({"success": False, "error": "Internal error: Feature count mismatch before prediction."}), 500
-
         except Exception as e:
-            logger.error(f"Error creating or ordering prediction DataFrame: {e}", exc_info=True)
+            logger.error("Error creating prediction feature matrix: %s", e, exc_info=True)
             return jsonify({"success": False, "error": "Internal error preparing prediction data."}), 500
 
 
         # --- 8. Get Prediction ---
-        logger.info("Predicting efficiency...")
-        if model is None: return jsonify({"success": False, "error": "Prediction model unavailable."}), 500
+        active_model = model_registry.active
+        if active_model is None: return jsonify({"success": False, "error": "Prediction model unavailable."}), 500
 
         try:
             # Predict (expects 24 features)
-            if hasattr(model, '_Booster'): prediction_mpg = model._Booster.predict(raw_input_df)[0]
-            else: prediction_mpg = model.predict(raw_input_df)[0]
+            prediction_mpg = predict_mpg(raw_input)[0]
 
             # --- Convert prediction back to METRIC (km/L) ---
             efficiency_kml = prediction_mpg * MPG_TO_KML
-            logger.info(f"Prediction successful: Raw(MPG)={prediction_mpg:.4f}, Converted(km/L)={efficiency_kml:.4f}")
+            note(model=active_model.version, mpg=round(float(prediction_mpg), 4))
 
         except Exception as e:
-            logger.error(f"Error during model prediction: {e}", exc_info=True)
-            # Log the shape and columns just before error
-            logger.error(f"Prediction failed. Input DF shape: {raw_input_df.shape}")
-            logger.error(f"Input DF columns: {list(raw_input_df.columns)}")
+            logger.error("Error during model prediction (input shape %s): %s", raw_input.shape, e, exc_info=True)
             return jsonify({"success": False, "error": "Failed to get prediction from model."}), 500
 
 
         # --- 9. Calculate Fuel Metrics (Using METRIC values) ---
-        logger.info("Calculating fuel metrics (metric)...")
+        note_stage("costs")
         if efficiency_kml <= 0:
-            logger.warning(f"Predicted efficiency is zero or negative ({efficiency_kml:.4f} km/L). Using fallback.")
-            efficiency_kml = 2.0 # Fallback km/L
+            logger.warning("Predicted efficiency is zero or negative (%.4f km/L). Using fallback.", efficiency_kml)
 
-        # Use km distance and km/L efficiency
-        total_required_fuel_litres = total_dist_km / efficiency_kml
         fuel_price_per_litre_ngn = get_diesel_price_ng(origin_depot) # Naira/Litre
-        total_fuel_cost_ngn = total_required_fuel_litres * fuel_price_per_litre_ngn
+        fuel_metrics = calculate_fuel_costs(total_dist_km, efficiency_kml, fuel_price_per_litre_ngn)
+        efficiency_kml = float(fuel_metrics["efficiency_kml"])
+        total_required_fuel_litres = float(fuel_metrics["total_required_fuel"])
+        total_fuel_cost_ngn = float(fuel_metrics["total_fuel_cost"])
         # Use km distance for cost per km
         cost_per_km_ngn = total_fuel_cost_ngn / total_dist_km if total_dist_km > 0 else 0
-        overhead_cost_ngn = total_fuel_cost_ngn * 0.10
-        total_final_cost_ngn = total_fuel_cost_ngn + overhead_cost_ngn
-        logger.info("Fuel metrics calculated.")
+        overhead_cost_ngn = float(fuel_metrics["overhead_cost"])
+        total_final_cost_ngn = float(fuel_metrics["total_final_cost"])
+        note(km=round(total_dist_km, 1), kml=round(efficiency_kml, 3), cost_ngn=round(total_final_cost_ngn))
 
 
         # --- 10. Feature Importance ---
-        logger.info("Extracting feature importance...")
         feature_importance_data = []
         try:
-            # Use the DataFrame that was actually sent to predict()
-            feature_names = list(raw_input_df.columns)
-            if hasattr(model, 'feature_importances_'):
-                importances = model.feature_importances_
+            # Same column order as the matrix that was actually sent to predict()
+            feature_names = expected_model_features
+            if active_model.feature_importances is not None:
+                importances = active_model.feature_importances
                 # Convert numpy floats to python floats for JSON
                 importances = [float(imp) for imp in importances]
                 feature_tuples = sorted(zip(feature_names, importances), key=lambda item: item[1], reverse=True)
                 top_8_features = feature_tuples[:8]
                 feature_importance_data = [{"name": name, "value": value} for name, value in top_8_features]
-                logger.info("Feature importance extracted.")
             else: logger.warning("Model does not have 'feature_importances_' attribute.")
-        except Exception as e: logger.warning(f"Could not retrieve feature importances: {e}", exc_info=True)
+        except Exception as e: logger.warning("Could not retrieve feature importances: %s", e, exc_info=True)
 
 
         # --- 11. Other Random Metrics ---
-        logger.info("Generating other metrics...")
         good_value_fuel = random.uniform(10000.0, 100000.0)
         insurance_fuel_cost = random.uniform(1000.0, good_value_fuel * 0.05)
         goods_loading_time = random.randint(20, 90)
         is_goods_secured = random.choice(['✔️', '❌'])
         check_safety = random.choice(['✔️', '❌'])
-        logger.info("Other metrics generated.")
 
         # --- 12. Prepare API Response (METRIC and NGN) ---
-        logger.info("Preparing final API response...")
+        note_stage("response")
+        route_data = {
+            "origin": origin_depot, "destination": destination_depot,
+            "total_distance": round(total_dist_km, 2), # km
+            # Same geometry as a cacheable GET resource; geometry=ref leaves it out of this response
+            "href": url_for('lanes_api.lane_api', origin_depot=origin_depot, destination_depot=destination_depot),
+            "version": lane_version(lane),
+        }
+        if request.form.get('geometry') != 'ref':
+            route_data.update(coordinates=round_coordinates(route_points_polyline), stations=station_points)
         response_data = {
             "success": True,
-            "route": {
-                "origin": origin_depot, "destination": destination_depot,
-                "coordinates": route_points_polyline, "stations": station_points,
-                "total_distance": round(total_dist_km, 2) # km
-            },
+            "degraded": lane["degraded"], # Inputs answered from cache/defaults because an upstream was down
+            "route": route_data,
             "analytics": {
                 "average_temperature": round(average_temperature, 2), # C
                 "rain_classification": rain_classification, "snow_classification": snow_classification,
@@ -363,16 +587,91 @@ def diesel_route_api():
                 "featureImportance": feature_importance_data
             }
         }
-        logger.info("API Response Prepared Successfully. Sending response.")
-        return jsonify(response_data)
+        # --- 13. Trip History (buffered; written to disk off the request path) ---
+        if trip_log is not None:
+            trip_log.record({
+                "origin": origin_depot, "destination": destination_depot, "vehicle": vehicle_type,
+                "dispatch_window": dispatch_window, "rain": rain_classification, "snow": snow_classification,
+                "journey_day": target_date, "pallets": pallets, "vehicle_age": vehicle_age,
+                "total_km": total_dist_km, "city_km": city_dist_km, "highway_km": highway_dist_km,
+                "traffic": lane["traffic_severity"], "traffic_delay_minutes": lane["traffic_delay_minutes"],
+                "avg_temperature": average_temperature,
+                "efficiency_kml": efficiency_kml, "fuel_litres": total_required_fuel_litres,
+                "fuel_price": fuel_price_per_litre_ngn, "fuel_cost": total_fuel_cost_ngn,
+                "total_cost": total_final_cost_ngn, "degraded": lane["degraded"],
+            })
+        return json_response(response_data) # Coordinates encoded straight from NumPy, compressed if accepted
 
     # --- Error Handling ---
     except Exception as e:
-        error_traceback = traceback.format_exc()
-        logger.error(f"!!! Critical Error in /api/diesel/route !!!")
-        logger.error(f"Error Type: {type(e).__name__}")
-        logger.error(f"Error Message: {str(e)}")
-        logger.error(f"Traceback:\n{error_traceback}")
+        logger.error("!!! Critical Error in /api/diesel/route: %s: %s", type(e).__name__, e, exc_info=True)
         return jsonify({
             "success": False, "error": "An internal server error occurred.",
-        }), 500
\ No newline at end of file
+        }), 500
+
+# --- Async Route Jobs ---
+# Submit/poll variant of /api/diesel/route: the same pipeline runs on a bounded pool and the client polls by id.
+route_jobs = JobManager("route_jobs", Config.JOB_WORKERS, Config.JOB_MAX_PENDING, Config.JOB_RESULT_TTL)
+ROUTE_FORM_FIELDS = ('pallets', 'vehicleModel', 'originDepot', 'destinationDepot', 'vehicleAge', 'dispatchTime', 'journeyDate')
+
+@diesel_api_bp.route('/api/diesel/route/jobs', methods=['POST'])
+def submit_route_job_api():
+    """Takes the /api/diesel/route form and returns 202 with a job id at once; identical forms share one job."""
+    form = {field: request.form.get(field, '') for field in ROUTE_FORM_FIELDS}
+    dedupe_key = hashlib.blake2b(json.dumps(form, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    app = current_app._get_current_object()
+
+    def run():
+        with app.test_request_context('/api/diesel/route', method='POST', data=form):
+            response = app.make_response(diesel_route_api())
+        return response.status_code, response.get_json()
+
+    try:
+        job, created = route_jobs.submit(dedupe_key, run)
+    except JobQueueFull as e:
+        logger.warning(f"Rejecting route job: {e}")
+        return jsonify({"success": False, "error": "Too many route jobs in progress; retry shortly."}), 503, {"Retry-After": "5"}
+    logger.info("Route job %s %s for %s -> %s", job['job_id'], 'queued' if created else 'reused', form['originDepot'], form['destinationDepot'])
+    return jsonify({
+        "success": True, "job_id": job["job_id"], "status": job["status"], "deduplicated": not created,
+        "poll_url": url_for('diesel_api.route_job_status_api', job_id=job["job_id"]),
+    }), 202
+
+@diesel_api_bp.route('/api/diesel/route/jobs/<job_id>', methods=['GET'])
+def route_job_status_api(job_id):
+    """Job status, current stage and partial results; once succeeded, `result` holds the /api/diesel/route body."""
+    job = route_jobs.get(job_id)
+    if job is None: return jsonify({"success": False, "error": "Unknown or expired job."}), 404
+    return json_response({"success": True, **job})
+
+# --- Lane Prefetch ---
+# StartForm posts the lane as soon as both depots are picked, well before the rest of the form is filled in.
+# Geometry (geocodes, route, fuel stations), traffic and forecast are warmed through the same single-flight caches
+# the route request reads: a route request arriving mid-prefetch waits for it instead of fetching again, and one
+# arriving after it is left with feature assembly and prediction. Because a live request can wait on it, the
+# prefetch never queues for rate-limit tokens: calls that would wait are shed and the route request fetches them.
+prefetch_jobs = JobManager("prefetch_jobs", Config.PREFETCH_WORKERS, Config.PREFETCH_MAX_PENDING, Config.PREFETCH_RESULT_TTL)
+
+def prefetch_lane(origin_depot: str, destination_depot: str) -> Tuple[int, dict]:
+    with background_work(may_queue=False): # Low priority, shed rather than queued
+        lane = fetch_lane_context(origin_depot, destination_depot)
+        if Config.WEATHER_API_KEY: _cached_lane_forecast(lane)
+    return 200, {"lane": [origin_depot, destination_depot], "degraded": lane["degraded"]}
+
+@diesel_api_bp.route('/api/diesel/prefetch', methods=['POST'])
+def prefetch_lane_api():
+    """Takes originDepot/destinationDepot; 200 if the lane is already warm, else 202 while it is warmed in the background."""
+    origin_depot = request.form.get('originDepot')
+    destination_depot = request.form.get('destinationDepot')
+    if origin_depot not in nigerian_depots or destination_depot not in nigerian_depots or origin_depot == destination_depot:
+        return jsonify({"success": False, "error": "Two different known depots are required."}), 400
+    lane_key = (origin_depot, destination_depot)
+    if lane_key in lane_cache and (lane_key in forecast_cache or not Config.WEATHER_API_KEY):
+        return jsonify({"success": True, "status": "warm"}), 200
+    try:
+        job, created = prefetch_jobs.submit(f"{origin_depot}|{destination_depot}", lambda: prefetch_lane(origin_depot, destination_depot))
+    except JobQueueFull as e:
+        logger.warning("Rejecting lane prefetch: %s", e)
+        return jsonify({"success": False, "error": "Too many lane prefetches in progress."}), 503, {"Retry-After": "5"}
+    if created: logger.info("Prefetching lane %s -> %s", origin_depot, destination_depot)
+    return jsonify({"success": True, "status": job["status"], "job_id": job["job_id"]}), 202
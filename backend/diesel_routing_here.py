@@ -7,6 +7,11 @@ from geopy.distance import geodesic
 from typing import Tuple, List, Optional
 from collections import namedtuple
 from config import Config
+from circuit_breaker import guarded_get, CircuitOpenError
+from deadline import optional_stage_allowed, DeadlineExceeded
+from rate_limit import RateLimited, PRIORITY_NORMAL, PRIORITY_LOW
+from cache import TTLCache
+from tracking import sample_weather_points
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,7 @@ DECODING_TABLE = [
     36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 51
 ]
 PolylineHeader = namedtuple('PolylineHeader', 'precision,third_dim,third_dim_precision')
+here_geocode_cache = TTLCache("here_geocode", Config.GEOCODE_CACHE_TTL)
 
 # --- Polyline Decoding Functions (Unchanged) ---
 def decode_header(decoder):
@@ -77,36 +83,90 @@ def iter_decode(encoded):
 
 
 # --- API Call Functions (Unchanged from previous working state) ---
-def get_here_directions(origin: str, destination: str, api_key: str) -> Optional[List[Tuple[float, float]]]:
-    url = f"https://router.hereapi.com/v8/routes?transportMode=car&origin={origin}&destination={destination}&return=polyline&apikey={api_key}"
+HERE_ROUTER_URL = "https://router.hereapi.com/v8/routes"
+# HERE functional classes 1-2 are motorways / major highways; 3-5 are treated as city roads
+HIGHWAY_FUNCTIONAL_CLASSES = {1, 2}
+
+# points: full polyline (lat, lon); distances in km; durations in seconds (actual vs typical traffic)
+HereRoute = namedtuple('HereRoute', 'points,total_km,highway_km,city_km,duration_s,typical_duration_s,traffic_delay_minutes')
+
+def get_here_route(origin: str, destination: str, api_key: str, with_polyline: bool = True) -> Optional[HereRoute]:
+    """
+    One HERE routing call returning polyline, summary (length, duration, typical duration) and
+    functional-class length spans, so city/highway split and traffic delay need no second provider.
+    """
+    params = {
+        "transportMode": "car", "origin": origin, "destination": destination, "apikey": api_key,
+        "return": "polyline,summary,typicalDuration" if with_polyline else "summary,typicalDuration",
+    }
+    if with_polyline: params["spans"] = "functionalClass,length"
     try:
-        response = requests.get(url, timeout=15)
+        response = guarded_get("here", HERE_ROUTER_URL, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         routes = data.get('routes', [])
-        if routes and routes[0].get('sections') and routes[0]['sections'][0].get('polyline'):
-            decoded_points = list(iter_decode(routes[0]['sections'][0]['polyline']))
-            return [(p[0], p[1]) for p in decoded_points if len(p) >= 2]
-        logger.warning(f"No valid route/polyline in HERE response: {origin} -> {destination}")
+        if not routes or not routes[0].get('sections'):
+            logger.warning(f"No valid route in HERE response: {origin} -> {destination}")
+            return None
+        points = []
+        total_m = highway_m = duration_s = typical_s = 0.0
+        for section in routes[0]['sections']:
+            summary = section.get('summary', {})
+            total_m += summary.get('length', 0)
+            duration_s += summary.get('duration', 0)
+            # typicalDuration may be absent (no historic data); baseDuration ignores traffic entirely
+            typical_s += summary.get('typicalDuration', summary.get('baseDuration', summary.get('duration', 0)))
+            for span in section.get('spans', []):
+                if span.get('functionalClass') in HIGHWAY_FUNCTIONAL_CLASSES:
+                    highway_m += span.get('length', 0)
+            if with_polyline:
+                if not section.get('polyline'):
+                    logger.warning(f"No polyline in HERE response section: {origin} -> {destination}")
+                    return None
+                decoded_points = [(p[0], p[1]) for p in iter_decode(section['polyline']) if len(p) >= 2]
+                points.extend(decoded_points[1:] if points else decoded_points)
+        total_km = total_m / 1000.0
+        highway_km = min(highway_m / 1000.0, total_km)
+        return HereRoute(
+            points=points, total_km=total_km, highway_km=highway_km, city_km=total_km - highway_km,
+            duration_s=duration_s, typical_duration_s=typical_s,
+            traffic_delay_minutes=max(0.0, duration_s - typical_s) / 60.0,
+        )
+    except (CircuitOpenError, RateLimited) as e:
+        logger.warning(f"get_here_route skipped: {e}")
         return None
     except Exception as e:
-        logger.error(f"Error in get_here_directions: {e}", exc_info=True)
+        logger.error(f"Error in get_here_route: {e}", exc_info=True)
         return None
 
+def get_here_directions(origin: str, destination: str, api_key: str) -> Optional[List[Tuple[float, float]]]:
+    route = get_here_route(origin, destination, api_key)
+    return route.points if route and route.points else None
+
+def get_here_traffic_data(start_coords: Tuple[float, float], end_coords: Tuple[float, float]) -> Tuple[List[Tuple[float, float]], float]:
+    """HERE counterpart of tracking.get_route_traffic_data: summary-only call, delay = actual - typical duration."""
+    route = get_here_route(f"{start_coords[0]},{start_coords[1]}", f"{end_coords[0]},{end_coords[1]}",
+                           Config.HERE_API_KEY, with_polyline=False)
+    if route is None: return [], 0.0
+    return [start_coords, end_coords], route.traffic_delay_minutes
+
 def get_coordinates(place_name: str, api_key: str) -> Optional[Tuple[float, float]]:
+    return here_geocode_cache.get_or_compute(place_name, lambda: _geocode(place_name, api_key))
+
+def _geocode(place_name: str, api_key: str) -> Optional[Tuple[float, float]]:
     search_query = f"{place_name}, Nigeria"
-    logger.info(f"HERE Geocoding query: {search_query}")
+    logger.info("HERE Geocoding query: %s", search_query)
     url = f"https://geocode.search.hereapi.com/v1/geocode"
     params = { "q": search_query, "apiKey": api_key }
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = guarded_get("here", url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         if data.get('items'):
             location = data['items'][0].get('position')
             if location and 'lat' in location and 'lng' in location:
                 coords = (location['lat'], location['lng'])
-                logger.info(f"HERE Geocoding result for {search_query}: {coords}")
+                logger.info("HERE Geocoding result for %s: %s", search_query, coords)
                 return coords
         logger.error(f"No valid items/position in HERE Geocoding response for {search_query}")
         return None
@@ -114,14 +174,14 @@ def get_coordinates(place_name: str, api_key: str) -> Optional[Tuple[float, floa
         logger.error(f"Error in get_coordinates for {search_query}: {e}", exc_info=True)
         return None
 
-def get_fuel_station_coordinates(coords: Tuple[float, float], api_key: str) -> Optional[Tuple[float, float]]:
+def get_fuel_station_coordinates(coords: Tuple[float, float], api_key: str, priority: str = PRIORITY_NORMAL) -> Optional[Tuple[float, float]]:
     if not coords or coords[0] is None or coords[1] is None:
          logger.error("Invalid coordinates for fuel station search.")
          return None
     base_url = 'https://discover.search.hereapi.com/v1/discover'
     params = {'q': 'fuel station', 'apiKey': api_key, 'at': f'{coords[0]},{coords[1]}', 'limit': 5 }
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = guarded_get("here", base_url, priority=priority, params=params, timeout=10)
         response.raise_for_status()
         fuel_stations = response.json()
         if fuel_stations.get('items'):
@@ -129,48 +189,43 @@ def get_fuel_station_coordinates(coords: Tuple[float, float], api_key: str) -> O
             position = closest_station.get('position')
             if position and 'lat' in position and 'lng' in position:
                 return position['lat'], position['lng']
-        logger.warning(f"No fuel stations found near {coords}")
+        logger.warning("No fuel stations found near %s", coords)
         return None
+    except (CircuitOpenError, RateLimited, DeadlineExceeded):
+        raise # Let the caller stop its search loop and mark it incomplete
     except Exception as e:
         logger.error(f"Error in get_fuel_station_coordinates near {coords}: {e}", exc_info=True)
         return None
 # --- End API Call Functions ---
 
 
-def get_route_with_fuel_stations(api_key: str, origin_city: str, destination_city: str) -> Tuple[Optional[List[Tuple[float, float]]], Optional[List[Tuple[float, float]]], List[Tuple[float, float]]]:
+def plan_here_route(api_key: str, origin_city: str, destination_city: str) -> Optional[dict]:
     """
-    Calculates route, finds fuel stations, returns SAMPLED weather coords & FULL polyline.
-    Returns: (sampled_weather_coords, full_route_polyline_points, fuel_station_coords_list)
+    Calculates route, finds fuel stations, samples weather coords - all from ONE HERE routing call.
+    Returns dict with start/end coords, the HereRoute (polyline, city/highway km, durations),
+    sampled_weather_coords, fuel_station_coords and fuel_search_complete (False if cut short by
+    the request deadline, an open circuit or the rate limiter); None if geocoding or routing fails.
     """
     start_coords = get_coordinates(origin_city, api_key)
     end_coords = get_coordinates(destination_city, api_key)
     if not start_coords or not end_coords:
         logger.error(f"Could not get coords for {origin_city} or {destination_city}.")
-        return None, None, []
+        return None
 
-    # 1. Get the FULL route polyline
-    full_route_polyline_points = get_here_directions(f"{start_coords[0]},{start_coords[1]}", f"{end_coords[0]},{end_coords[1]}", api_key)
-    if not full_route_polyline_points:
+    # 1. Get the FULL route polyline (+ summary and functional-class spans)
+    here_route = get_here_route(f"{start_coords[0]},{start_coords[1]}", f"{end_coords[0]},{end_coords[1]}", api_key)
+    if not here_route or not here_route.points:
         logger.error(f"Unable to retrieve route points between {origin_city} and {destination_city}.")
-        return None, None, []
+        return None
+    full_route_polyline_points = here_route.points
 
-    # 2. Calculate Total Distance (using the full polyline)
-    total_distance_km = 0.0
-    try:
-        for i in range(len(full_route_polyline_points) - 1):
-            p1, p2 = full_route_polyline_points[i], full_route_polyline_points[i+1]
-            # Basic type/length check before distance calc
-            if isinstance(p1, tuple) and len(p1)==2 and isinstance(p2, tuple) and len(p2)==2:
-                 total_distance_km += geodesic(p1, p2).km
-            else: logger.warning(f"Skipping invalid point in distance calc: {p1} or {p2}")
-    except Exception as e:
-        logger.error(f"Error calculating total route distance: {e}", exc_info=True)
-        # Reset distance if calculation failed to avoid issues later
-        total_distance_km = 0.0
-    logger.info(f"Total calculated route distance: {total_distance_km:.2f} km")
+    # 2. Total Distance comes from the HERE summary
+    total_distance_km = here_route.total_km
+    logger.info("Total route distance: %.2f km (highway %.2f, city %.2f)", total_distance_km, here_route.highway_km, here_route.city_km)
 
-    # 3. Find Fuel Stations (using the FULL polyline)
+    # 3. Find Fuel Stations (using the FULL polyline) - optional, skipped once the request budget is spent
     fuel_station_coords = []
+    fuel_search_complete = True
     if total_distance_km > 10: # Only search if route is reasonably long
         interval_distance = total_distance_km / 4.0 # Search roughly every quarter
         cumulative_distance = 0.0
@@ -186,7 +241,7 @@ def get_route_with_fuel_stations(api_key: str, origin_city: str, destination_cit
             try:
                 if isinstance(p1, tuple) and len(p1)==2 and isinstance(p2, tuple) and len(p2)==2:
                     segment_distance = geodesic(p1, p2).km
-            except Exception as e: logger.warning(f"Error calculating segment distance: {e}")
+            except Exception as e: logger.warning("Error calculating segment distance: %s", e)
 
             cumulative_distance += segment_distance
             last_fuel_stop_distance += segment_distance
@@ -194,9 +249,18 @@ def get_route_with_fuel_stations(api_key: str, origin_city: str, destination_cit
             # Check if we've covered roughly an interval distance since the last added stop
             # Also avoid searching too close to the end of the route
             if last_fuel_stop_distance >= interval_distance and cumulative_distance < (total_distance_km - interval_distance / 2.0):
+                if not optional_stage_allowed():
+                    logger.warning("Request deadline nearly spent; skipping remaining fuel station searches.")
+                    fuel_search_complete = False
+                    break
                 search_point = p2 # Search near the end point of this segment
-                logger.info(f"Searching for fuel station near point index {i+1} ({search_point}) at cumulative distance {cumulative_distance:.1f} km")
-                fuel_coords = get_fuel_station_coordinates(search_point, api_key)
+                logger.debug("Searching for fuel station near point index %d (%s) at cumulative distance %.1f km", i + 1, search_point, cumulative_distance)
+                try:
+                    fuel_coords = get_fuel_station_coordinates(search_point, api_key, priority=PRIORITY_LOW)
+                except (CircuitOpenError, RateLimited, DeadlineExceeded) as e:
+                    logger.warning("%s; skipping remaining fuel station searches.", e)
+                    fuel_search_complete = False
+                    break
 
                 if fuel_coords:
                     # Check if this station is too close to the last added one
@@ -205,56 +269,43 @@ def get_route_with_fuel_stations(api_key: str, origin_city: str, destination_cit
                          is_duplicate = geodesic(fuel_coords, fuel_station_coords[-1]).km < 5.0 # Don't add if within 5km of last
 
                     if not is_duplicate:
-                        logger.info(f"Found fuel station: {fuel_coords}")
+                        logger.debug("Found fuel station: %s", fuel_coords)
                         fuel_station_coords.append(fuel_coords)
                         last_fuel_stop_distance = 0.0 # Reset distance tracker since we added one
                     else:
-                        logger.info(f"Skipping nearby/duplicate fuel station: {fuel_coords}")
+                        logger.debug("Skipping nearby/duplicate fuel station: %s", fuel_coords)
                 # If fuel_coords is None, search continues on next suitable segment
     else:
         logger.info("Route too short or distance calculation failed, skipping fuel station search.")
 
-    logger.info(f"Final Fuel Station Coordinates Found: {fuel_station_coords}")
+    logger.info("Fuel station search: %d stations.", len(fuel_station_coords))
 
     # 4. Sample Coordinates ONLY FOR Weather Check (from the FULL polyline)
-    sampled_weather_coords = []
-    num_route_points = len(full_route_polyline_points)
-    target_points_for_weather = 15 # Define the target number of points
-
-    # Ensure we have points to sample from
-    if num_route_points > 0:
-        if num_route_points <= target_points_for_weather:
-            # Use all points if fewer than target
-            sampled_weather_coords = [start_coords] + full_route_polyline_points # Include start explicitly
-        else:
-            # Calculate step for sampling from the polyline points
-            # Ensure we include start and end points
-            indices = [0] # Start with the first point index
-            step = (num_route_points - 1) / (target_points_for_weather - 1) if target_points_for_weather > 1 else num_route_points
-            current_index_float = 0.0
-            for _ in range(target_points_for_weather - 2): # Add intermediate points
-                current_index_float += step
-                # Add index, ensuring it doesn't exceed bounds
-                indices.append(min(round(current_index_float), num_route_points - 1))
-
-            indices.append(num_route_points - 1) # Ensure last point index is included
-
-            # Remove potential duplicates from rounding and sort
-            unique_sorted_indices = sorted(list(set(indices)))
-
-            # Select points using the unique indices from the full polyline
-            sampled_weather_coords = [full_route_polyline_points[i] for i in unique_sorted_indices]
-            # Explicitly add start_coords if it wasn't included by index 0 (should be, but safe check)
-            if start_coords not in sampled_weather_coords:
-                 sampled_weather_coords.insert(0, start_coords)
-
-    logger.info(f"Sampled Route Coordinates for Weather Check ({len(sampled_weather_coords)} points): [List Omitted]")
-
-    # 5. Return the required tuple
-    #    - sampled_weather_coords: For the weather API calls
-    #    - full_route_polyline_points: For drawing the route on the map
-    #    - fuel_station_coords: List of coordinates for fuel stops
-    return sampled_weather_coords, full_route_polyline_points, fuel_station_coords
+    # Spacing follows route length; points sharing a forecast cell are merged and weighted by the km they cover
+    sampled_weather_coords, weather_weights = sample_weather_points(
+        full_route_polyline_points or [start_coords], Config.WEATHER_SAMPLE_SPACING_KM,
+        Config.WEATHER_MIN_POINTS, Config.WEATHER_MAX_POINTS
+    )
+
+    logger.debug("Sampled %d route coordinates for the weather check.", len(sampled_weather_coords))
+
+    return {
+        "start_coords": start_coords, "end_coords": end_coords, "route": here_route,
+        "sampled_weather_coords": sampled_weather_coords, # For the weather API calls
+        "weather_weights": weather_weights,               # Route km each weather point stands for
+        "fuel_station_coords": fuel_station_coords,       # List of coordinates for fuel stops
+        "fuel_search_complete": fuel_search_complete,
+    }
+
+
+def get_route_with_fuel_stations(api_key: str, origin_city: str, destination_city: str) -> Tuple[Optional[List[Tuple[float, float]]], Optional[List[Tuple[float, float]]], List[Tuple[float, float]]]:
+    """
+    Calculates route, finds fuel stations, returns SAMPLED weather coords & FULL polyline.
+    Returns: (sampled_weather_coords, full_route_polyline_points, fuel_station_coords_list)
+    """
+    plan = plan_here_route(api_key, origin_city, destination_city)
+    if plan is None: return None, None, []
+    return plan["sampled_weather_coords"], plan["route"].points, plan["fuel_station_coords"]
 
 
 # --- Map Display Function (Unchanged) ---
@@ -0,0 +1,104 @@
+# backend/jobs.py
+# Submit/poll jobs for long computations: a bounded thread pool runs them, identical submissions share one job,
+# and job records (status, progress, result) live in a TTLCache - with the shared backend any worker can answer a poll.
+
+import contextvars
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+from cache import TTLCache
+from logging_setup import note_stage
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when max_pending jobs are already queued or running in this process."""
+
+
+def _reusable(record: dict) -> bool:
+    if record["status"] in (QUEUED, RUNNING): return True
+    return record["status"] == SUCCEEDED and record["http_status"] < 400
+
+
+class JobManager:
+    """
+    submit(dedupe_key, fn) returns the job record at once and runs fn() on the pool.
+    fn returns (http_status, body); the job succeeds when it returns a status below 500 and fails when it
+    returns a 5xx or raises. A submission whose dedupe_key matches a queued or running job, or one that finished
+    with a status below 400, gets that job back; errors are never handed to the next identical submission.
+    Records expire result_ttl seconds after their last update.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_pending: int = 32, result_ttl: float = 900):
+        self.max_pending = max_pending
+        self._records = TTLCache(name, result_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, dedupe_key: str, fn: Callable[[], Tuple[int, Any]]) -> Tuple[dict, bool]:
+        """Returns (job record, created) - created is False when an identical job was reused."""
+        with self._lock:
+            existing_id = self._records.get(("key", dedupe_key))
+            existing = self._records.get(("job", existing_id)) if existing_id else None
+            if existing is not None and _reusable(existing): return existing, False
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            job_id = uuid.uuid4().hex
+            record = {"job_id": job_id, "status": QUEUED, "stage": None, "partial": {},
+                      "submitted_at": time.time(), "started_at": None, "finished_at": None,
+                      "http_status": None, "result": None, "error": None}
+            self._records.set(("job", job_id), record)
+            self._records.set(("key", dedupe_key), job_id)
+            self._pending += 1
+        self._executor.submit(self._run, job_id, fn)
+        return record, True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._records.get(("job", job_id))
+
+    def update(self, job_id: str, **fields) -> None:
+        record = self._records.get_stale(("job", job_id))
+        if record is None: return
+        if "partial" in fields: fields["partial"] = {**record["partial"], **fields["partial"]}
+        self._records.set(("job", job_id), {**record, **fields})
+
+    def _run(self, job_id: str, fn: Callable[[], Tuple[int, Any]]) -> None:
+        token = _current_job.set((self, job_id))
+        try:
+            self.update(job_id, status=RUNNING, started_at=time.time())
+            http_status, body = fn()
+            self.update(job_id, status=SUCCEEDED if http_status < 500 else FAILED, stage="done",
+                        http_status=http_status, result=body, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            self.update(job_id, status=FAILED, error="An internal server error occurred.", finished_at=time.time())
+        finally:
+            _current_job.reset(token)
+            with self._lock: self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending, "store": self._records.stats()}
+
+
+def report_progress(stage: str, **partial) -> None:
+    """
+    Records the pipeline stage (and any partial results) on the job running in this thread, and starts the
+    stage's timer on the request summary (logging_setup) if there is one; no-op otherwise.
+    """
+    note_stage(stage)
+    current = _current_job.get()
+    if current is None: return
+    manager, job_id = current
+    manager.update(job_id, stage=stage, partial=partial)
@@ -0,0 +1,61 @@
+# backend/lanes_api.py
+# A depot lane's route geometry and fuel stations as a cacheable GET resource. The POST route response links it
+# (route.href), so browsers and proxies can keep the heavy, rarely-changing part and revalidate it for free.
+
+from flask import Blueprint, Response, jsonify
+import logging
+from config import Config
+from serialization import json_response, encoded_etag, matching_etag, round_coordinates
+from diesel_api import (
+    nigerian_depots, RouteContextError, fetch_lane_geometry, lane_route_points, lane_station_points, lane_version
+)
+import deadline
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+lanes_api_bp = Blueprint('lanes_api', __name__)
+
+
+@lanes_api_bp.route('/api/lanes/<origin_depot>/<destination_depot>', methods=['GET'])
+@deadline.with_request_deadline
+def lane_api(origin_depot, destination_depot):
+    """
+    {"origin", "destination", "version", "coordinates": [[lat, lon], ...], "stations": [{"name", "coordinates"}],
+    "total_distance", "city_distance", "highway_distance"} (km). Revalidate with If-None-Match.
+    """
+    if origin_depot not in nigerian_depots or destination_depot not in nigerian_depots or origin_depot == destination_depot:
+        return jsonify({"success": False, "error": f"No lane {origin_depot} -> {destination_depot}."}), 404
+    try:
+        geometry, degraded = fetch_lane_geometry(origin_depot, destination_depot)
+    except RouteContextError as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    except Exception as e:
+        logger.error(f"Lane {origin_depot} -> {destination_depot} failed: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "An internal server error occurred."}), 500
+
+    if not geometry["fuel_search_complete"]:
+        # Stations were cut short; this answer is not the lane's geometry, so nobody may keep it
+        response = json_response({"success": True, "degraded": degraded, "origin": origin_depot, "destination": destination_depot,
+                                  "coordinates": round_coordinates(lane_route_points(geometry)), "stations": lane_station_points(geometry)})
+        response.cache_control.no_store = True
+        return response
+
+    version = lane_version(geometry)
+    matched = matching_etag(version)
+    if matched is not None:
+        response = Response(status=304)
+        response.set_etag(matched)
+    else:
+        response = json_response({
+            "success": True, "origin": origin_depot, "destination": destination_depot, "version": version,
+            "coordinates": round_coordinates(lane_route_points(geometry)), "stations": lane_station_points(geometry),
+            "total_distance": round(geometry["total_km"], 2), "city_distance": round(geometry["city_km"], 2),
+            "highway_distance": round(geometry["highway_km"], 2),
+        })
+        response.set_etag(encoded_etag(version, response.headers.get("Content-Encoding")))
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.LANE_MAX_AGE
+    return response
@@ -0,0 +1,225 @@
+# backend/logging_setup.py
+# Process-wide logging: request threads only put records on a bounded queue; one listener thread formats and
+# writes them. Messages use %-style arguments, so nothing is formatted for disabled levels or sampled-out records,
+# and repeated INFO/DEBUG messages from chatty loggers are sampled per message template.
+# A request can also collect its stages and key numbers into one summary record instead of a line per step.
+
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+from config import Config
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s %(threadName)s : %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_setup_lock = threading.Lock()
+
+
+class _Lazy:
+    """Formats on str(), i.e. on the listener thread."""
+    __slots__ = ("fn", "arg")
+
+    def __init__(self, fn, arg):
+        self.fn, self.arg = fn, arg
+
+    def __str__(self):
+        return self.fn(self.arg)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 in round(1 / rate) records per (logger, message template) for loggers listed in rates (prefix match:
+    "tracking" covers "tracking.x"). WARNING and above always pass. Counting per template (not per formatted line)
+    is what makes lazy %-style messages sampleable: "Found fuel station: %s" is one template for every station.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {name: max(1, round(1 / rate)) if rate > 0 else 0 for name, rate in rates.items()}
+        self._seen: Dict[tuple, int] = {}
+        self._every_for: Dict[str, Optional[int]] = {} # logger name -> resolved setting (None = not sampled)
+        self.dropped = 0
+
+    def _resolve(self, name: str) -> Optional[int]:
+        every = self._every_for.get(name, False)
+        if every is not False: return every
+        every, parts = None, name.split(".")
+        for i in range(len(parts), 0, -1):
+            every = self.every.get(".".join(parts[:i]))
+            if every is not None: break
+        self._every_for[name] = every
+        return every
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING: return True
+        every = self._resolve(record.name)
+        if every is None or every == 1: return True
+        key = (record.name, record.msg)
+        if len(self._seen) > 10000: self._seen.clear() # f-string messages make every line its own template
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1 # Unlocked: an occasional lost count only shifts which record is kept
+        if every and seen % every == 0: return True
+        self.dropped += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Never blocks the caller: a full queue drops the record (counted). Records whose arguments are plain values are
+    queued unformatted and formatted on the listener thread; others are formatted now, since they could change
+    before the listener gets to them.
+    """
+    PLAIN = (str, int, float, bool, type(None), _Lazy)
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, self.PLAIN) for arg in args)):
+            record.msg, record.args = record.getMessage(), None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info) # Tracebacks hold live frames
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; request summaries carry their fields under "summary"."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": self.formatTime(record), "level": record.levelname, "logger": record.name,
+                 "thread": record.threadName, "message": record.getMessage()}
+        summary = getattr(record, "summary", None)
+        if summary is not None: entry["summary"] = summary
+        if record.exc_text: entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"tracking=0.1,diesel_routing_here=0.2" -> {"tracking": 0.1, "diesel_routing_here": 0.2}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None, sample_rates: Optional[str] = None,
+                      queue_size: Optional[int] = None, handler: Optional[logging.Handler] = None) -> None:
+    """
+    Replaces the root handlers (including any basicConfig() ones installed by module imports) with the queue
+    handler and starts the listener. Safe to call more than once; later calls reconfigure.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None: _listener.stop()
+        output = handler or logging.StreamHandler()
+        output.setFormatter(JsonFormatter() if (fmt or Config.LOG_FORMAT) == "json" else logging.Formatter(TEXT_FORMAT))
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE if queue_size is None else queue_size)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_handler.addFilter(SamplingFilter(parse_sample_rates(Config.LOG_SAMPLE_RATES if sample_rates is None else sample_rates)))
+        root = logging.getLogger()
+        for existing in list(root.handlers): root.removeHandler(existing)
+        root.addHandler(_queue_handler)
+        root.setLevel(level or Config.LOG_LEVEL)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+
+
+def stop_logging() -> None:
+    """Drains the queue and stops the listener (at exit; call before forking if the parent logged)."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+atexit.register(stop_logging)
+
+
+def logging_stats() -> dict:
+    if _queue_handler is None: return {"configured": False}
+    sampler = _queue_handler.filters[0]
+    return {"configured": True, "queued": _queue_handler.queue.qsize(), "dropped_queue_full": _queue_handler.dropped,
+            "dropped_sampled": sampler.dropped}
+
+
+# --- Per-request summaries ---
+_summary = contextvars.ContextVar("request_summary", default=None)
+
+
+class RequestSummary:
+    """Stage timings and key fields of one request, logged as a single record when it ends."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.fields = {}
+        self.stages = {}
+        self._started = self._stage_started = time.perf_counter()
+        self._stage = "setup"
+
+    def stage(self, stage: str, **fields) -> None:
+        now = time.perf_counter()
+        if self._stage is not None: self.stages[self._stage] = self.stages.get(self._stage, 0.0) + (now - self._stage_started) * 1000
+        self._stage, self._stage_started = stage, now
+        self.fields.update(fields)
+
+    def finish(self, status: Optional[int]) -> dict:
+        self.stage(None)
+        return {"request": self.name, "status": status, "total_ms": round((time.perf_counter() - self._started) * 1000, 1),
+                "stages_ms": {stage: round(ms, 1) for stage, ms in self.stages.items()}, **self.fields}
+
+    @staticmethod
+    def describe(summary: dict) -> str:
+        stages = ", ".join(f"{stage} {ms:.1f}" for stage, ms in summary["stages_ms"].items())
+        fields = " ".join(f"{k}={v}" for k, v in summary.items() if k not in ("request", "status", "total_ms", "stages_ms"))
+        return f"{summary['request']} {summary['status']} in {summary['total_ms']:.1f} ms [{stages}] {fields}"
+
+
+def note_stage(stage: str, **fields) -> None:
+    """Starts a new timed stage (and records fields) on the current request's summary; no-op outside one."""
+    summary = _summary.get()
+    if summary is not None: summary.stage(stage, **fields)
+
+
+def note(**fields) -> None:
+    """Adds fields to the current request's summary; no-op outside one."""
+    summary = _summary.get()
+    if summary is not None: summary.fields.update(fields)
+
+
+def with_request_summary(name: str, logger: logging.Logger) -> Callable:
+    """Decorator for a view: collects note()/note_stage() calls made while it runs and logs them as one INFO record."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            summary = RequestSummary(name)
+            token = _summary.set(summary)
+            status = None
+            try:
+                result = view(*args, **kwargs)
+                status = result[1] if isinstance(result, tuple) else getattr(result, "status_code", 200)
+                return result
+            finally:
+                _summary.reset(token)
+                if logger.isEnabledFor(logging.INFO):
+                    record = summary.finish(status if status is not None else 500)
+                    logger.info("%s", _Lazy(RequestSummary.describe, record), extra={"summary": record})
+        return wrapper
+    return decorator
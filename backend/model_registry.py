@@ -0,0 +1,235 @@
+# backend/model_registry.py
+# Hot-swappable prediction model: a watcher thread notices a new artifact, loads and validates it off the request
+# path, and swaps it in with a single reference assignment - requests keep whichever version they started with.
+# An optional shadow model is scored on the same inputs in the background so a candidate can be compared live.
+
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+
+class ModelValidationError(Exception):
+    """The artifact loaded but doesn't fit the feature schema or gives unusable predictions."""
+
+
+class ModelVersion:
+    """One loaded artifact. `version` is a content hash, so every worker names the same file the same way."""
+
+    def __init__(self, model: Any, path: str, version: str, signature: tuple):
+        self.model = model
+        self.path = path
+        self.version = version
+        self.signature = signature # (inode, size, mtime_ns) when loaded
+        self.loaded_at = time.time()
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        if hasattr(self.model, '_Booster'): predictions = np.asarray(self.model._Booster.predict(features), dtype=float)
+        else: predictions = np.asarray(self.model.predict(features), dtype=float)
+        return predictions
+
+    @property
+    def feature_importances(self) -> Optional[np.ndarray]:
+        return getattr(self.model, 'feature_importances_', None)
+
+    def describe(self) -> dict:
+        return {"path": self.path, "version": self.version, "type": type(self.model).__name__, "loaded_at": self.loaded_at}
+
+
+def _signature(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def load_model(path: str, feature_names: List[str], validation_features: np.ndarray) -> ModelVersion:
+    """Loads the artifact and checks it against the feature schema and a validation batch. Raises on any problem."""
+    signature = _signature(path)
+    if signature is None: raise FileNotFoundError(path)
+    with open(path, "rb") as f: data = f.read()
+    model = joblib.load(io.BytesIO(data))
+    candidate = ModelVersion(model, path, hashlib.blake2b(data, digest_size=8).hexdigest(), signature)
+
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features is not None and n_features != len(feature_names):
+        raise ModelValidationError(f"expects {n_features} features, schema has {len(feature_names)}")
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None and list(names) != list(feature_names):
+        raise ModelValidationError("feature names/order differ from the schema")
+    if not hasattr(model, 'predict'): raise ModelValidationError("artifact has no predict()")
+    predictions = candidate.predict(validation_features)
+    if predictions.shape != (len(validation_features),):
+        raise ModelValidationError(f"validation batch gave shape {predictions.shape}")
+    if not np.all(np.isfinite(predictions)): raise ModelValidationError("validation batch gave non-finite predictions")
+    if np.all(predictions <= 0): raise ModelValidationError("validation batch gave no positive efficiency")
+    return candidate
+
+
+class ShadowStats:
+    """Running comparison of shadow vs active predictions over the rows both scored."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.batches = self.rows = 0
+            self.sum_diff = self.sum_abs_diff = self.sum_sq_diff = self.sum_rel_abs_diff = self.max_abs_diff = 0.0
+            self.errors = 0
+
+    def add(self, active: np.ndarray, shadow: np.ndarray) -> None:
+        diff = shadow - active
+        with self._lock:
+            self.batches += 1
+            self.rows += len(diff)
+            self.sum_diff += float(diff.sum())
+            self.sum_abs_diff += float(np.abs(diff).sum())
+            self.sum_sq_diff += float((diff ** 2).sum())
+            self.sum_rel_abs_diff += float((np.abs(diff) / np.maximum(np.abs(active), 1e-9)).sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(np.abs(diff).max()) if len(diff) else 0.0)
+
+    def summary(self) -> dict:
+        with self._lock:
+            rows = self.rows or 1
+            return {"batches": self.batches, "rows": self.rows, "errors": self.errors,
+                    "mean_diff_mpg": self.sum_diff / rows, "mean_abs_diff_mpg": self.sum_abs_diff / rows,
+                    "rmse_mpg": (self.sum_sq_diff / rows) ** 0.5, "mean_rel_abs_diff": self.sum_rel_abs_diff / rows,
+                    "max_abs_diff_mpg": self.max_abs_diff}
+
+
+class ModelRegistry:
+    """
+    Holds the active model (and optional shadow). A daemon thread polls the artifact paths every poll_seconds;
+    when a file's (inode, size, mtime) changes it is loaded and validated, and only then swapped in - a bad
+    artifact is logged and the current model keeps serving. on_swap callbacks run after each swap.
+    Deploy new artifacts by writing a temp file and renaming it over the old one.
+    """
+
+    def __init__(self, path: str, feature_names: List[str], validation_features: np.ndarray, poll_seconds: float = 30.0,
+                 shadow_path: Optional[str] = None, shadow_sample_rate: float = 1.0, shadow_max_pending: int = 64):
+        self.path = path
+        self.feature_names = list(feature_names)
+        self.validation_features = np.ascontiguousarray(validation_features, dtype=float)
+        self.poll_seconds = poll_seconds
+        self.shadow_path = shadow_path or None
+        self.shadow_sample_rate = shadow_sample_rate
+        self.active: Optional[ModelVersion] = None
+        self.shadow: Optional[ModelVersion] = None
+        self.shadow_stats = ShadowStats()
+        self.last_error: Optional[dict] = None
+        self.swaps = 0
+        self._on_swap: List[Callable[[Optional[ModelVersion], ModelVersion], None]] = []
+        self._rejected = {} # path -> signature of the last artifact that failed, so it isn't retried every poll
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-shadow") if self.shadow_path else None
+        self._shadow_slots = threading.BoundedSemaphore(shadow_max_pending)
+
+    def on_swap(self, callback: Callable[[Optional[ModelVersion], ModelVersion], None]) -> None:
+        self._on_swap.append(callback)
+
+    def load_initial(self) -> None:
+        """Synchronous first load at import time; failures leave active as None (predictions then fail cleanly)."""
+        self.check_for_update()
+        if self.shadow_path: self.check_for_update(shadow=True)
+
+    def start(self) -> None:
+        if self._thread is not None or self.poll_seconds <= 0: return
+        self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check_for_update()
+                if self.shadow_path: self.check_for_update(shadow=True)
+            except Exception as e:
+                logger.error(f"Model watcher error: {e}", exc_info=True)
+
+    def check_for_update(self, shadow: bool = False) -> bool:
+        """Loads the artifact if it changed since the current version; returns True if a new version was swapped in."""
+        path = self.shadow_path if shadow else self.path
+        current = self.shadow if shadow else self.active
+        signature = _signature(path)
+        if signature is None:
+            if current is None: logger.error(f"Model artifact {path} not found. Predictions will fail." if not shadow else f"Shadow model {path} not found.")
+            return False
+        if (current is not None and current.signature == signature) or self._rejected.get(path) == signature:
+            return False
+        try:
+            candidate = load_model(path, self.feature_names, self.validation_features)
+        except Exception as e:
+            self._rejected[path] = signature
+            self.last_error = {"path": path, "error": f"{type(e).__name__}: {e}", "at": time.time()}
+            logger.error(f"Rejected model artifact {path}: {e}. Keeping version {current.version if current else None}.")
+            return False
+        if _signature(path) != signature:
+            return False # Replaced while loading; the next poll picks up the final file
+        if current is not None and candidate.version == current.version:
+            current.signature = signature # Touched or copied, same bytes
+            return False
+        self._swap(candidate, shadow)
+        return True
+
+    def _swap(self, candidate: ModelVersion, shadow: bool) -> None:
+        with self._lock:
+            previous = self.shadow if shadow else self.active
+            if shadow:
+                self.shadow = candidate
+                self.shadow_stats.reset()
+            else:
+                self.active = candidate
+                if previous is not None: self.swaps += 1
+        drift = ""
+        if previous is not None:
+            delta = np.abs(candidate.predict(self.validation_features) - previous.predict(self.validation_features))
+            drift = f" (validation batch: mean |delta| {delta.mean():.3f} MPG, max {delta.max():.3f})"
+        logger.info(f"{'Shadow' if shadow else 'Active'} model is now {candidate.version} from {candidate.path}"
+                    f", replacing {previous.version if previous else 'none'}{drift}.")
+        if shadow: return
+        for callback in self._on_swap:
+            try:
+                callback(previous, candidate)
+            except Exception as e:
+                logger.error(f"Model swap callback failed: {e}", exc_info=True)
+
+    def score_shadow(self, features: np.ndarray, active_predictions: np.ndarray) -> None:
+        """Queues a shadow prediction of the same batch for comparison; never blocks or fails the caller."""
+        shadow = self.shadow
+        if shadow is None or self._shadow_executor is None or random.random() >= self.shadow_sample_rate: return
+        if not self._shadow_slots.acquire(blocking=False): return # Shadow scoring is behind; skip this batch
+
+        def run():
+            try:
+                self.shadow_stats.add(np.asarray(active_predictions, dtype=float), shadow.predict(features))
+            except Exception as e:
+                with self.shadow_stats._lock: self.shadow_stats.errors += 1
+                logger.warning(f"Shadow model {shadow.version} failed: {e}")
+            finally:
+                self._shadow_slots.release()
+        self._shadow_executor.submit(run)
+
+    def status(self) -> dict:
+        return {
+            "active": self.active.describe() if self.active else None,
+            "shadow": {**self.shadow.describe(), "comparison": self.shadow_stats.summary()} if self.shadow else None,
+            "swaps": self.swaps, "poll_seconds": self.poll_seconds, "last_error": self.last_error,
+        }
@@ -0,0 +1,76 @@
+# backend/passwords.py
+# Password hashing/verification off the request thread: scrypt/pbkdf2 burn tens of ms of CPU per call,
+# so they run on a small bounded process pool. The hash method is configurable and old hashes are
+# upgraded on the next successful login.
+
+import multiprocessing
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+
+class PasswordPoolBusy(Exception):
+    """More than max_pending hash operations are waiting; the caller should answer 503."""
+
+
+class PasswordHasher:
+    """
+    hash()/verify() run werkzeug's generate/check_password_hash on `workers` processes (inline when 0).
+    At most max_pending operations may be queued or running; beyond that callers wait up to `timeout`
+    seconds for a slot and then get PasswordPoolBusy. Processes are spawned, not forked, so they don't
+    inherit the web worker's threads and locks.
+    """
+
+    def __init__(self, method: str, workers: int = 2, max_pending: int = 32, timeout: float = 10.0):
+        self.method = method
+        # werkzeug expands short methods ("scrypt" -> "scrypt:32768:8:1"); stored hashes carry the expanded form.
+        # Also rejects an unknown method at startup rather than at the first signup.
+        self.method_id = generate_password_hash("", method).split("$", 1)[0]
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _run(self, fn, *args):
+        if self.workers <= 0: return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordPoolBusy("Password hashing pool is saturated")
+        try:
+            return self._executor().submit(fn, *args).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            logger.error("Password hashing pool broke; restarting it.")
+            with self._pool_lock: self._pool = None
+            return self._executor().submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordPoolBusy(f"Password hashing took longer than {self.timeout}s")
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """True when the stored hash was made with other parameters than the configured method."""
+        return stored_hash.split("$", 1)[0] != self.method_id
+
+
+hasher = PasswordHasher(Config.PASSWORD_HASH_METHOD, Config.PASSWORD_POOL_WORKERS,
+                        Config.PASSWORD_POOL_MAX_PENDING, Config.PASSWORD_POOL_TIMEOUT)
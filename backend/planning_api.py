@@ -0,0 +1,523 @@
+# backend/planning_api.py
+# What-if / planning endpoints that reuse one upstream fetch and one batched model call.
+
+from flask import Blueprint, request, jsonify
+import numpy as np
+import contextvars
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from scipy.optimize import linprog
+from scipy import sparse
+from diesel_api import (
+    nigerian_depots, vehicle_type_nigeria, dispatch_encoded, MPG_TO_KML,
+    RouteContextError, fetch_lane_context, fetch_lane_weather, fetch_lane_forecast, classify_temperature,
+    build_feature_matrix, predict_mpg, calculate_fuel_costs, get_diesel_price_ng, convert_time_to_window,
+    lane_cache
+)
+import diesel_api
+from deadline import with_request_deadline
+from logging_setup import with_request_summary, note, note_stage
+from serialization import json_response, round_coordinates
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+# Sweep defaults (planners' usual question: every truck, 5-30 pallets, every dispatch window)
+SWEEP_PALLETS_MIN = 5
+SWEEP_PALLETS_MAX = 30
+SWEEP_PALLETS_STEP = 1
+MAX_SWEEP_ROWS = 20000
+SWEEP_COLUMNS = ["vehicle", "pallets", "dispatch_window", "efficiency_prediction", "total_required_fuel", "total_final_cost"]
+# Representative departure time shown for each dispatch window (see convert_time_to_window)
+DISPATCH_WINDOW_TIMES = {'morning': '08:00', 'noon': '14:00', 'night': '22:00'}
+MAX_STOPS = 10
+MAX_LEG_WORKERS = 4
+MAX_ORDERS = 100000
+MAX_ASSIGN_MODEL_ROWS = 50000 # depot pairs x vehicles x distinct pallet loads (56 x 9 x ~99)
+
+planning_api_bp = Blueprint('planning_api', __name__)
+
+
+def _validate_lane(origin_depot, destination_depot):
+    if not origin_depot or not destination_depot:
+        return "Missing originDepot or destinationDepot."
+    if origin_depot == destination_depot:
+        return "Origin and destination depots must differ."
+    if origin_depot not in nigerian_depots or destination_depot not in nigerian_depots:
+        return "Unknown depot specified."
+    return None
+
+
+def _fetch_lanes(pairs: List[Tuple[str, str]], target_date: Optional[str] = None) -> Dict[Tuple[str, str], tuple]:
+    """
+    Fetches lane context (and the target date's weather, if given) for each pair concurrently.
+    Returns {pair: (lane, (avg_temp, snow, rain) or None)}. Raises RouteContextError if any lane fails.
+    """
+    def fetch_pair(pair):
+        lane = fetch_lane_context(*pair)
+        return lane, (fetch_lane_weather(lane, target_date) if target_date else None)
+    # Run each fetch in a copy of the caller's context so the request deadline carries over to the workers
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_LEG_WORKERS, len(pairs)))) as executor:
+        return dict(zip(pairs, executor.map(lambda pair: context.copy().run(fetch_pair, pair), pairs)))
+
+
+def _lane_summary(lane: dict) -> dict:
+    return {
+        "origin": lane["origin"], "destination": lane["destination"],
+        "total_distance": round(lane["total_km"], 2), "highway_distance": round(lane["highway_km"], 2),
+        "city_distance": round(lane["city_km"], 2), "traffic_severity": lane["traffic_severity"],
+        "degraded": lane.get("degraded", []),
+    }
+
+
+@planning_api_bp.route('/api/diesel/sweep', methods=['POST'])
+@with_request_deadline
+@with_request_summary("sweep", logger)
+def scenario_sweep_api():
+    """
+    Costs the cartesian grid vehicles x pallets x dispatch windows for one lane.
+    Route, traffic and weather are fetched once; the grid is predicted in a single model call.
+    """
+    origin_depot = request.form.get('originDepot')
+    destination_depot = request.form.get('destinationDepot')
+    target_date = request.form.get('journeyDate')
+    lane_error = _validate_lane(origin_depot, destination_depot)
+    if lane_error: return jsonify({"success": False, "error": lane_error}), 400
+    if not target_date: return jsonify({"success": False, "error": "Missing journeyDate."}), 400
+
+    vehicles = request.form.getlist('vehicleModel') or list(vehicle_type_nigeria)
+    invalid_vehicles = [v for v in vehicles if v not in vehicle_type_nigeria]
+    if invalid_vehicles:
+        return jsonify({"success": False, "error": f"Invalid Vehicle Model specified: {', '.join(invalid_vehicles)}"}), 400
+    windows = request.form.getlist('dispatchWindow') or list(dispatch_encoded)
+    if any(w not in dispatch_encoded for w in windows):
+        return jsonify({"success": False, "error": f"dispatchWindow must be one of {list(dispatch_encoded)}."}), 400
+    try:
+        vehicle_age = float(request.form.get('vehicleAge', 0))
+        pallets_min = float(request.form.get('palletsMin', SWEEP_PALLETS_MIN))
+        pallets_max = float(request.form.get('palletsMax', SWEEP_PALLETS_MAX))
+        pallets_step = float(request.form.get('palletsStep', SWEEP_PALLETS_STEP))
+    except ValueError:
+        return jsonify({"success": False, "error": "vehicleAge and pallet range must be numeric."}), 400
+    if not all(math.isfinite(v) for v in (vehicle_age, pallets_min, pallets_max, pallets_step)):
+        return jsonify({"success": False, "error": "vehicleAge and pallet range must be finite."}), 400
+    if pallets_step <= 0 or pallets_min <= 0 or pallets_max < pallets_min:
+        return jsonify({"success": False, "error": "Invalid pallet range."}), 400
+    # Size the grid before allocating it; the epsilon keeps max in range despite float steps (5..30 by 0.1 is 251 values)
+    n_pallets = math.floor((pallets_max - pallets_min) / pallets_step + 1e-9) + 1
+    grid_size = len(vehicles) * n_pallets * len(windows)
+    if grid_size > MAX_SWEEP_ROWS:
+        return jsonify({"success": False, "error": f"Sweep too large ({grid_size} rows, max {MAX_SWEEP_ROWS})."}), 400
+    pallet_values = pallets_min + np.arange(n_pallets) * pallets_step
+    if diesel_api.model_registry.active is None: return jsonify({"success": False, "error": "Prediction model unavailable."}), 500
+
+    # --- One upstream fetch for the lane ---
+    try:
+        lane = fetch_lane_context(origin_depot, destination_depot)
+        average_temperature, snow_classification, rain_classification = fetch_lane_weather(lane, target_date)
+    except RouteContextError as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    # --- Cartesian grid as one feature matrix ---
+    vehicle_idx, pallet_idx, window_idx = (a.ravel() for a in np.meshgrid(
+        np.arange(len(vehicles)), np.arange(len(pallet_values)), np.arange(len(windows)), indexing='ij'
+    ))
+    grid_vehicles = np.asarray(vehicles)[vehicle_idx]
+    grid_pallets = pallet_values[pallet_idx]
+    grid_windows = np.asarray(windows)[window_idx]
+    features = build_feature_matrix(
+        vehicle_age, grid_pallets, grid_vehicles, grid_windows, origin_depot, destination_depot,
+        lane["city_km"], lane["highway_km"], lane["traffic_severity"], classify_temperature(average_temperature),
+        rain_classification, snow_classification
+    )
+
+    # --- One batched prediction ---
+    try:
+        efficiency_kml = predict_mpg(features) * MPG_TO_KML
+    except Exception as e:
+        logger.error(f"Error during sweep prediction: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "Failed to get prediction from model."}), 500
+    fuel_price_per_litre_ngn = get_diesel_price_ng(origin_depot)
+    costs = calculate_fuel_costs(lane["total_km"], efficiency_kml, fuel_price_per_litre_ngn)
+    note(origin=origin_depot, destination=destination_depot, scenarios=len(features))
+
+    rows = [
+        [vehicle, float(p), window, round(float(eff), 2), round(float(fuel), 2), round(float(cost), 2)]
+        for vehicle, p, window, eff, fuel, cost in zip(
+            grid_vehicles, grid_pallets, grid_windows, costs["efficiency_kml"],
+            costs["total_required_fuel"], costs["total_final_cost"]
+        )
+    ]
+    cheapest = int(np.argmin(costs["total_final_cost"]))
+    return jsonify({
+        "success": True,
+        "lane": {
+            **_lane_summary(lane),
+            "average_temperature": round(average_temperature, 2),
+            "rain_classification": rain_classification, "snow_classification": snow_classification,
+            "fuel_price": round(fuel_price_per_litre_ngn, 2),
+        },
+        "columns": SWEEP_COLUMNS,
+        "rows": rows,
+        "cheapest": dict(zip(SWEEP_COLUMNS, rows[cheapest])),
+    })
+
+
+@planning_api_bp.route('/api/diesel/departure', methods=['POST'])
+@with_request_deadline
+@with_request_summary("departure", logger)
+def departure_optimizer_api():
+    """
+    Scores every dispatch window over the forecast horizon (4 days x 3 windows) for one lane and vehicle.
+    Weather is fetched once per sampled point for all days; all slots are predicted in a single model call.
+    """
+    origin_depot = request.form.get('originDepot')
+    destination_depot = request.form.get('destinationDepot')
+    vehicle_type = request.form.get('vehicleModel')
+    lane_error = _validate_lane(origin_depot, destination_depot)
+    if lane_error: return jsonify({"success": False, "error": lane_error}), 400
+    if vehicle_type not in vehicle_type_nigeria:
+        return jsonify({"success": False, "error": f"Invalid Vehicle Model specified: {vehicle_type}"}), 400
+    try:
+        pallets = float(request.form.get('pallets'))
+        vehicle_age = float(request.form.get('vehicleAge', 0))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "pallets and vehicleAge must be numeric."}), 400
+    if not (math.isfinite(pallets) and math.isfinite(vehicle_age)):
+        return jsonify({"success": False, "error": "pallets and vehicleAge must be finite."}), 400
+    if diesel_api.model_registry.active is None: return jsonify({"success": False, "error": "Prediction model unavailable."}), 500
+
+    try:
+        lane = fetch_lane_context(origin_depot, destination_depot)
+        forecast_days = fetch_lane_forecast(lane)
+    except RouteContextError as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    # --- One row per (forecast day, dispatch window) ---
+    slots = [(date_str, window) for date_str in forecast_days for window in dispatch_encoded]
+    slot_weather = [forecast_days[date_str] for date_str, _ in slots]
+    features = build_feature_matrix(
+        vehicle_age, pallets, vehicle_type, [window for _, window in slots], origin_depot, destination_depot,
+        lane["city_km"], lane["highway_km"], lane["traffic_severity"],
+        [classify_temperature(temp) for temp, _, _ in slot_weather],
+        [rain for _, _, rain in slot_weather], [snow for _, snow, _ in slot_weather]
+    )
+    try:
+        efficiency_kml = predict_mpg(features) * MPG_TO_KML
+    except Exception as e:
+        logger.error(f"Error during departure prediction: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "Failed to get prediction from model."}), 500
+    fuel_price_per_litre_ngn = get_diesel_price_ng(origin_depot)
+    costs = calculate_fuel_costs(lane["total_km"], efficiency_kml, fuel_price_per_litre_ngn)
+    note(origin=origin_depot, destination=destination_depot, slots=len(slots))
+
+    slot_rows = [
+        {
+            "date": date_str, "dispatch_window": window, "dispatch_time": DISPATCH_WINDOW_TIMES[window],
+            "average_temperature": round(temp, 2), "rain_classification": rain, "snow_classification": snow,
+            "efficiency_prediction": round(float(costs["efficiency_kml"][i]), 2),
+            "total_required_fuel": round(float(costs["total_required_fuel"][i]), 2),
+            "total_final_cost": round(float(costs["total_final_cost"][i]), 2),
+        }
+        for i, ((date_str, window), (temp, snow, rain)) in enumerate(zip(slots, slot_weather))
+    ]
+    return jsonify({
+        "success": True,
+        "lane": {**_lane_summary(lane), "fuel_price": round(fuel_price_per_litre_ngn, 2)},
+        "vehicle": vehicle_type, "pallets": pallets,
+        "slots": slot_rows,
+        "best": slot_rows[int(np.argmin(costs["total_final_cost"]))],
+    })
+
+
+@planning_api_bp.route('/api/diesel/multistop', methods=['POST'])
+@with_request_deadline
+@with_request_summary("multistop", logger)
+def multistop_route_api():
+    """
+    Plans an ordered multi-stop trip (e.g. Lagos -> Ibadan -> Abuja -> Kaduna) from per-leg lane data.
+    Legs are fetched concurrently (cached legs are not re-requested) and predicted in one batch.
+    Form: stop (repeated, in order), vehicleModel, pallets, vehicleAge, dispatchTime, journeyDate.
+    """
+    stops = request.form.getlist('stop')
+    vehicle_type = request.form.get('vehicleModel')
+    target_date = request.form.get('journeyDate')
+    if len(stops) < 2 or len(stops) > MAX_STOPS:
+        return jsonify({"success": False, "error": f"Provide between 2 and {MAX_STOPS} stops."}), 400
+    legs = list(zip(stops[:-1], stops[1:]))
+    for origin_depot, destination_depot in legs:
+        lane_error = _validate_lane(origin_depot, destination_depot)
+        if lane_error: return jsonify({"success": False, "error": f"{origin_depot} -> {destination_depot}: {lane_error}"}), 400
+    if vehicle_type not in vehicle_type_nigeria:
+        return jsonify({"success": False, "error": f"Invalid Vehicle Model specified: {vehicle_type}"}), 400
+    if not target_date: return jsonify({"success": False, "error": "Missing journeyDate."}), 400
+    try:
+        pallets = float(request.form.get('pallets'))
+        vehicle_age = float(request.form.get('vehicleAge', 0))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "pallets and vehicleAge must be numeric."}), 400
+    if not (math.isfinite(pallets) and math.isfinite(vehicle_age)):
+        return jsonify({"success": False, "error": "pallets and vehicleAge must be finite."}), 400
+    dispatch_window = convert_time_to_window(request.form.get('dispatchTime', ''))
+    if diesel_api.model_registry.active is None: return jsonify({"success": False, "error": "Prediction model unavailable."}), 500
+
+    # --- Fetch each distinct leg once, concurrently ---
+    note_stage("legs")
+    unique_legs = list(dict.fromkeys(legs))
+    cached_legs = sum(1 for leg in unique_legs if leg in lane_cache)
+    try:
+        leg_results = _fetch_lanes(unique_legs, target_date)
+    except RouteContextError as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    note_stage("costs", legs=len(unique_legs), cached_legs=cached_legs)
+
+    # --- One batched prediction over all legs ---
+    leg_lanes = [leg_results[leg][0] for leg in legs]
+    leg_weather = [leg_results[leg][1] for leg in legs]
+    features = build_feature_matrix(
+        vehicle_age, pallets, vehicle_type, dispatch_window,
+        [o for o, _ in legs], [d for _, d in legs],
+        [lane["city_km"] for lane in leg_lanes], [lane["highway_km"] for lane in leg_lanes],
+        [lane["traffic_severity"] for lane in leg_lanes],
+        [classify_temperature(temp) for temp, _, _ in leg_weather],
+        [rain for _, _, rain in leg_weather], [snow for _, snow, _ in leg_weather]
+    )
+    try:
+        efficiency_kml = predict_mpg(features) * MPG_TO_KML
+    except Exception as e:
+        logger.error(f"Error during multi-stop prediction: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "Failed to get prediction from model."}), 500
+    fuel_prices = np.asarray([get_diesel_price_ng(o) for o, _ in legs])
+    leg_total_km = np.asarray([lane["total_km"] for lane in leg_lanes])
+    costs = calculate_fuel_costs(leg_total_km, efficiency_kml, fuel_prices)
+
+    leg_rows = []
+    for i, (lane, (temp, snow, rain)) in enumerate(zip(leg_lanes, leg_weather)):
+        leg_rows.append({
+            **_lane_summary(lane),
+            "average_temperature": round(temp, 2), "rain_classification": rain, "snow_classification": snow,
+            "efficiency_prediction": round(float(costs["efficiency_kml"][i]), 2),
+            "total_required_fuel": round(float(costs["total_required_fuel"][i]), 2),
+            "total_fuel_cost": round(float(costs["total_fuel_cost"][i]), 2),
+            "overhead_cost": round(float(costs["overhead_cost"][i]), 2),
+            "total_final_cost": round(float(costs["total_final_cost"][i]), 2),
+        })
+    total_km = float(leg_total_km.sum())
+    total_fuel_cost = float(costs["total_fuel_cost"].sum())
+    # Consecutive legs share the stop point; drop the duplicate join
+    coordinates = np.concatenate(
+        [lane["route_points"] if i == 0 else lane["route_points"][1:] for i, lane in enumerate(leg_lanes)]
+    )
+    stations = [fs for lane in leg_lanes for fs in lane["fuel_stations"]]
+    return json_response({
+        "success": True,
+        "route": {
+            "stops": stops, "coordinates": round_coordinates(coordinates),
+            "stations": [{"name": f"Fuel Station {i+1}", "coordinates": fs} for i, fs in enumerate(stations)],
+            "total_distance": round(total_km, 2),
+        },
+        "legs": leg_rows,
+        "totals": {
+            "total_distance": round(total_km, 2),
+            "highway_distance": round(sum(lane["highway_km"] for lane in leg_lanes), 2),
+            "city_distance": round(sum(lane["city_km"] for lane in leg_lanes), 2),
+            "total_required_fuel": round(float(costs["total_required_fuel"].sum()), 2),
+            "total_fuel_cost": round(total_fuel_cost, 2),
+            "overhead_cost": round(float(costs["overhead_cost"].sum()), 2),
+            "total_final_cost": round(float(costs["total_final_cost"].sum()), 2),
+            "cost_per_km": round(total_fuel_cost / total_km, 2) if total_km > 0 else 0,
+        },
+        "cached_legs": cached_legs,
+    })
+
+
+@planning_api_bp.route('/api/diesel/assign', methods=['POST'])
+@with_request_deadline
+@with_request_summary("assign", logger)
+def depot_assignment_api():
+    """
+    Assigns orders to (origin depot, vehicle) at minimum total cost.
+    JSON body: {"orders": [{"id", "destination", "pallets"}], "vehicleAge", "dispatchTime",
+                "journeyDate" (optional, adds lane weather), "vehicles" (optional subset),
+                "fleet" (optional {depot: {vehicle: count}}; one order per vehicle)}.
+    The depot OD cost matrix is built from cached lanes with one batched model pass over all pairs;
+    there are no per-order upstream calls.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"success": False, "error": "Body must be a JSON object."}), 400
+    orders = payload.get('orders') or []
+    if not isinstance(orders, list) or not all(isinstance(o, dict) for o in orders):
+        return jsonify({"success": False, "error": "orders must be a list of objects."}), 400
+    if not orders or len(orders) > MAX_ORDERS:
+        return jsonify({"success": False, "error": f"Provide between 1 and {MAX_ORDERS} orders."}), 400
+    try:
+        order_dest = np.asarray([nigerian_depots.index(o['destination']) for o in orders])
+        order_pallets = np.asarray([float(o['pallets']) for o in orders])
+        vehicle_age = float(payload.get('vehicleAge', 0))
+    except (KeyError, ValueError, TypeError):
+        return jsonify({"success": False, "error": "Each order needs a known 'destination' depot and numeric 'pallets'."}), 400
+    if not np.all(np.isfinite(order_pallets)) or np.any(order_pallets <= 0) or not np.isfinite(vehicle_age):
+        return jsonify({"success": False, "error": "Order pallets must be positive and vehicleAge finite."}), 400
+    order_ids = [o.get('id', i) for i, o in enumerate(orders)]
+    dispatch_window = convert_time_to_window(payload['dispatchTime']) if payload.get('dispatchTime') else 'noon'
+    target_date = payload.get('journeyDate')
+
+    fleet = payload.get('fleet')
+    vehicles = payload.get('vehicles') or list(vehicle_type_nigeria)
+    if fleet:
+        try:
+            vehicles = sorted({v for depot_fleet in fleet.values() for v, count in depot_fleet.items() if int(count) > 0})
+        except (AttributeError, TypeError, ValueError):
+            return jsonify({"success": False, "error": "fleet must map depot -> {vehicle: count}."}), 400
+        if any(depot not in nigerian_depots for depot in fleet):
+            return jsonify({"success": False, "error": "Unknown depot in fleet."}), 400
+    if not vehicles or any(v not in vehicle_type_nigeria for v in vehicles):
+        return jsonify({"success": False, "error": "Invalid or empty vehicle list."}), 400
+    if diesel_api.model_registry.active is None: return jsonify({"success": False, "error": "Prediction model unavailable."}), 500
+
+    # --- OD lanes for every depot pair (cached, fetched concurrently) ---
+    n_depots = len(nigerian_depots)
+    pairs = [(o, d) for o in nigerian_depots for d in nigerian_depots if o != d]
+    # The model pass has a row per pair x vehicle x distinct load; size it before fetching or allocating anything
+    model_rows = len(pairs) * len(vehicles) * len(np.unique(order_pallets))
+    if model_rows > MAX_ASSIGN_MODEL_ROWS:
+        return jsonify({"success": False, "error": f"Too many distinct pallet loads ({model_rows} model rows, max "
+                                                   f"{MAX_ASSIGN_MODEL_ROWS}); round order pallets to whole numbers."}), 400
+    try:
+        lanes = _fetch_lanes(pairs, target_date)
+    except RouteContextError as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    started = time.perf_counter()
+    # --- One batched model pass: pairs x vehicles x distinct pallet loads ---
+    pallet_values, order_pallet_idx = np.unique(order_pallets, return_inverse=True)
+    pair_idx, vehicle_idx, pallet_idx = (a.ravel() for a in np.meshgrid(
+        np.arange(len(pairs)), np.arange(len(vehicles)), np.arange(len(pallet_values)), indexing='ij'
+    ))
+    pair_lanes = [lanes[pair][0] for pair in pairs]
+    pair_weather = [lanes[pair][1] or (0.0, "Low", "Low") for pair in pairs]
+    pair_col = lambda values: np.asarray(values)[pair_idx]
+    features = build_feature_matrix(
+        vehicle_age, pallet_values[pallet_idx], np.asarray(vehicles)[vehicle_idx], dispatch_window,
+        pair_col([o for o, _ in pairs]), pair_col([d for _, d in pairs]),
+        pair_col([lane["city_km"] for lane in pair_lanes]), pair_col([lane["highway_km"] for lane in pair_lanes]),
+        pair_col([lane["traffic_severity"] for lane in pair_lanes]),
+        pair_col([classify_temperature(temp) for temp, _, _ in pair_weather]),
+        pair_col([rain for _, _, rain in pair_weather]), pair_col([snow for _, snow, _ in pair_weather])
+    )
+    try:
+        efficiency_kml = predict_mpg(features) * MPG_TO_KML
+    except Exception as e:
+        logger.error(f"Error during OD matrix prediction: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "Failed to get prediction from model."}), 500
+    distance_km = np.zeros((n_depots, n_depots))
+    fuel_price = np.zeros(n_depots)
+    for (o, d), lane in zip(pairs, pair_lanes):
+        distance_km[nigerian_depots.index(o), nigerian_depots.index(d)] = lane["total_km"]
+    for i, depot in enumerate(nigerian_depots): fuel_price[i] = get_diesel_price_ng(depot)
+    pair_origin = np.asarray([nigerian_depots.index(o) for o, _ in pairs])
+    pair_dest = np.asarray([nigerian_depots.index(d) for _, d in pairs])
+    row_costs = calculate_fuel_costs(
+        distance_km[pair_origin, pair_dest][pair_idx], efficiency_kml, fuel_price[pair_origin][pair_idx]
+    )["total_final_cost"]
+    # cost[origin, destination, vehicle, pallet load]; a depot cannot serve its own orders (no local-delivery
+    # lane to cost), so the diagonal is infinite rather than a free 0 km trip
+    cost = np.full((n_depots, n_depots, len(vehicles), len(pallet_values)), np.inf)
+    cost[pair_origin[pair_idx], pair_dest[pair_idx], vehicle_idx, pallet_idx] = row_costs
+
+    # --- Assignment ---
+    if not fleet:
+        # Unconstrained fleet: every order independently takes its cheapest (depot, vehicle)
+        order_costs = cost[:, order_dest, :, order_pallet_idx] # (orders, depots, vehicles)
+        flat_best = order_costs.reshape(len(orders), -1).argmin(axis=1)
+        assigned_depot, assigned_vehicle = np.unravel_index(flat_best, (n_depots, len(vehicles)))
+    else:
+        slots = [(nigerian_depots.index(depot), vehicles.index(v), int(count))
+                 for depot, depot_fleet in fleet.items() for v, count in depot_fleet.items() if int(count) > 0]
+        if len(orders) > sum(count for _, _, count in slots):
+            return jsonify({"success": False, "error": "Not enough vehicles in fleet for all orders."}), 400
+        fleet_depots = {depot for depot, _, _ in slots}
+        unassignable = [oid for oid, d in zip(order_ids, order_dest) if not fleet_depots - {d}]
+        if unassignable:
+            return jsonify({"success": False, "error": "Orders can only be served from another depot, and the fleet has none there.",
+                            "unassignable": unassignable}), 400
+        try:
+            assigned = _solve_capacitated_assignment(cost, order_dest, order_pallet_idx, slots)
+        except UnassignableOrders as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if assigned is None:
+            return jsonify({"success": False, "error": "Assignment solver failed."}), 500
+        assigned_depot, assigned_vehicle = assigned
+    order_cost = cost[assigned_depot, order_dest, assigned_vehicle, order_pallet_idx]
+    solve_ms = (time.perf_counter() - started) * 1000.0
+    note(orders=len(orders), solve_ms=round(solve_ms, 1), model_rows=len(features))
+
+    return jsonify({
+        "success": True,
+        "assignments": [
+            {"id": oid, "origin": nigerian_depots[o], "destination": nigerian_depots[d], "vehicle": vehicles[v],
+             "pallets": float(p), "distance": round(float(distance_km[o, d]), 2), "total_final_cost": round(float(c), 2)}
+            for oid, o, d, v, p, c in zip(order_ids, assigned_depot, order_dest, assigned_vehicle, order_pallets, order_cost)
+        ],
+        "total_cost": round(float(order_cost.sum()), 2),
+        "od_matrix": {"depots": nigerian_depots, "distance_km": np.round(distance_km, 2).tolist()},
+        "degraded": sorted({item for lane in pair_lanes for item in lane.get("degraded", [])}),
+        "solve_ms": round(solve_ms, 2),
+    })
+
+
+class UnassignableOrders(Exception):
+    """Raised when the fleet's slots cannot serve every order from a depot other than its destination."""
+
+
+def _solve_capacitated_assignment(cost: np.ndarray, order_dest: np.ndarray, order_pallet_idx: np.ndarray,
+                                  slots: List[Tuple[int, int, int]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Min-cost assignment of orders to limited (depot, vehicle, count) slots.
+    Identical orders (same destination and load) and identical vehicles are grouped, which turns the
+    assignment into a small transportation problem; it is totally unimodular, so the simplex vertex
+    solution is integral and equals the optimal one-order-per-vehicle assignment.
+    Raises UnassignableOrders when no assignment avoids same-depot slots; returns None if the solver fails.
+    """
+    groups, group_of_order, group_size = np.unique(
+        np.column_stack([order_dest, order_pallet_idx]), axis=0, return_inverse=True, return_counts=True
+    )
+    group_of_order = group_of_order.ravel()
+    n_groups, n_slots = len(groups), len(slots)
+    slot_depot = np.asarray([s[0] for s in slots])
+    slot_vehicle = np.asarray([s[1] for s in slots])
+    slot_capacity = np.asarray([s[2] for s in slots], dtype=float)
+    # c[g, s] = cost of serving one order of group g from slot s; infinite (own depot) cells are held at zero flow
+    c = cost[slot_depot[None, :], groups[:, 0][:, None], slot_vehicle[None, :], groups[:, 1][:, None]]
+    allowed = np.isfinite(c).ravel()
+    c = np.where(np.isfinite(c), c, 0.0)
+
+    # x[g, s] flattened row-major; each group fully served, each slot within capacity
+    a_eq = sparse.kron(sparse.eye(n_groups), np.ones((1, n_slots)), format='csr')
+    a_ub = sparse.kron(np.ones((1, n_groups)), sparse.eye(n_slots), format='csr')
+    result = linprog(c.ravel(), A_ub=a_ub, b_ub=slot_capacity, A_eq=a_eq, b_eq=group_size.astype(float),
+                     bounds=[(0, None) if ok else (0, 0) for ok in allowed], method='highs-ds')
+    if result.status == 2:
+        raise UnassignableOrders("The fleet cannot cover every order without serving a depot from itself.")
+    if not result.success:
+        logger.error(f"Assignment LP failed: {result.message}")
+        return None
+    flow = np.rint(result.x).astype(int).reshape(n_groups, n_slots)
+
+    # Hand out each group's slot quota to its orders
+    assigned_depot = np.empty(len(order_dest), dtype=int)
+    assigned_vehicle = np.empty(len(order_dest), dtype=int)
+    order_indices = np.argsort(group_of_order, kind='stable')
+    group_starts = np.concatenate([[0], np.cumsum(group_size)[:-1]])
+    for g in range(n_groups):
+        members = order_indices[group_starts[g]:group_starts[g] + group_size[g]]
+        slot_for_member = np.repeat(np.arange(n_slots), flow[g])
+        assigned_depot[members] = slot_depot[slot_for_member]
+        assigned_vehicle[members] = slot_vehicle[slot_for_member]
+    return assigned_depot, assigned_vehicle
@@ -0,0 +1,160 @@
+# backend/prewarm.py
+# Background pre-warmer: before and through the morning dispatch peak, refreshes route geometry (with geocodes and
+# fuel stations), traffic snapshots and forecasts for every depot lane, so early requests are served from cache.
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+from itertools import permutations
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from config import Config
+from cache import TTLCache
+from rate_limit import limiter, background_work
+from diesel_api import (
+    nigerian_depots, lane_cache, forecast_cache, traffic_cache, refresh_lane_context, RouteContextError
+)
+
+try:
+    import fcntl # Cross-process leader lock (POSIX)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+# Providers a lane refresh calls; a run stops early once any of them has used PREWARM_MAX_QUOTA_SHARE of its daily quota
+PREWARM_PROVIDERS = ("here", "weather", "mapbox", "geocode")
+
+# Last run summary, shared so any worker can report it
+_status_cache = TTLCache("prewarm_status", 7 * 24 * 3600)
+
+
+def all_lanes() -> List[Tuple[str, str]]:
+    return list(permutations(nigerian_depots, 2))
+
+
+class LanePrewarmer:
+    """
+    One daemon thread per worker; only the worker holding the lock file runs refreshes (the others keep
+    retrying, so the role moves if that worker exits). Runs every interval_seconds while the local hour
+    (Config.PREWARM_TIMEZONE) is in [start_hour, end_hour). All upstream calls run at low priority.
+    """
+
+    def __init__(self, lanes: List[Tuple[str, str]], interval_seconds: float, start_hour: int, end_hour: int,
+                 lock_path: str, lane_pause_seconds: float = 1.0, max_quota_share: float = 0.8):
+        self.lanes = lanes
+        self.interval_seconds = interval_seconds
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.lock_path = lock_path
+        self.lane_pause_seconds = lane_pause_seconds
+        self.max_quota_share = max_quota_share
+        self.timezone = ZoneInfo(Config.PREWARM_TIMEZONE)
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=self._loop, name="lane-prewarmer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        hour = (now or datetime.now(self.timezone)).hour
+        return self.start_hour <= hour < self.end_hour
+
+    def _is_leader(self) -> bool:
+        if self._lock_file is not None: return True
+        if fcntl is None: return True # No cross-process lock available: every worker warms
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file # Held for the life of the process
+        logger.info(f"Pre-warmer leader is pid {os.getpid()}.")
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.in_window() and self._is_leader(): self.run_once()
+            except Exception as e:
+                logger.error(f"Pre-warm run failed: {e}", exc_info=True)
+            self._stop.wait(self.interval_seconds)
+
+    def _quota_exhausted(self) -> Optional[str]:
+        if limiter is None: return None
+        usage = limiter.usage()
+        for provider in PREWARM_PROVIDERS:
+            share = usage.get(provider, {}).get("quota_used")
+            if share is not None and share >= self.max_quota_share: return provider
+        return None
+
+    def run_once(self) -> dict:
+        started = time.time()
+        summary = {"started_at": started, "lanes": len(self.lanes), "refreshed": 0, "up_to_date": 0, "failed": 0,
+                   "stopped_for_quota": None}
+        # Refresh anything that would expire before the next run
+        min_remaining = self.interval_seconds * 1.5
+        with background_work():
+            for origin, destination in self.lanes:
+                if self._stop.is_set(): break
+                exhausted = self._quota_exhausted()
+                if exhausted:
+                    logger.warning(f"Pre-warm stopped: '{exhausted}' is past {self.max_quota_share:.0%} of its daily quota.")
+                    summary["stopped_for_quota"] = exhausted
+                    break
+                try:
+                    refreshed = refresh_lane_context(origin, destination, min_remaining)
+                    summary["refreshed" if refreshed else "up_to_date"] += 1
+                except (RouteContextError, KeyError, TypeError) as e:
+                    summary["failed"] += 1
+                    logger.warning(f"Pre-warm failed for {origin} -> {destination}: {e}")
+                self._stop.wait(self.lane_pause_seconds) # Spread calls out instead of bursting the buckets
+        summary["finished_at"] = time.time()
+        _status_cache.set("last_run", summary)
+        logger.info(f"Pre-warm run: {summary['refreshed']} refreshed, {summary['up_to_date']} up to date, "
+                    f"{summary['failed']} failed in {summary['finished_at'] - started:.1f}s.")
+        return summary
+
+
+def _seconds(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def lane_freshness() -> dict:
+    """Per lane: seconds until the cached route and forecast expire (negative = stale) and traffic snapshot age."""
+    traffic_ages = traffic_cache.stats()["snapshot_age_seconds"]
+    lanes = {}
+    for origin, destination in all_lanes():
+        key = (origin, destination)
+        lanes[f"{origin} -> {destination}"] = {
+            "route_expires_in": _seconds(lane_cache.ttl_remaining(key)),
+            "forecast_expires_in": _seconds(forecast_cache.ttl_remaining(key)),
+            "traffic_age": traffic_ages.get(f"{origin} -> {destination}"),
+        }
+    warm = sum(1 for lane in lanes.values() if (lane["route_expires_in"] or -1) > 0 and (lane["forecast_expires_in"] or -1) > 0)
+    return {"lanes": lanes, "warm_lanes": warm, "total_lanes": len(lanes), "last_run": _status_cache.get("last_run")}
+
+
+prewarmer: Optional[LanePrewarmer] = None
+
+def start_prewarmer() -> Optional[LanePrewarmer]:
+    """Starts the scheduler thread in this worker if PREWARM_ENABLED."""
+    global prewarmer
+    if not Config.PREWARM_ENABLED or prewarmer is not None: return prewarmer
+    prewarmer = LanePrewarmer(
+        all_lanes(), Config.PREWARM_INTERVAL_SECONDS, Config.PREWARM_START_HOUR, Config.PREWARM_END_HOUR,
+        Config.PREWARM_LOCK_PATH, Config.PREWARM_LANE_PAUSE_SECONDS, Config.PREWARM_MAX_QUOTA_SHARE,
+    )
+    prewarmer.start()
+    return prewarmer
@@ -0,0 +1,188 @@
+# backend/profiler.py
+# Single-request profiles on demand: cProfile (every call, exact counts, slower) or a stack sampler (the request
+# thread's stack every few ms, near-free) wrapped around one request, and a bounded ring of the results on disk.
+# Nothing here runs unless a request is picked for profiling.
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+import logging
+from collections import Counter
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+MODES = ("cprofile", "sample")
+EXTENSIONS = {"cprofile": ".prof", "sample": ".folded"}
+
+# cProfile/setprofile allow one active profiler at a time; overlapping requests are simply not profiled
+_active = threading.Lock()
+
+
+class CallProfiler:
+    """cProfile around the calling thread. Output: a pstats file (snakeviz, `python -m pstats`)."""
+    mode = "cprofile"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def dump(self, path: str) -> None:
+        self._profile.dump_stats(path)
+
+    def summary(self, limit: int = 15) -> List[dict]:
+        stats = pstats.Stats(self._profile).stats # (file, line, function) -> (calls, primitive, own s, cumulative s, callers)
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [{"function": f"{os.path.basename(file)}:{line}({function})", "calls": calls,
+                 "own_ms": round(own * 1000, 2), "cumulative_ms": round(cumulative * 1000, 2)}
+                for (file, line, function), (_, calls, own, cumulative, _) in top]
+
+
+class StackSampler:
+    """
+    Samples the target thread's stack every interval_seconds from a helper thread. Output: folded stacks
+    ("outer;inner count" per line) for flamegraph.pl or speedscope. Costs the request nothing but the GIL hand-offs.
+    """
+    mode = "sample"
+
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval_seconds = interval_seconds
+        self.samples = Counter()
+        self.elapsed_seconds = 0.0
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed_seconds = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack: self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common(): f.write(f"{stack} {count}\n")
+
+    def summary(self, limit: int = 15) -> List[dict]:
+        """Functions by the share of samples they appear in (inclusive) and sit on top of (own)."""
+        total = sum(self.samples.values()) or 1
+        ms_per_sample = self.elapsed_seconds * 1000 / total # Wake-ups run late under load; scale by real time
+        inclusive, own = Counter(), Counter()
+        for stack, count in self.samples.items():
+            frames = [frame.rsplit(":", 1)[0] for frame in stack.split(";")]
+            for frame in set(frames): inclusive[frame] += count
+            own[frames[-1]] += count
+        return [{"function": frame, "samples": count, "cumulative_ms": round(count * ms_per_sample, 1),
+                 "own_ms": round(own[frame] * ms_per_sample, 1), "share": round(count / total, 3)}
+                for frame, count in inclusive.most_common(limit)]
+
+
+def start_profile(mode: str, sample_interval_seconds: float = 0.005):
+    """Starts a profiler on the calling thread, or returns None if another request is already being profiled."""
+    if not _active.acquire(blocking=False): return None
+    try:
+        profiler = CallProfiler() if mode == "cprofile" else StackSampler(sample_interval_seconds)
+        profiler.start()
+    except Exception:
+        _active.release()
+        raise
+    return profiler
+
+
+def stop_profile(profiler) -> None:
+    try:
+        profiler.stop()
+    finally:
+        _active.release()
+
+
+class ProfileRing:
+    """
+    The last max_profiles profiles in one directory: <id><ext> holds the trace, <id>.json its metadata.
+    Ids start with the time, so a directory listing is oldest-first; writing past the limit drops the oldest.
+    Files are written under a temp name and renamed, so every worker can share the directory.
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        return os.path.join(self.directory, profile_id + ext)
+
+    def save(self, profiler, meta: dict) -> str:
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        ext = EXTENSIONS[profiler.mode]
+        profiler.dump(self._path(profile_id, ext) + ".tmp")
+        os.replace(self._path(profile_id, ext) + ".tmp", self._path(profile_id, ext))
+        meta = {"id": profile_id, "mode": profiler.mode, "file": profile_id + ext, **meta, "top": profiler.summary()}
+        with open(self._path(profile_id, ".json.tmp"), "w") as f: json.dump(meta, f)
+        os.replace(self._path(profile_id, ".json.tmp"), self._path(profile_id, ".json"))
+        self._trim()
+        return profile_id
+
+    def _ids(self) -> List[str]:
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def _trim(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_profiles)]:
+            for ext in (".json", *EXTENSIONS.values()):
+                try:
+                    os.remove(self._path(profile_id, ext))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        if os.path.basename(profile_id) != profile_id or profile_id.startswith("."): return None
+        try:
+            with open(self._path(profile_id, ".json")) as f: return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None # Trimmed (or being written) meanwhile
+
+    def list(self) -> List[dict]:
+        """Newest first, without the per-function summaries."""
+        profiles = (self.get(profile_id) for profile_id in reversed(self._ids()))
+        return [{k: v for k, v in meta.items() if k != "top"} for meta in profiles if meta is not None]
+
+    def trace_path(self, profile_id: str) -> Optional[str]:
+        meta = self.get(profile_id)
+        if meta is None: return None
+        path = os.path.join(self.directory, meta["file"])
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def as_text(path: str, limit: int = 60) -> str:
+        """Readable report of a stored trace: pstats sorted by cumulative time, or the folded stacks as they are."""
+        if not path.endswith(EXTENSIONS["cprofile"]):
+            with open(path) as f: return f.read()
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,114 @@
+# backend/profiling_api.py
+# Opt-in profiling of single requests, and admin endpoints to list and download the stored profiles.
+# A request is profiled when an admin sends "X-Profile: cprofile" (or "sample", or "1" for PROFILE_MODE), or when it
+# is picked at PROFILE_SAMPLE_RATE. With no header and a zero rate the hooks cost one header lookup.
+
+from flask import Blueprint, Response, g, request, session, jsonify, send_file
+import random
+import time
+import logging
+from config import Config
+from profiler import ProfileRing, MODES, start_profile, stop_profile
+from auth_api import check_admin
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+profiling_api_bp = Blueprint('profiling_api', __name__)
+
+PROFILE_HEADER = "X-Profile"
+
+profile_ring = None
+if Config.PROFILE_ENABLED:
+    try:
+        profile_ring = ProfileRing(Config.PROFILE_DIR, Config.PROFILE_RING_SIZE)
+    except OSError as e:
+        logger.error(f"Profile directory {Config.PROFILE_DIR} unavailable: {e}; request profiling is off.")
+
+
+def _requested_mode():
+    """Profiling mode for this request, or None. Only admins may ask by header; sampling covers /api/ only."""
+    header = request.headers.get(PROFILE_HEADER)
+    if header:
+        if session.get('role') != 'admin': return None
+        return header if header in MODES else Config.PROFILE_MODE
+    if Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE:
+        if request.path.startswith('/api/') and not request.path.startswith('/api/admin/profiles'):
+            return Config.PROFILE_MODE
+    return None
+
+
+@profiling_api_bp.before_app_request
+def start_request_profile():
+    if profile_ring is None: return
+    mode = _requested_mode()
+    if mode is None: return
+    profiler = start_profile(mode, Config.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    if profiler is None:
+        logger.info(f"Not profiling {request.path}: another request is being profiled in this worker.")
+        return
+    g.profile = (profiler, time.time(), time.perf_counter())
+
+
+def _finish_request_profile(status):
+    profiler, started_at, started = g.pop('profile')
+    stop_profile(profiler)
+    meta = {"method": request.method, "path": request.path, "query": request.query_string.decode(errors="replace"),
+            "status": status, "started_at": started_at, "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "trigger": "header" if request.headers.get(PROFILE_HEADER) else "sampled"}
+    if request.mimetype in ("application/x-www-form-urlencoded", "multipart/form-data"):
+        # Route requests: say which lane it was
+        meta["lane"] = [request.form.get('originDepot'), request.form.get('destinationDepot')]
+    try:
+        profile_id = profile_ring.save(profiler, meta)
+    except OSError as e:
+        logger.error(f"Could not save profile of {request.path}: {e}")
+        return None
+    logger.info(f"Profiled {request.method} {request.path} ({profiler.mode}, {meta['duration_ms']} ms) as {profile_id}")
+    return profile_id
+
+
+@profiling_api_bp.after_app_request
+def finish_request_profile(response):
+    if 'profile' not in g: return response
+    profile_id = _finish_request_profile(response.status_code)
+    if profile_id: response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@profiling_api_bp.teardown_app_request
+def drop_request_profile(error):
+    # after_request is skipped when the request dies with an unhandled error; still release the profiler
+    if 'profile' in g: _finish_request_profile(500)
+
+
+@profiling_api_bp.route('/api/admin/profiles', methods=['GET'])
+def list_profiles_api():
+    is_admin, response, status_code = check_admin()
+    if not is_admin:
+        return response, status_code
+    if profile_ring is None:
+        return jsonify({"success": False, "error": "Request profiling is disabled."}), 503
+    return jsonify({"success": True, "profiles": profile_ring.list(), "max_profiles": profile_ring.max_profiles,
+                    "mode": Config.PROFILE_MODE, "sample_rate": Config.PROFILE_SAMPLE_RATE})
+
+
+@profiling_api_bp.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile_api(profile_id):
+    """Metadata and top functions; ?format=raw downloads the trace file, ?format=text a readable report."""
+    is_admin, response, status_code = check_admin()
+    if not is_admin:
+        return response, status_code
+    if profile_ring is None:
+        return jsonify({"success": False, "error": "Request profiling is disabled."}), 503
+    meta = profile_ring.get(profile_id)
+    path = profile_ring.trace_path(profile_id) if meta is not None else None
+    if path is None:
+        return jsonify({"success": False, "error": "Unknown or expired profile."}), 404
+    output = request.args.get('format', 'json')
+    if output == 'raw':
+        return send_file(path, as_attachment=True, download_name=meta["file"], mimetype="application/octet-stream")
+    if output == 'text':
+        return Response(profile_ring.as_text(path), mimetype="text/plain")
+    return jsonify({"success": True, "profile": meta})
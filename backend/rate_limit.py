@@ -0,0 +1,172 @@
+# backend/rate_limit.py
+# Per-provider token buckets and daily quota counters, shared by all worker processes on the node
+# through a small SQLite (WAL) file.
+
+import contextvars
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional
+import requests
+from config import Config
+import deadline
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low" # Sheddable work, e.g. weather points beyond the minimum
+
+_background = contextvars.ContextVar("background_work", default=None) # None, or whether calls may queue
+
+
+@contextmanager
+def background_work(may_queue: bool = True):
+    """
+    Upstream calls made inside the block run at low priority. By default they may queue for a token
+    (pre-warming, refreshes); with may_queue=False they are shed instead, for work a live request may end up
+    waiting on (a prefetch holding a single-flight cache key).
+    """
+    token = _background.set(may_queue)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+class RateLimited(requests.exceptions.RequestException):
+    """Raised instead of calling a provider when its bucket or daily quota has no room for this call."""
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per provider (rate tokens/s, burst capacity) plus a daily call quota.
+    Normal-priority calls wait for a token (up to max_wait_seconds, cut to the request deadline);
+    low-priority calls never wait and are shed while the bucket is below low_priority_reserve of capacity,
+    so they cannot use up the tokens normal traffic needs.
+    """
+
+    def __init__(self, db_path: str, limits: Dict[str, tuple], max_wait_seconds: float = 2.0,
+                 low_priority_reserve: float = 0.2):
+        self.db_path = db_path
+        self.limits = limits # provider -> (rate_per_second, burst, daily_quota)
+        self.max_wait_seconds = max_wait_seconds
+        self.low_priority_reserve = low_priority_reserve
+        self._local = threading.local()
+        self.shed = {provider: 0 for provider in limits}
+        self._init_db()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (provider TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS usage (provider TEXT NOT NULL, day TEXT NOT NULL, calls INTEGER NOT NULL DEFAULT 0, "
+                     "shed INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (provider, day))")
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _try_take(self, provider: str, priority: str) -> float:
+        """Takes one token if allowed. Returns 0.0 on success, else seconds until a token would be available (inf = quota spent)."""
+        rate, burst, daily_quota = self.limits[provider]
+        now = time.time()
+        day = self._today()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE provider = ?", (provider,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            used = conn.execute("SELECT calls FROM usage WHERE provider = ? AND day = ?", (provider, day)).fetchone()
+            if daily_quota and used and used[0] >= daily_quota:
+                wait = float("inf")
+            else:
+                needed = 1.0 + (self.low_priority_reserve * burst if priority == PRIORITY_LOW else 0.0)
+                wait = 0.0 if tokens >= needed else (needed - tokens) / rate
+            if wait == 0.0:
+                tokens -= 1.0
+                conn.execute("INSERT INTO usage (provider, day, calls) VALUES (?, ?, 1) "
+                             "ON CONFLICT(provider, day) DO UPDATE SET calls = calls + 1", (provider, day))
+            conn.execute("INSERT INTO buckets (provider, tokens, updated) VALUES (?, ?, ?) "
+                         "ON CONFLICT(provider) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                         (provider, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, provider: str, priority: str = PRIORITY_NORMAL) -> None:
+        """Blocks until a token is taken; raises RateLimited if the call is shed or would wait too long."""
+        if provider not in self.limits: return
+        background = _background.get()
+        if background is not None: priority = PRIORITY_LOW
+        waited = 0.0
+        while True:
+            wait = self._try_take(provider, priority)
+            if wait == 0.0: return
+            budget = self.max_wait_seconds - waited
+            left = deadline.remaining()
+            if left is not None: budget = min(budget, left - Config.DEADLINE_MIN_CALL_SECONDS)
+            # Request-path low-priority work is shed at once; background work may queue (still above the reserve) unless may_queue=False
+            if (priority == PRIORITY_LOW and not background) or wait > budget:
+                self._record_shed(provider)
+                reason = "daily quota reached" if wait == float("inf") else f"rate limit ({priority} priority)"
+                raise RateLimited(f"{provider}: {reason}")
+            time.sleep(wait)
+            waited += wait
+
+    def _record_shed(self, provider: str) -> None:
+        self.shed[provider] = self.shed.get(provider, 0) + 1
+        try:
+            self._conn().execute("INSERT INTO usage (provider, day, shed) VALUES (?, ?, 1) "
+                                 "ON CONFLICT(provider, day) DO UPDATE SET shed = shed + 1", (provider, self._today()))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record shed call for {provider}: {e}")
+
+    def usage(self, days: int = 1) -> dict:
+        """Quota consumption per provider for the last `days` days (UTC), across all workers."""
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        rows = self._conn().execute(
+            "SELECT provider, day, calls, shed FROM usage WHERE day >= ? ORDER BY day DESC", (since,)
+        ).fetchall()
+        today = self._today()
+        result = {}
+        for provider, (rate, burst, daily_quota) in self.limits.items():
+            history = [{"day": day, "calls": calls, "shed": shed} for p, day, calls, shed in rows if p == provider]
+            calls_today = next((h["calls"] for h in history if h["day"] == today), 0)
+            result[provider] = {
+                "rate_per_second": rate, "burst": burst, "daily_quota": daily_quota,
+                "calls_today": calls_today,
+                "quota_used": round(calls_today / daily_quota, 4) if daily_quota else None,
+                "history": history,
+            }
+        return result
+
+
+def _parse_limits() -> Dict[str, tuple]:
+    limits = {}
+    for provider, spec in Config.RATE_LIMITS.items():
+        rate, burst, daily_quota = (float(x) for x in spec.split(","))
+        limits[provider] = (rate, burst, int(daily_quota))
+    return limits
+
+limiter: Optional[TokenBucketLimiter] = None
+if Config.RATE_LIMIT_ENABLED:
+    try:
+        limiter = TokenBucketLimiter(Config.RATE_LIMIT_DB_PATH, _parse_limits(), Config.RATE_LIMIT_MAX_WAIT_SECONDS,
+                                     Config.RATE_LIMIT_LOW_PRIORITY_RESERVE)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Rate limiter disabled - could not initialise {Config.RATE_LIMIT_DB_PATH}: {e}")
@@ -0,0 +1,180 @@
+# backend/route_store.py
+# On-disk store for full route polylines: packed (lat, lon) pairs in one append-only file per generation,
+# an offset index per lane in SQLite, and reads served as zero-copy NumPy views over an mmap of the file.
+# Pages are shared through the OS page cache, so worker memory stays flat as the number of lanes grows.
+
+import ast
+import os
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+import numpy as np
+from config import Config
+
+try:
+    import fcntl # Cross-process writer lock (POSIX)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+EMPTY_ROUTE = np.empty((0, 2), dtype=np.float32)
+EMPTY_ROUTE.setflags(write=False)
+
+
+class RouteGeometryStore:
+    """
+    put(lane, points) appends the points (unless identical to what is stored) and points the lane's index
+    row at them; get(lane) returns a read-only (n, 2) view into the memory-mapped file. set_version(lane, v)
+    records the version of what else is shown with the route (its fuel stations), so readers can tell a lane
+    changed from the index alone.
+    Replaced routes leave dead points behind; once they outweigh the live ones (and the file is larger
+    than compact_min_bytes) the live routes are copied into a new generation file.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float32", compact_min_bytes: int = 16 * 1024 * 1024):
+        self.directory = directory
+        self.compact_min_bytes = compact_min_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._maps_lock = threading.Lock()
+        self._maps: Dict[int, np.memmap] = {} # generation -> current mapping
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS routes (lane TEXT PRIMARY KEY, generation INTEGER NOT NULL, "
+                     "offset INTEGER NOT NULL, count INTEGER NOT NULL, stored_at REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS versions (lane TEXT PRIMARY KEY, version TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', '0'), ('dtype', ?), ('dead_points', '0')", (dtype,))
+        # The dtype is fixed when the store is created; a changed setting applies to new stores only
+        self.dtype = np.dtype(self._meta("dtype"))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key: str) -> str:
+        return self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _data_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"coords.{generation}.bin")
+
+    @contextmanager
+    def _writer_lock(self):
+        with self._write_lock, open(os.path.join(self.directory, "write.lock"), "a") as lock_file:
+            if fcntl is not None: fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None: fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _lane(lane: Hashable) -> str:
+        return repr(lane)
+
+    def _view(self, generation: int, offset: int, count: int) -> np.ndarray:
+        end = (offset + count) * 2
+        mapped = self._maps.get(generation)
+        if mapped is None or mapped.shape[0] < end:
+            # File grew since it was mapped (or is new to this process): map its current length
+            path = self._data_path(generation)
+            mapped = np.memmap(path, dtype=self.dtype, mode="r", shape=(os.path.getsize(path) // self.dtype.itemsize,))
+            with self._maps_lock:
+                for old_generation in [g for g in self._maps if g != generation]: del self._maps[old_generation]
+                self._maps[generation] = mapped
+        return mapped[offset * 2:end].reshape(count, 2)
+
+    def get(self, lane: Hashable) -> Optional[np.ndarray]:
+        """Read-only (n, 2) [lat, lon] view of the lane's route, or None if not stored."""
+        for _ in range(2):
+            row = self._conn().execute("SELECT generation, offset, count FROM routes WHERE lane = ?", (self._lane(lane),)).fetchone()
+            if row is None: return None
+            try:
+                return self._view(*row)
+            except FileNotFoundError:
+                continue # Compacted between the lookup and the open - look up again
+        return None
+
+    def lanes(self) -> Dict[Hashable, float]:
+        """Every stored lane -> the time its current route was stored (changes only when the route does)."""
+        rows = self._conn().execute("SELECT lane, stored_at FROM routes").fetchall()
+        return {ast.literal_eval(lane): stored_at for lane, stored_at in rows}
+
+    def lane_versions(self) -> Dict[Hashable, Tuple[float, Optional[str]]]:
+        """Every stored lane -> (stored_at, version set with set_version() or None) in one index read."""
+        rows = self._conn().execute("SELECT r.lane, r.stored_at, v.version FROM routes r LEFT JOIN versions v ON v.lane = r.lane").fetchall()
+        return {ast.literal_eval(lane): (stored_at, version) for lane, stored_at, version in rows}
+
+    def set_version(self, lane: Hashable, version: str) -> None:
+        self._conn().execute("INSERT OR REPLACE INTO versions (lane, version) VALUES (?, ?)", (self._lane(lane), version))
+
+    def put(self, lane: Hashable, points: Sequence[Tuple[float, float]]) -> None:
+        packed = np.ascontiguousarray(points, dtype=self.dtype).reshape(-1, 2)
+        with self._writer_lock():
+            existing = self.get(lane)
+            if existing is not None and np.array_equal(existing, packed): return # Same route as before
+            conn = self._conn()
+            generation = int(self._meta("generation"))
+            with open(self._data_path(generation), "ab") as data_file:
+                offset = data_file.tell() // (2 * self.dtype.itemsize)
+                data_file.write(packed.tobytes())
+                data_file.flush()
+                os.fsync(data_file.fileno())
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO routes (lane, generation, offset, count, stored_at) VALUES (?, ?, ?, ?, ?)",
+                         (self._lane(lane), generation, offset, len(packed), time.time()))
+            if existing is not None:
+                conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = 'dead_points'", (len(existing),))
+            conn.execute("COMMIT")
+            self._maybe_compact(generation)
+
+    def _maybe_compact(self, generation: int) -> None:
+        conn = self._conn()
+        dead = int(self._meta("dead_points"))
+        live = conn.execute("SELECT COALESCE(SUM(count), 0) FROM routes").fetchone()[0]
+        if dead <= live or os.path.getsize(self._data_path(generation)) < self.compact_min_bytes: return
+        new_generation = generation + 1
+        rows = conn.execute("SELECT lane, offset, count FROM routes WHERE generation = ?", (generation,)).fetchall()
+        new_rows, offset = [], 0
+        with open(self._data_path(new_generation), "wb") as data_file:
+            for lane, old_offset, count in rows:
+                data_file.write(np.ascontiguousarray(self._view(generation, old_offset, count)).tobytes())
+                new_rows.append((new_generation, offset, lane))
+                offset += count
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("UPDATE routes SET generation = ?, offset = ? WHERE lane = ?", new_rows)
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (str(new_generation),))
+        conn.execute("UPDATE meta SET value = '0' WHERE key = 'dead_points'")
+        conn.execute("COMMIT")
+        # Existing mappings in other workers stay valid after unlink (POSIX); they re-map on their next lookup
+        os.remove(self._data_path(generation))
+        logger.info(f"Route store compacted to generation {new_generation}: {live} live points, {dead} dropped.")
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        lanes, points = conn.execute("SELECT COUNT(*), COALESCE(SUM(count), 0) FROM routes").fetchone()
+        generation = int(self._meta("generation"))
+        path = self._data_path(generation)
+        return {
+            "directory": self.directory, "dtype": self.dtype.name, "generation": generation, "lanes": lanes,
+            "live_points": points, "dead_points": int(self._meta("dead_points")),
+            "file_bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+        }
+
+
+route_store: Optional[RouteGeometryStore] = None
+try:
+    route_store = RouteGeometryStore(Config.ROUTE_STORE_DIR, Config.ROUTE_STORE_DTYPE)
+except (OSError, sqlite3.Error, TypeError) as e:
+    logger.error(f"Route geometry store unavailable ({Config.ROUTE_STORE_DIR}): {e}; routes stay inline in the lane cache.")
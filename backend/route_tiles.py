@@ -0,0 +1,177 @@
+# backend/route_tiles.py
+# Fleet route overlay as z/x/y tiles (Web Mercator, 256 px). Each lane's polyline is simplified once per zoom level
+# (Douglas-Peucker with a tolerance of about a pixel at that zoom) and then clipped to the tile, so a zoomed-out
+# map of every lane downloads a few hundred points instead of every full-resolution polyline.
+# Both steps are cached per lane, keyed by the time the lane's route was stored, so a re-routed lane never serves
+# old geometry and an unchanged one is never recomputed.
+
+import math
+import threading
+import logging
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from cache import TTLCache
+from serialization import round_coordinates
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.0511287798 # Web Mercator's square world
+
+
+# --- Projection ---
+def project(points: np.ndarray, zoom: int) -> np.ndarray:
+    """(n, 2) [lat, lon] -> (n, 2) float64 [x, y] world pixels at `zoom` (origin top-left)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    scale = TILE_SIZE * 2 ** zoom
+    lat = np.radians(np.clip(points[:, 0], -MAX_LATITUDE, MAX_LATITUDE))
+    x = (points[:, 1] + 180.0) / 360.0 * scale
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * scale
+    return np.column_stack((x, y))
+
+
+def pixel_to_latlon(x: float, y: float, zoom: int) -> Tuple[float, float]:
+    scale = TILE_SIZE * 2 ** zoom
+    lon = x / scale * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y / scale))))
+    return lat, lon
+
+
+def tile_latlon_bounds(zoom: int, x: int, y: int, buffer_px: float = 0.0) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of the tile, grown by buffer_px on every side."""
+    max_lat, min_lon = pixel_to_latlon(x * TILE_SIZE - buffer_px, y * TILE_SIZE - buffer_px, zoom)
+    min_lat, max_lon = pixel_to_latlon((x + 1) * TILE_SIZE + buffer_px, (y + 1) * TILE_SIZE + buffer_px, zoom)
+    return min_lat, min_lon, max_lat, max_lon
+
+
+# --- Geometry ---
+def simplify(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker over (n, 2) planar points; returns the indices of the points kept (first and last always)."""
+    n = len(xy)
+    if n <= 2: return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2: continue
+        a, inner = xy[start], xy[start + 1:end]
+        ab = xy[end] - a
+        length_sq = float(ab @ ab)
+        # Distance to the segment (not the infinite line), so routes that double back keep their shape
+        t = np.clip(((inner - a) @ ab) / length_sq, 0.0, 1.0) if length_sq > 0 else np.zeros(len(inner))
+        offsets = inner - (a + t[:, None] * ab)
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        i = int(distances.argmax())
+        if distances[i] > tolerance * tolerance:
+            i += start + 1
+            keep[i] = True
+            stack.append((start, i))
+            stack.append((i, end))
+    return np.flatnonzero(keep)
+
+
+def clip_runs(xy: np.ndarray, box: Tuple[float, float, float, float]) -> List[Tuple[int, int]]:
+    """
+    (first, last) point index pairs of the runs of consecutive segments whose bounding box touches
+    box = (min_x, min_y, max_x, max_y). The renderer clips exactly; this only decides what to send.
+    """
+    if len(xy) < 2: return []
+    start, end = xy[:-1], xy[1:]
+    low, high = np.minimum(start, end), np.maximum(start, end)
+    hit = (high[:, 0] >= box[0]) & (low[:, 0] <= box[2]) & (high[:, 1] >= box[1]) & (low[:, 1] <= box[3])
+    segments = np.flatnonzero(hit)
+    if not len(segments): return []
+    breaks = np.flatnonzero(np.diff(segments) > 1)
+    firsts = np.concatenate(([segments[0]], segments[breaks + 1]))
+    lasts = np.concatenate((segments[breaks], [segments[-1]])) + 1
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+# --- Tiler ---
+class RouteTiler:
+    """
+    tile(z, x, y) -> the parts of every stored lane's route (and its fuel stations, from station_min_zoom up)
+    that fall in the tile. Lanes and their station versions come from the route store index, so listing
+    them reads nothing else; stations_for(lane) supplies a lane's (station version, stations) when a piece is
+    built, and the version for lanes stored without one. A lane whose stations change without a re-route
+    gets a new version, and so new tiles.
+    Per-zoom simplified lines and per-tile pieces go through shared TTLCaches; each lane's bounding box is
+    memoized in-process so lanes nowhere near the tile cost one comparison.
+    """
+
+    def __init__(self, store, stations_for: Callable[[Hashable], Tuple[Optional[str], Sequence]], ttl_seconds: float,
+                 tolerance_px: float = 1.0, buffer_px: float = 8.0, station_min_zoom: int = 8, decimals: int = 5):
+        self.store = store
+        self.stations_for = stations_for
+        self.tolerance_px = tolerance_px
+        self.buffer_px = buffer_px
+        self.station_min_zoom = station_min_zoom
+        self.decimals = decimals
+        self.lines = TTLCache("route_tile_line", ttl_seconds) # (lane, stored_at, z) -> simplified line
+        self.pieces = TTLCache("route_tile", ttl_seconds)     # (lane, version, z, x, y) -> tile piece
+        self._bounds: Dict[Hashable, Tuple[tuple, tuple]] = {} # lane -> (version, lat/lon bbox incl. stations)
+        self._bounds_lock = threading.Lock()
+
+    def lanes(self, only: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, tuple]:
+        """Stored lanes -> (stored_at, station version): their version, optionally restricted to `only`."""
+        stored = self.store.lane_versions()
+        if only is not None: stored = {lane: stored[lane] for lane in only if lane in stored}
+        return {lane: (stored_at, station_version or self.stations_for(lane)[0])
+                for lane, (stored_at, station_version) in stored.items()}
+
+    def _stations(self, lane: Hashable) -> np.ndarray:
+        return np.asarray(self.stations_for(lane)[1] or [], dtype=np.float64).reshape(-1, 2)
+
+    def _lane_bounds(self, lane: Hashable, version: tuple) -> Optional[tuple]:
+        with self._bounds_lock:
+            memo = self._bounds.get(lane)
+        if memo is not None and memo[0] == version: return memo[1]
+        points = self.store.get(lane)
+        if points is None or not len(points): return None
+        every = np.concatenate((np.asarray(points, dtype=np.float64), self._stations(lane)))
+        bounds = (*every.min(axis=0).tolist(), *every.max(axis=0).tolist()) # min_lat, min_lon, max_lat, max_lon
+        with self._bounds_lock:
+            self._bounds[lane] = (version, bounds)
+        return bounds
+
+    def _line(self, lane: Hashable, stored_at: float, zoom: int) -> Optional[dict]:
+        def build():
+            points = self.store.get(lane)
+            if points is None: return None
+            xy = project(points, zoom)
+            kept = simplify(xy, self.tolerance_px)
+            return {"xy": xy[kept], "points": round_coordinates(np.asarray(points)[kept], self.decimals), "full_points": len(points)}
+        return self.lines.get_or_compute((lane, stored_at, zoom), build)
+
+    def _piece(self, lane: Hashable, version: tuple, zoom: int, x: int, y: int) -> Optional[dict]:
+        def build():
+            line = self._line(lane, version[0], zoom)
+            if line is None: return None
+            box = (x * TILE_SIZE - self.buffer_px, y * TILE_SIZE - self.buffer_px,
+                   (x + 1) * TILE_SIZE + self.buffer_px, (y + 1) * TILE_SIZE + self.buffer_px)
+            paths = [line["points"][first:last + 1] for first, last in clip_runs(line["xy"], box)]
+            stations = []
+            if zoom >= self.station_min_zoom:
+                stations = self._stations(lane)
+                if len(stations):
+                    sxy = project(stations, zoom)
+                    inside = (sxy[:, 0] >= box[0]) & (sxy[:, 0] <= box[2]) & (sxy[:, 1] >= box[1]) & (sxy[:, 1] <= box[3])
+                    stations = round_coordinates(stations[inside], self.decimals)
+            return {"paths": paths, "stations": stations}
+        return self.pieces.get_or_compute((lane, version, zoom, x, y), build)
+
+    def tile(self, zoom: int, x: int, y: int, lanes: Dict[Hashable, tuple]) -> List[dict]:
+        """[{"lane": (origin, destination), "paths": [(n, 2) arrays], "stations": (m, 2) array}] for lanes in the tile."""
+        min_lat, min_lon, max_lat, max_lon = tile_latlon_bounds(zoom, x, y, self.buffer_px)
+        features = []
+        for lane, version in lanes.items():
+            bounds = self._lane_bounds(lane, version)
+            if bounds is None or bounds[0] > max_lat or bounds[2] < min_lat or bounds[1] > max_lon or bounds[3] < min_lon:
+                continue
+            piece = self._piece(lane, version, zoom, x, y)
+            if piece is None or (not piece["paths"] and not len(piece["stations"])): continue
+            features.append({"lane": lane, **piece})
+        return features
@@ -0,0 +1,82 @@
+# backend/serialization.py
+# JSON responses for coordinate-heavy payloads: NumPy arrays are encoded directly (orjson when installed,
+# no per-point Python floats) and the body is brotli/gzip-compressed when the client accepts it.
+
+import gzip
+import json
+import logging
+from typing import Any, Optional
+import numpy as np
+from flask import Response, request
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+
+def round_coordinates(points, decimals: Optional[int] = None) -> np.ndarray:
+    """(n, 2) float64 [lat, lon] array rounded to Config.COORDINATE_DECIMALS (5 decimals ~ 1 m)."""
+    decimals = Config.COORDINATE_DECIMALS if decimals is None else decimals
+    return np.round(np.asarray(points, dtype=np.float64).reshape(-1, 2), decimals)
+
+
+def _default(obj: Any) -> Any:
+    # Stdlib path, and orjson's fallback for non-contiguous arrays
+    if isinstance(obj, np.ndarray): return obj.tolist()
+    if isinstance(obj, np.generic): return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Best Content-Encoding this server can produce that the client's Accept-Encoding allows (br > gzip)."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality("br") > 0: return "br"
+    if accepted.quality("gzip") > 0: return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br": return brotli.compress(body, quality=Config.BROTLI_QUALITY)
+    if encoding == "gzip": return gzip.compress(body, compresslevel=Config.GZIP_LEVEL)
+    return body
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Drop-in for jsonify() on large payloads: fast encoding plus negotiated compression."""
+    body = dumps(payload)
+    encoding = negotiate_encoding() if len(body) >= Config.COMPRESS_MIN_BYTES else None
+    response = Response(compress(body, encoding), status=status, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    if encoding: response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def encoded_etag(version: str, encoding: Optional[str]) -> str:
+    """Strong validator for one content coding of a representation; br, gzip and identity bodies must not share one."""
+    return f"{version}-{encoding or 'identity'}"
+
+
+def matching_etag(version: str) -> Optional[str]:
+    """
+    The request's If-None-Match tag for this version, or None. Bodies under COMPRESS_MIN_BYTES go out
+    uncompressed, so the client's tag may name the negotiated coding or identity.
+    """
+    for etag in (encoded_etag(version, negotiate_encoding()), encoded_etag(version, None)):
+        if etag in request.if_none_match: return etag
+    return None
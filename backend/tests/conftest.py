@@ -0,0 +1,167 @@
+# backend/tests/conftest.py
+# Test setup: every on-disk store points into a temp directory and caches are per process, set before any backend
+# module reads Config. The `upstream` fixture answers HERE/weather/geocoding calls with straight-line routes, so the
+# endpoints run end to end without the network.
+
+import collections
+import datetime
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import pytest
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.update({
+    "SECRET_KEY": "test-secret", "ADMIN_USERNAME": "admin@example.com", "ADMIN_PASSWORD": "admin-password",
+    "HERE_API_KEY": "test", "WEATHER_API_KEY": "test", "MAPBOX_TOKEN": "test",
+    "MODEL_PATH": os.path.join(BACKEND_DIR, "Fossil_model.pkl"), "MODEL_POLL_SECONDS": "0",
+    "DATABASE_PATH": os.path.join(TMP_DIR, "users.db"), "CACHE_BACKEND": "memory",
+    "CACHE_DB_PATH": os.path.join(TMP_DIR, "cache.db"), "RATE_LIMIT_ENABLED": "False",
+    "RATE_LIMIT_DB_PATH": os.path.join(TMP_DIR, "ratelimits.db"), "ROUTE_STORE_DIR": os.path.join(TMP_DIR, "route_store"),
+    "TRIP_LOG_ENABLED": "False", "TRIP_LOG_DIR": os.path.join(TMP_DIR, "trip_log"), "PREWARM_ENABLED": "False",
+    "PROFILE_DIR": os.path.join(TMP_DIR, "profiles"),
+})
+sys.path.insert(0, BACKEND_DIR)
+
+CITIES = {"Lagos": (6.45, 3.39), "Abuja": (9.07, 7.49), "Kano": (12.0, 8.52), "Ibadan": (7.38, 3.9),
+          "Port Harcourt": (4.81, 7.0), "Benin City": (6.33, 5.6), "Kaduna": (10.52, 7.44), "Enugu": (6.45, 7.5)}
+_POLYLINE_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+def _varint(value: int) -> str:
+    out = ""
+    while value > 0x1F:
+        out += _POLYLINE_CHARS[(value & 0x1F) | 0x20]
+        value >>= 5
+    return out + _POLYLINE_CHARS[value]
+
+
+def encode_flexible_polyline(points, precision: int = 5) -> str:
+    encoded, last_lat, last_lon = _varint(1) + _varint(precision), 0, 0
+    for lat, lon in points:
+        lat, lon = round(lat * 10 ** precision), round(lon * 10 ** precision)
+        for delta in (lat - last_lat, lon - last_lon):
+            delta <<= 1
+            encoded += _varint(~delta if delta < 0 else delta)
+        last_lat, last_lon = lat, lon
+    return encoded
+
+
+class FakeResponse:
+    def __init__(self, data, status_code: int = 200):
+        self._data = data
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self.headers = {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400: raise requests.exceptions.HTTPError(response=self)
+
+
+class FakeUpstream:
+    """requests.get stand-in: calls counts requests per service; delay_seconds slows every call; fail makes a service return 503."""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.delay_seconds = 0.0
+        self.fail = set()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        if self.delay_seconds: time.sleep(self.delay_seconds)
+        params = dict(params or {})
+        if "?" in url:
+            url, query = url.split("?", 1)
+            params.update(pair.split("=", 1) for pair in query.split("&"))
+        service = next((name for marker, name in (("geocode.maps.co", "geocode"), ("geocode.search.hereapi", "here_geocode"),
+                                                  ("router.hereapi", "here_route"), ("discover.search.hereapi", "here_discover"),
+                                                  ("api.mapbox.com", "mapbox"), ("weatherapi", "weather")) if marker in url), None)
+        assert service is not None, f"unexpected upstream call {url}"
+        self.calls[service] += 1
+        if service in self.fail: return FakeResponse({"error": "unavailable"}, 503)
+        return getattr(self, f"_{service}")(params)
+
+    def _geocode(self, params):
+        lat, lon = CITIES[params["q"].split(",")[0]]
+        return FakeResponse([{"lat": str(lat), "lon": str(lon), "importance": 1}])
+
+    def _here_geocode(self, params):
+        lat, lon = CITIES[params["q"].split(",")[0]]
+        return FakeResponse({"items": [{"position": {"lat": lat, "lng": lon}}]})
+
+    def _here_route(self, params):
+        start, end = (tuple(float(v) for v in params[key].split(",")) for key in ("origin", "destination"))
+        points = [(start[0] + (end[0] - start[0]) * i / 399, start[1] + (end[1] - start[1]) * i / 399) for i in range(400)]
+        km = sum(math.dist(points[i], points[i + 1]) for i in range(len(points) - 1)) * 111
+        section = {
+            "polyline": encode_flexible_polyline(points),
+            "summary": {"length": km * 1000, "duration": km * 50, "baseDuration": km * 45, "typicalDuration": km * 46},
+            "spans": [{"offset": 0, "functionalClass": 4, "length": 5000, "duration": 400},
+                      {"offset": 10, "functionalClass": 1, "length": km * 1000 - 10000, "duration": km * 45},
+                      {"offset": 390, "functionalClass": 5, "length": 5000, "duration": 400}],
+        }
+        return FakeResponse({"routes": [{"sections": [section]}]})
+
+    def _here_discover(self, params):
+        lat, lon = (float(v) for v in params["at"].split(","))
+        return FakeResponse({"items": [{"position": {"lat": lat + 0.01, "lng": lon}, "distance": 100}]})
+
+    def _mapbox(self, params):
+        if params.get("annotations"):
+            return FakeResponse({"routes": [{"geometry": {"coordinates": [[3.39, 6.45], [7.49, 9.07]]},
+                                             "duration": 30000, "duration_typical": 29000}]})
+        return FakeResponse({"routes": [{"legs": [{"steps": [{"maneuver": {}, "distance": 20000, "name": "Ikorodu Rd"},
+                                                             {"maneuver": {}, "distance": 600000, "name": "A2", "ref": "A2"}]}]}]})
+
+    def _weather(self, params):
+        today = datetime.date.today()
+        days = [{"date": (today + datetime.timedelta(days=i)).isoformat(),
+                 "day": {"avgtemp_c": 25 + i * 3, "totalsnow_cm": 0, "totalprecip_mm": 2 + 6 * i, "avgvis_km": 10}}
+                for i in range(4)]
+        return FakeResponse({"forecast": {"forecastday": days}})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake upstream APIs, with every cache emptied and every circuit closed so tests don't see each other's calls."""
+    import cache
+    import circuit_breaker
+    fake = FakeUpstream()
+    monkeypatch.setattr(requests, "get", fake.get)
+    monkeypatch.setattr(requests.Session, "get", lambda self, url, **kwargs: fake.get(url, **kwargs))
+    for ttl_cache in cache._caches: ttl_cache.invalidate()
+    for breaker in circuit_breaker.breakers.values():
+        breaker.state, breaker._probe_in_flight = circuit_breaker.CLOSED, False
+        breaker._calls.clear()
+    yield fake
+
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app, upstream):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    with client.session_transaction() as session:
+        session.update(logged_in=True, role="admin", email=os.environ["ADMIN_USERNAME"])
+    return client
+
+
+@pytest.fixture
+def journey_date():
+    return datetime.date.today().isoformat()
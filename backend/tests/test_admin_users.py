@@ -0,0 +1,59 @@
+# backend/tests/test_admin_users.py
+# Admin user list: trigger-maintained pending/approved counts, prefix search and keyset paging.
+
+import uuid
+import pytest
+
+USERS_URL = "/api/admin/users"
+
+
+@pytest.fixture
+def prefix():
+    return f"t{uuid.uuid4().hex[:8]}"
+
+
+def signup(client, email: str) -> None:
+    response = client.post("/api/auth/signup", data={"username": email.split("@")[0], "email": email, "password": "secret"})
+    assert response.status_code == 200
+
+
+def counts(client) -> dict:
+    return client.get(USERS_URL).get_json()["counts"]
+
+
+def test_admin_only(client):
+    assert client.get(USERS_URL).status_code == 403
+
+
+def test_counts_follow_signups_approvals_and_deletes(admin_client, prefix):
+    start = counts(admin_client)
+    emails = [f"{prefix}-{i}@example.com" for i in range(3)]
+    for email in emails: signup(admin_client, email)
+    assert counts(admin_client) == {"pending": start["pending"] + 3, "approved": start["approved"]}
+
+    approved = admin_client.post("/api/admin/users/approve", json={"emails": emails[:2] + emails[:1]}).get_json()
+    assert (approved["approved"], approved["skipped"]) == (2, 0)
+    assert counts(admin_client) == {"pending": start["pending"] + 1, "approved": start["approved"] + 2}
+
+    deleted = admin_client.post("/api/admin/users/delete", json={"emails": [emails[0], emails[2]]}).get_json()
+    assert deleted["deleted"] == 2
+    assert counts(admin_client) == {"pending": start["pending"], "approved": start["approved"] + 1}
+
+
+def test_search_matches_the_start_of_email_or_username_case_insensitively(admin_client, prefix):
+    for i in range(3): signup(admin_client, f"{prefix}-{i}@example.com")
+    signup(admin_client, f"other-{prefix}@example.com")
+
+    found = admin_client.get(f"{USERS_URL}?q={prefix.upper()}").get_json()["users"]
+    assert sorted(user["email"] for user in found) == [f"{prefix}-{i}@example.com" for i in range(3)]
+    assert admin_client.get(f"{USERS_URL}?q={prefix}_").get_json()["users"] == [] # LIKE wildcards are literal
+
+    first = admin_client.get(f"{USERS_URL}?q={prefix}&limit=2").get_json()
+    assert len(first["users"]) == 2 and first["nextCursor"] == first["users"][-1]["id"]
+    rest = admin_client.get(f"{USERS_URL}?q={prefix}&limit=2&after={first['nextCursor']}").get_json()
+    assert len(rest["users"]) == 1 and rest["nextCursor"] is None
+
+
+def test_bad_paging_parameters(admin_client):
+    assert admin_client.get(f"{USERS_URL}?status=banned").status_code == 400
+    assert admin_client.get(f"{USERS_URL}?limit=0").status_code == 400
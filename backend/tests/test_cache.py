@@ -0,0 +1,82 @@
+# backend/tests/test_cache.py
+# TTLCache over both backends: expiry, stale reads, single-flight computation and what is not stored.
+
+import threading
+import time
+import pytest
+from cache import TTLCache, MemoryBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(ttl_seconds=60.0):
+        backend = MemoryBackend(1 << 20) if request.param == "memory" else SQLiteBackend(str(tmp_path / "cache.db"), "test", 1 << 20)
+        return TTLCache("test", ttl_seconds, backend)
+    return make
+
+
+def test_entries_expire_but_stay_readable_as_stale(make_cache):
+    cache = make_cache(ttl_seconds=0.05)
+    cache.set(("Lagos", "Abuja"), {"km": 540})
+    assert cache.get(("Lagos", "Abuja")) == {"km": 540}
+    assert ("Lagos", "Abuja") in cache
+    time.sleep(0.06)
+    assert cache.get(("Lagos", "Abuja")) is None
+    assert ("Lagos", "Abuja") not in cache
+    assert cache.get_stale(("Lagos", "Abuja")) == {"km": 540}
+    assert cache.ttl_remaining(("Lagos", "Abuja")) < 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_per_entry_ttl_and_invalidate(make_cache):
+    cache = make_cache(ttl_seconds=60)
+    cache.set("short", 1, ttl_seconds=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.get("short") is None and cache.get("long") == 2
+    cache.invalidate("long")
+    assert cache.get_stale("long") is None
+    cache.invalidate()
+    assert cache.get_stale("short") is None
+
+
+def test_get_or_compute_is_single_flight(make_cache):
+    cache = make_cache()
+    calls = []
+    started = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.1)
+        return "route"
+
+    def worker(results):
+        started.wait()
+        results.append(cache.get_or_compute("lane", factory))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert results == ["route"] * 8
+    assert len(calls) == 1
+
+
+def test_none_and_uncacheable_results_are_returned_but_not_stored(make_cache):
+    cache = make_cache()
+    assert cache.get_or_compute("missing", lambda: None) is None
+    assert cache.ttl_remaining("missing") is None
+    partial = {"stations": [], "complete": False}
+    assert cache.get_or_compute("lane", lambda: partial, cacheable=lambda value: value["complete"]) == partial
+    assert cache.ttl_remaining("lane") is None
+    assert cache.get_or_compute("lane", lambda: {"complete": True}, cacheable=lambda value: value["complete"]) == {"complete": True}
+    assert cache.get("lane") == {"complete": True}
+
+
+def test_factory_errors_propagate_and_release_the_key(make_cache):
+    cache = make_cache()
+    def failing():
+        raise RuntimeError("upstream down")
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("lane", failing)
+    assert cache.get_or_compute("lane", lambda: "ok") == "ok"
@@ -0,0 +1,114 @@
+# backend/tests/test_circuit_breaker.py
+# CircuitBreaker state transitions and guarded_get's accounting of probes, sheds and deadline cuts.
+
+import time
+import pytest
+import requests
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, guarded_get, CLOSED, OPEN, HALF_OPEN
+from deadline import request_deadline, DeadlineExceeded
+
+
+def tripped(open_seconds: float = 0.05) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", min_calls=2, error_rate=0.5, open_seconds=open_seconds)
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    return breaker
+
+
+def test_opens_on_error_rate_once_min_calls_seen():
+    breaker = CircuitBreaker("test", min_calls=3, error_rate=0.5)
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED # Below min_calls
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.short_circuited == 1
+
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker("test", min_calls=2, slow_call_seconds=1.0, slow_call_rate=0.5)
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_admits_one_probe_and_closes_on_success():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow() # Only one probe at a time
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+    assert breaker.is_open()
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.cancel_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+@pytest.fixture
+def here_breaker(upstream):
+    return circuit_breaker.breakers["here"]
+
+
+def test_guarded_get_short_circuits_without_calling(upstream, here_breaker):
+    here_breaker.state, here_breaker.opened_at = OPEN, time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        guarded_get("here", "https://router.hereapi.com/v8/routes", timeout=5)
+    assert upstream.calls["here_route"] == 0
+
+
+def test_guarded_get_counts_5xx_as_failures(upstream, here_breaker):
+    upstream.fail.add("here_discover")
+    for _ in range(here_breaker.min_calls):
+        guarded_get("here", "https://discover.search.hereapi.com/v1/discover", params={"at": "6.5,3.4"}, timeout=5)
+    assert here_breaker.state == OPEN
+
+
+def test_spent_deadline_costs_no_probe(upstream, here_breaker):
+    here_breaker.state, here_breaker.opened_at = OPEN, time.monotonic() - here_breaker.open_seconds
+    with request_deadline(0.0), pytest.raises(DeadlineExceeded):
+        guarded_get("here", "https://router.hereapi.com/v8/routes", timeout=5)
+    assert upstream.calls["here_route"] == 0
+    assert here_breaker.allow() # The probe is still available to the next caller
+
+
+def test_deadline_cut_timeout_is_not_the_providers_fault(monkeypatch, here_breaker):
+    def timing_out(url, timeout=None, **kwargs):
+        raise requests.exceptions.ReadTimeout("cut")
+    monkeypatch.setattr(requests, "get", timing_out)
+    for _ in range(here_breaker.min_calls):
+        with request_deadline(1.0), pytest.raises(requests.exceptions.Timeout):
+            guarded_get("here", "https://router.hereapi.com/v8/routes", timeout=30)
+    assert here_breaker.state == CLOSED
+    assert here_breaker.stats()["calls_in_window"] == 0
+
+
+@pytest.mark.parametrize("abort", [CircuitOpenError("open"), DeadlineExceeded("spent")])
+def test_aborted_fuel_station_search_is_marked_incomplete(upstream, monkeypatch, abort):
+    import diesel_routing_here
+    real_get = diesel_routing_here.guarded_get
+    def guarded(provider, url, **kwargs):
+        if "discover" in url: raise abort
+        return real_get(provider, url, **kwargs)
+    monkeypatch.setattr(diesel_routing_here, "guarded_get", guarded)
+    plan = diesel_routing_here.plan_here_route("test", "Lagos", "Abuja")
+    assert plan["fuel_search_complete"] is False
+    assert plan["fuel_station_coords"] == []
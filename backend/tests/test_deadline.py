@@ -0,0 +1,65 @@
+# backend/tests/test_deadline.py
+# Request deadline propagation, and what a lane serves (and keeps) when the budget runs out part way.
+
+import time
+import pytest
+import deadline
+from deadline import request_deadline, clip_timeout, remaining, DeadlineExceeded
+from config import Config
+
+
+def test_no_deadline_leaves_timeouts_alone():
+    assert remaining() is None
+    assert clip_timeout(10) == 10
+    assert clip_timeout(None) is None
+
+
+def test_timeouts_are_cut_to_the_remaining_budget():
+    with request_deadline(2.0):
+        assert 1.5 < clip_timeout(10) <= 2.0
+        assert clip_timeout(0.5) == 0.5
+        assert 1.5 < clip_timeout(None) <= 2.0
+    assert remaining() is None
+
+
+def test_spent_budget_raises():
+    with request_deadline(Config.DEADLINE_MIN_CALL_SECONDS / 2):
+        with pytest.raises(DeadlineExceeded):
+            clip_timeout(10)
+
+
+def test_optional_stages_are_skipped_near_the_deadline():
+    with request_deadline(Config.DEADLINE_OPTIONAL_STAGE_MIN_SECONDS + 5):
+        assert deadline.optional_stage_allowed()
+    with request_deadline(Config.DEADLINE_OPTIONAL_STAGE_MIN_SECONDS / 2):
+        assert not deadline.optional_stage_allowed()
+
+
+def test_decorated_view_runs_under_the_default_deadline():
+    @deadline.with_request_deadline
+    def view():
+        return remaining()
+    assert 0 < view() <= Config.REQUEST_DEADLINE_SECONDS
+    assert remaining() is None
+
+
+def test_forecast_cut_short_is_served_but_not_cached(upstream, monkeypatch):
+    import diesel_api
+    lane = diesel_api.fetch_lane_context("Lagos", "Kano")
+    monkeypatch.setattr(Config, "DEADLINE_OPTIONAL_STAGE_MIN_SECONDS", 0.5)
+    upstream.delay_seconds = 0.15
+    with request_deadline(1.0):
+        forecast_days = diesel_api._cached_lane_forecast(lane)
+    assert forecast_days
+    assert "weather" in lane["degraded"]
+    assert ("Lagos", "Kano") not in diesel_api.forecast_cache
+
+
+def test_full_forecast_is_cached(upstream):
+    import diesel_api
+    lane = diesel_api.fetch_lane_context("Lagos", "Kano")
+    started = time.monotonic()
+    forecast_days = diesel_api._cached_lane_forecast(lane)
+    assert forecast_days and time.monotonic() - started < Config.REQUEST_DEADLINE_SECONDS
+    assert "weather" not in lane["degraded"]
+    assert ("Lagos", "Kano") in diesel_api.forecast_cache
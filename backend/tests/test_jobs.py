@@ -0,0 +1,71 @@
+# backend/tests/test_jobs.py
+# JobManager: identical submissions share a queued, running or successful job, but never an error.
+
+import threading
+import time
+import pytest
+from jobs import JobManager, JobQueueFull, report_progress, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+@pytest.fixture
+def manager():
+    return JobManager("test_jobs", max_workers=2, max_pending=2)
+
+
+def finished(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record = manager.get(job_id)
+        if record["status"] not in (QUEUED, RUNNING): return record
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {record['status']}")
+
+
+def test_success_is_reused(manager):
+    record, created = manager.submit("lane", lambda: (200, {"cost": 1}))
+    assert created
+    done = finished(manager, record["job_id"])
+    assert (done["status"], done["http_status"], done["result"]) == (SUCCEEDED, 200, {"cost": 1})
+    again, created = manager.submit("lane", lambda: (200, {"cost": 2}))
+    assert not created and again["job_id"] == record["job_id"]
+
+
+def test_running_job_is_shared_and_reports_progress(manager):
+    release = threading.Event()
+    def work():
+        report_progress("route", total_distance=540)
+        release.wait(5)
+        return 200, {}
+    record, _ = manager.submit("lane", work)
+    again, created = manager.submit("lane", work)
+    assert not created and again["job_id"] == record["job_id"]
+    while manager.get(record["job_id"])["stage"] != "route": time.sleep(0.01)
+    assert manager.get(record["job_id"])["partial"] == {"total_distance": 540}
+    release.set()
+    assert finished(manager, record["job_id"])["status"] == SUCCEEDED
+
+
+@pytest.mark.parametrize("outcome, status", [((500, {"error": "upstream"}), FAILED), ((400, {"error": "bad"}), SUCCEEDED)])
+def test_error_results_are_not_reused(manager, outcome, status):
+    record, _ = manager.submit("lane", lambda: outcome)
+    assert finished(manager, record["job_id"])["status"] == status
+    retry, created = manager.submit("lane", lambda: (200, {}))
+    assert created and retry["job_id"] != record["job_id"]
+
+
+def test_exceptions_fail_the_job_and_are_not_reused(manager):
+    def broken():
+        raise RuntimeError("boom")
+    record, _ = manager.submit("lane", broken)
+    done = finished(manager, record["job_id"])
+    assert done["status"] == FAILED and done["error"] and "boom" not in done["error"]
+    _, created = manager.submit("lane", lambda: (200, {}))
+    assert created
+
+
+def test_queue_limit(manager):
+    release = threading.Event()
+    for key in ("a", "b"): manager.submit(key, lambda: (release.wait(5), (200, {}))[1])
+    with pytest.raises(JobQueueFull):
+        manager.submit("c", lambda: (200, {}))
+    release.set()
@@ -0,0 +1,62 @@
+# backend/tests/test_lanes_api.py
+# The lane resource: one strong ETag per content coding, 304 revalidation, and no caching of cut-short geometry.
+
+import gzip
+import json
+import pytest
+import serialization
+
+LANE_URL = "/api/lanes/Lagos/Abuja"
+
+
+def decoded(response) -> dict:
+    body, encoding = response.data, response.headers.get("Content-Encoding")
+    if encoding == "gzip": body = gzip.decompress(body)
+    elif encoding == "br": body = serialization.brotli.decompress(body)
+    return json.loads(body)
+
+
+ENCODINGS = ["gzip", ""] + (["br"] if serialization.brotli is not None else [])
+
+
+@pytest.mark.parametrize("accept", ENCODINGS)
+def test_each_coding_has_its_own_etag_and_revalidates(client, upstream, accept):
+    response = client.get(LANE_URL, headers={"Accept-Encoding": accept})
+    assert response.status_code == 200
+    encoding = response.headers.get("Content-Encoding")
+    assert encoding == (accept or None)
+    lane = decoded(response)
+    assert response.headers["ETag"] == f'"{lane["version"]}-{encoding or "identity"}"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(lane["coordinates"]) > 1 and lane["stations"]
+
+    revalidated = client.get(LANE_URL, headers={"Accept-Encoding": accept, "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == response.headers["ETag"]
+    assert upstream.calls["here_route"] == 1 # Both answered from the lane cache
+
+
+def test_tag_of_another_coding_gets_a_full_response(client):
+    identity = client.get(LANE_URL, headers={"Accept-Encoding": ""})
+    response = client.get(LANE_URL, headers={"Accept-Encoding": "gzip", "If-None-Match": identity.headers["ETag"]})
+    # Identity is always acceptable, so a cached identity body may still be revalidated...
+    assert response.status_code == 304
+    gzipped = client.get(LANE_URL, headers={"Accept-Encoding": "gzip"})
+    # ...but a gzip tag never validates an identity request
+    response = client.get(LANE_URL, headers={"Accept-Encoding": "", "If-None-Match": gzipped.headers["ETag"]})
+    assert response.status_code == 200
+
+
+def test_unknown_lane(client):
+    assert client.get("/api/lanes/Lagos/Lagos").status_code == 404
+    assert client.get("/api/lanes/Lagos/Atlantis").status_code == 404
+
+
+def test_cut_short_station_search_is_not_cacheable(client, upstream, monkeypatch):
+    import diesel_routing_here
+    monkeypatch.setattr(diesel_routing_here, "optional_stage_allowed", lambda: False)
+    response = client.get(LANE_URL)
+    assert response.status_code == 200
+    assert response.get_json()["degraded"] == ["fuel_stations"]
+    assert "no-store" in response.headers["Cache-Control"]
+    assert "ETag" not in response.headers
@@ -0,0 +1,85 @@
+# backend/tests/test_model_registry.py
+# ModelRegistry: validated hot swaps, and bad artifacts rejected while the current model keeps serving.
+
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from model_registry import ModelRegistry, ModelValidationError, load_model
+
+FEATURES = ["a", "b", "c"]
+VALIDATION = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+
+def fitted(intercept: float, n_features: int = 3) -> LinearRegression:
+    model = LinearRegression().fit(np.eye(n_features), np.zeros(n_features))
+    model.intercept_ = intercept
+    return model
+
+
+def deploy(path, model) -> None:
+    """Writes next to the artifact and renames over it, as deployments do; bumps mtime so the watcher sees a change."""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    deploy(path, fitted(10.0))
+    registry = ModelRegistry(path, FEATURES, VALIDATION, poll_seconds=0)
+    registry.load_initial()
+    return registry
+
+
+def test_initial_load(registry):
+    assert registry.active is not None
+    np.testing.assert_allclose(registry.active.predict(VALIDATION), [10.0, 10.0])
+
+
+def test_valid_artifact_is_swapped_in_and_callbacks_run(registry):
+    swaps = []
+    registry.on_swap(lambda previous, current: swaps.append((previous.version, current.version)))
+    first = registry.active.version
+    deploy(registry.path, fitted(12.0))
+    assert registry.check_for_update()
+    assert swaps == [(first, registry.active.version)] and registry.swaps == 1
+    assert not registry.check_for_update() # Unchanged file: nothing to do
+
+
+@pytest.mark.parametrize("bad_model, reason", [
+    (fitted(10.0, n_features=4), "features"),
+    (fitted(-5.0), "positive"),
+    (fitted(float("nan")), "non-finite"),
+    ({"not": "a model"}, "predict"),
+])
+def test_bad_artifact_is_rejected_and_current_model_keeps_serving(registry, bad_model, reason):
+    serving = registry.active
+    deploy(registry.path, bad_model)
+    assert not registry.check_for_update()
+    assert registry.active is serving
+    assert reason in registry.last_error["error"]
+    assert not registry.check_for_update() # The same bad file isn't reloaded every poll
+    deploy(registry.path, fitted(11.0))
+    assert registry.check_for_update() # A fixed artifact still goes live
+
+
+def test_corrupt_file_is_rejected(registry):
+    serving = registry.active
+    with open(registry.path, "wb") as f: f.write(b"not a pickle")
+    assert not registry.check_for_update()
+    assert registry.active is serving
+    assert registry.last_error is not None
+
+
+def test_load_model_checks_feature_names(tmp_path):
+    model = LinearRegression().fit(pd.DataFrame(np.eye(3), columns=["x", "y", "z"]), np.zeros(3))
+    path = str(tmp_path / "named.pkl")
+    joblib.dump(model, path)
+    with pytest.raises(ModelValidationError, match="names"):
+        load_model(path, FEATURES, VALIDATION)
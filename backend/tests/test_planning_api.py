@@ -0,0 +1,74 @@
+# backend/tests/test_planning_api.py
+# Planning endpoints: the sweep grid, the departure optimizer and the depot assignment solver, including input validation.
+
+import pytest
+
+
+def lane_form(journey_date, **fields):
+    return {"originDepot": "Lagos", "destinationDepot": "Abuja", "journeyDate": journey_date, **fields}
+
+
+def test_sweep_costs_the_grid_from_one_route_fetch(client, upstream, journey_date):
+    response = client.post("/api/diesel/sweep", data=lane_form(
+        journey_date, vehicleModel=["MACK Granite", "IVECO Stralis"], dispatchWindow=["morning", "noon"],
+        palletsMin="10", palletsMax="12", palletsStep="1",
+    ))
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert len(body["rows"]) == 2 * 2 * 3
+    assert body["cheapest"]["total_final_cost"] == min(row[-1] for row in body["rows"])
+    assert upstream.calls["here_route"] == 1
+
+
+@pytest.mark.parametrize("fields", [
+    {"palletsMin": "nan"}, {"palletsMax": "inf"}, {"vehicleAge": "-inf"},
+    {"palletsMax": "1e12", "palletsStep": "0.001"}, {"palletsStep": "0"}, {"vehicleModel": "Bicycle"},
+])
+def test_sweep_rejects_bad_grids(client, upstream, journey_date, fields):
+    response = client.post("/api/diesel/sweep", data=lane_form(journey_date, **fields))
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+    assert upstream.calls["here_route"] == 0
+
+
+@pytest.mark.parametrize("pallets", ["nan", "inf", "-Infinity"])
+def test_departure_rejects_non_finite_pallets(client, journey_date, pallets):
+    response = client.post("/api/diesel/departure", data=lane_form(journey_date, vehicleModel="IVECO Stralis", pallets=pallets))
+    assert response.status_code == 400
+
+
+def test_departure_ranks_forecast_days(client, journey_date):
+    response = client.post("/api/diesel/departure", data=lane_form(journey_date, vehicleModel="IVECO Stralis", pallets="10"))
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body["best"]["total_final_cost"] == min(slot["total_final_cost"] for slot in body["slots"])
+
+
+@pytest.mark.parametrize("payload", [
+    [1, 2], "orders", {"orders": "x"}, {"orders": [1]}, {"orders": []},
+    {"orders": [{"destination": "Kano", "pallets": "nan"}]},
+    {"orders": [{"destination": "Kano", "pallets": 4}], "vehicleAge": "inf"},
+    {"orders": [{"destination": "Atlantis", "pallets": 4}]},
+])
+def test_assign_rejects_malformed_payloads(client, upstream, payload):
+    response = client.post("/api/diesel/assign", json=payload)
+    assert response.status_code == 400
+    assert upstream.calls["here_route"] == 0
+
+
+def test_assign_bounds_distinct_pallet_loads_before_fetching(client, upstream):
+    orders = [{"destination": "Kano", "pallets": 1 + i / 1000} for i in range(500)]
+    response = client.post("/api/diesel/assign", json={"orders": orders})
+    assert response.status_code == 400
+    assert "distinct pallet loads" in response.get_json()["error"]
+    assert upstream.calls["here_route"] == 0
+
+
+def test_assign_serves_every_order_from_another_depot(client):
+    orders = [{"id": "a", "destination": "Kano", "pallets": 10}, {"id": "b", "destination": "Lagos", "pallets": 18}]
+    response = client.post("/api/diesel/assign", json={"orders": orders, "vehicles": ["IVECO Stralis", "MACK Granite"]})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assignments = {row["id"]: row for row in body["assignments"]}
+    assert set(assignments) == {"a", "b"}
+    assert all(row["origin"] != row["destination"] for row in assignments.values())
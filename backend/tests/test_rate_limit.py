@@ -0,0 +1,89 @@
+# backend/tests/test_rate_limit.py
+# Token buckets: the low-priority reserve, background queueing vs shedding, daily quotas and what the callers do when shed.
+
+import time
+import pytest
+import circuit_breaker
+from circuit_breaker import guarded_get, CircuitOpenError, OPEN
+from rate_limit import TokenBucketLimiter, RateLimited, background_work, PRIORITY_LOW, PRIORITY_NORMAL
+
+
+@pytest.fixture
+def make_limiter(tmp_path):
+    def make(rate=1.0, burst=10, daily_quota=0, max_wait_seconds=0.5):
+        return TokenBucketLimiter(str(tmp_path / "ratelimits.db"), {"here": (rate, burst, daily_quota)},
+                                  max_wait_seconds=max_wait_seconds, low_priority_reserve=0.2)
+    return make
+
+
+def test_low_priority_is_shed_below_the_reserve(make_limiter):
+    limiter = make_limiter(rate=0.01, burst=10)
+    for _ in range(8): limiter.acquire("here")
+    with pytest.raises(RateLimited):
+        limiter.acquire("here", PRIORITY_LOW) # 2 tokens left, reserve is 2
+    limiter.acquire("here", PRIORITY_NORMAL) # Normal traffic still gets the reserve
+    assert limiter.shed["here"] == 1
+    assert limiter.usage()["here"]["history"][0]["shed"] == 1
+
+
+def test_normal_priority_waits_within_its_budget(make_limiter):
+    limiter = make_limiter(rate=20.0, burst=1)
+    limiter.acquire("here")
+    started = time.monotonic()
+    limiter.acquire("here")
+    assert 0.02 < time.monotonic() - started < 0.5
+
+
+def test_normal_priority_is_shed_past_its_budget(make_limiter):
+    limiter = make_limiter(rate=0.5, burst=1, max_wait_seconds=0.1)
+    limiter.acquire("here")
+    with pytest.raises(RateLimited):
+        limiter.acquire("here")
+
+
+def test_background_work_queues_above_the_reserve(make_limiter):
+    limiter = make_limiter(rate=50.0, burst=5)
+    for _ in range(4): limiter.acquire("here")
+    with background_work():
+        limiter.acquire("here") # Low priority, but allowed to wait for the bucket to refill past the reserve
+    assert limiter.shed["here"] == 0
+
+
+def test_background_work_that_may_not_queue_is_shed(make_limiter):
+    limiter = make_limiter(rate=0.01, burst=5)
+    for _ in range(4): limiter.acquire("here")
+    with background_work(may_queue=False), pytest.raises(RateLimited):
+        limiter.acquire("here", PRIORITY_NORMAL) # Downgraded to low priority, and low priority never waits here
+    limiter.acquire("here") # The request path keeps the last token
+
+
+def test_daily_quota(make_limiter):
+    limiter = make_limiter(rate=100.0, burst=100, daily_quota=2)
+    limiter.acquire("here")
+    limiter.acquire("here")
+    with pytest.raises(RateLimited, match="daily quota"):
+        limiter.acquire("here")
+    assert limiter.usage()["here"]["calls_today"] == 2
+
+
+def test_open_circuit_spends_no_token(upstream, make_limiter, monkeypatch):
+    limiter = make_limiter(rate=0.01, burst=1)
+    monkeypatch.setattr(circuit_breaker, "limiter", limiter)
+    breaker = circuit_breaker.breakers["here"]
+    breaker.state, breaker.opened_at = OPEN, time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        guarded_get("here", "https://router.hereapi.com/v8/routes", timeout=5)
+    limiter.acquire("here") # The only token is still there
+    assert limiter.usage()["here"]["calls_today"] == 1
+
+
+def test_shed_forecast_is_served_degraded_and_not_cached(upstream, tmp_path, monkeypatch):
+    import diesel_api
+    lane = diesel_api.fetch_lane_context("Lagos", "Kano")
+    limiter = TokenBucketLimiter(str(tmp_path / "weather.db"), {"weather": (100.0, 100, 3)})
+    monkeypatch.setattr(circuit_breaker, "limiter", limiter)
+    forecast_days = diesel_api._cached_lane_forecast(lane)
+    assert forecast_days
+    assert upstream.calls["weather"] == 3
+    assert "weather" in lane["degraded"]
+    assert ("Lagos", "Kano") not in diesel_api.forecast_cache
@@ -0,0 +1,61 @@
+# backend/tests/test_tiles_api.py
+# Route overlay tiles: per-coding ETags, revalidation straight from the route store index, and new tiles on new stations.
+
+import pytest
+import diesel_api
+import tiles_api
+from config import Config
+from route_tiles import project, TILE_SIZE
+
+LANE = ("Lagos", "Abuja")
+
+
+@pytest.fixture
+def stored_lane(client):
+    assert client.get("/api/lanes/Lagos/Abuja").status_code == 200 # Fetches and stores the route
+    return diesel_api.lane_cache.get(LANE)
+
+
+def station_tile_url(geometry, zoom=10):
+    x, y = (project([geometry["fuel_stations"][0]], zoom)[0] // TILE_SIZE).astype(int)
+    return f"/api/routes/tiles/{zoom}/{x}/{y}?lane=Lagos|Abuja"
+
+
+def test_tile_has_the_lane_and_its_station(client, stored_lane):
+    response = client.get(station_tile_url(stored_lane))
+    assert response.status_code == 200
+    lanes = response.get_json()["lanes"]
+    assert [(lane["origin"], lane["destination"]) for lane in lanes] == [LANE]
+    assert lanes[0]["paths"] and len(lanes[0]["stations"]) == 1
+
+
+@pytest.mark.parametrize("accept", ["gzip", ""])
+def test_revalidation_reads_no_cached_lane(client, stored_lane, monkeypatch, accept):
+    monkeypatch.setattr(Config, "COMPRESS_MIN_BYTES", 0) # Tiles of a straight test route are tiny
+    url = station_tile_url(stored_lane)
+    response = client.get(url, headers={"Accept-Encoding": accept})
+    assert response.headers.get("Content-Encoding") == (accept or None)
+    assert response.headers["ETag"].endswith(f'-{accept or "identity"}"')
+    lookups = []
+    real_stations_for = tiles_api.route_tiler.stations_for
+    monkeypatch.setattr(tiles_api.route_tiler, "stations_for", lambda lane: lookups.append(lane) or real_stations_for(lane))
+    revalidated = client.get(url, headers={"Accept-Encoding": accept, "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert lookups == [] # The station version comes from the route store index
+
+
+def test_new_stations_make_a_new_tile(client, stored_lane):
+    url = station_tile_url(stored_lane)
+    before = client.get(url)
+    moved = [(lat + 0.001, lon) for lat, lon in stored_lane["fuel_stations"]]
+    geometry = {**stored_lane, "route_points": diesel_api.lane_route_points(stored_lane), "fuel_stations": moved}
+    geometry = diesel_api._stash_route_points({**geometry, "version": "moved-stations"})
+    diesel_api.lane_cache.set(LANE, geometry)
+    after = client.get(url, headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.get_json()["lanes"][0]["stations"] != before.get_json()["lanes"][0]["stations"]
+
+
+def test_bad_tile_coordinates(client):
+    assert client.get("/api/routes/tiles/2/4/0").status_code == 400
+    assert client.get("/api/routes/tiles/3/1/1?lane=Lagos").status_code == 400
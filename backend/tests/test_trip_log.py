@@ -0,0 +1,70 @@
+# backend/tests/test_trip_log.py
+# TripLog: segments written per flush, compaction that neither loses nor double-counts trips, and the admin-only endpoint.
+
+import os
+import pytest
+import analytics_api
+from trip_log import TripLog
+
+LANES = [("Lagos", "Abuja"), ("Kano", "Abuja"), ("Lagos", "Ibadan")]
+
+
+def trip(i: int) -> dict:
+    origin, destination = LANES[i % len(LANES)]
+    return {
+        "origin": origin, "destination": destination, "vehicle": "Truck" if i % 2 else "Van",
+        "journey_day": f"2026-03-{1 + i % 20:02d}", "total_km": 100.0 + i, "fuel_litres": 20.0 + i % 5,
+        "fuel_cost": 30000.0 + i, "total_cost": 45000.0 + i, "efficiency_kml": 5.0,
+    }
+
+
+@pytest.fixture
+def trip_log(tmp_path):
+    log = TripLog(str(tmp_path / "trips"), flush_rows=10_000, flush_seconds=3600, compact_segments=2)
+    for batch in range(4):
+        for i in range(batch * 25, batch * 25 + 25): log.record(trip(i))
+        assert log.flush() == 25
+    return log
+
+
+def test_each_flush_writes_a_segment(trip_log):
+    assert len(trip_log.segments()) == 4
+    assert trip_log.count() == 100
+    assert trip_log.flush() == 0 # Nothing buffered
+
+
+def test_compaction_keeps_every_trip_exactly_once(trip_log):
+    reader = TripLog(trip_log.directory) # Another process that mapped the segments before compaction
+    before = trip_log.aggregate(("lane", "vehicle"), "week")
+    assert reader.count() == 100
+    old = [segment.path for segment in trip_log.segments()]
+
+    merged = trip_log.compact()
+    assert merged is not None
+    assert [segment.name for segment in trip_log.segments()] == [merged]
+    assert all(not os.path.exists(path) for path in old)
+    assert trip_log.count() == reader.count() == 100
+    assert trip_log.aggregate(("lane", "vehicle"), "week") == before
+    assert reader.aggregate(("lane", "vehicle"), "week") == before
+    assert trip_log.compact() is None # A single segment is left
+
+
+def test_aggregate_totals_and_filters(trip_log):
+    rows = trip_log.aggregate((), None)
+    assert rows[0]["trips"] == 100
+    assert rows[0]["total_km"] == pytest.approx(sum(100.0 + i for i in range(100)))
+    lagos = trip_log.aggregate(("lane",), None, filters={"origin": "Lagos"})
+    assert sorted(row["lane"] for row in lagos) == ["Lagos -> Abuja", "Lagos -> Ibadan"]
+    with pytest.raises(ValueError):
+        trip_log.aggregate(("driver",), None)
+
+
+def test_analytics_endpoint_is_admin_only(client, trip_log, monkeypatch):
+    monkeypatch.setattr(analytics_api, "trip_log", trip_log)
+    assert client.get("/api/analytics/trips?group=lane&period=none").status_code == 403
+    with client.session_transaction() as session:
+        session.update(logged_in=True, role="admin")
+    response = client.get("/api/analytics/trips?group=lane&period=none")
+    assert response.status_code == 200
+    assert sum(row["trips"] for row in response.get_json()["rows"]) == 100
+    assert client.get("/api/analytics/trips?group=driver").status_code == 400
@@ -0,0 +1,71 @@
+# backend/tiles_api.py
+# Map overlay of every stored fleet route, served as z/x/y tiles of simplified geometry plus fuel stations.
+
+from flask import Blueprint, Response, request, jsonify
+import hashlib
+import logging
+from config import Config
+from route_store import route_store
+from route_tiles import RouteTiler
+from serialization import json_response, encoded_etag, matching_etag
+from diesel_api import lane_cache
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+tiles_api_bp = Blueprint('tiles_api', __name__)
+
+
+def _lane_stations(lane):
+    """(station version, stations) - the geometry's lane_version, or a hash of the stations for geometry cached before it had one."""
+    geometry = lane_cache.get_stale(lane) # Expired geometry still has the right stations for a stored route
+    if not geometry: return None, []
+    stations = geometry.get("fuel_stations", [])
+    version = geometry.get("version") or hashlib.blake2b(repr(stations).encode(), digest_size=12).hexdigest()
+    return version, stations
+
+
+route_tiler = None
+if route_store is not None:
+    route_tiler = RouteTiler(route_store, _lane_stations, Config.LANE_CACHE_TTL, Config.ROUTE_TILE_TOLERANCE_PX,
+                             Config.ROUTE_TILE_BUFFER_PX, Config.ROUTE_TILE_STATION_MIN_ZOOM, Config.COORDINATE_DECIMALS)
+
+
+@tiles_api_bp.route('/api/routes/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def route_tile_api(z, x, y):
+    """
+    Route overlay for one map tile: {"lanes": [{"origin", "destination", "paths": [[[lat, lon], ...], ...],
+    "stations": [[lat, lon], ...]}]}. Every stored lane by default; ?lane=Origin|Destination (repeatable) to pick.
+    Geometry is simplified for zoom z, so draw it as-is. Revalidate with If-None-Match.
+    """
+    if route_tiler is None:
+        return jsonify({"success": False, "error": "Route overlay needs the route store, which is unavailable."}), 503
+    if not 0 <= z <= Config.ROUTE_TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"success": False, "error": f"No tile {z}/{x}/{y} (zoom 0-{Config.ROUTE_TILE_MAX_ZOOM})."}), 400
+    requested = [tuple(value.split('|', 1)) for value in request.args.getlist('lane')]
+    if any(len(lane) != 2 for lane in requested):
+        return jsonify({"success": False, "error": "lane must be Origin|Destination."}), 400
+    try:
+        lanes = route_tiler.lanes(requested or None)
+        # The tile only changes when one of its lanes is re-routed or gets new stations, so the lane versions make the ETag
+        version = hashlib.blake2b(repr((z, x, y, sorted(lanes.items()))).encode(), digest_size=12).hexdigest()
+        matched = matching_etag(version)
+        if matched is not None:
+            response = Response(status=304)
+            response.set_etag(matched)
+        else:
+            features = route_tiler.tile(z, x, y, lanes)
+            response = json_response({
+                "success": True, "z": z, "x": x, "y": y,
+                "lanes": [{"origin": f["lane"][0], "destination": f["lane"][1], "paths": f["paths"], "stations": f["stations"]}
+                          for f in features],
+            })
+            response.set_etag(encoded_etag(version, response.headers.get("Content-Encoding")))
+    except Exception as e:
+        logger.error(f"Route tile {z}/{x}/{y} failed: {e}", exc_info=True)
+        return jsonify({"success": False, "error": "An internal server error occurred."}), 500
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.ROUTE_TILE_MAX_AGE
+    return response
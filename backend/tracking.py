@@ -3,9 +3,14 @@
 import requests
 import re
 import logging # Import logging
-from typing import Tuple, List
+from typing import Tuple, List, Dict, Optional, Sequence
 from datetime import datetime
+import numpy as np
 from config import Config # Keep Config import for API keys
+from circuit_breaker import guarded_get, CircuitOpenError
+from rate_limit import RateLimited, PRIORITY_NORMAL, PRIORITY_LOW
+from deadline import DeadlineExceeded
+from cache import TTLCache
 
 # --- Setup Logger ---
 # Use __name__ for logger specific to this module
@@ -25,16 +30,27 @@ WEATHER_API_URL = "http://api.weatherapi.com/v1/forecast.json" # Unchanged
 MAPBOX_ACCESS_TOKEN = Config.MAPBOX_TOKEN
 GEOCODING_API_KEY = Config.GEOCODING_API_KEY # Use consistent naming if changed in Config
 
+# Depot coordinates don't move - geocode results are cached (failures are not)
+geocode_cache = TTLCache("geocode", Config.GEOCODE_CACHE_TTL)
+# Per forecast grid cell, shared by every lane crossing the cell (lanes out of one depot share their first cells)
+weather_cell_cache = TTLCache("weather_cell", Config.WEATHER_CACHE_TTL)
+EARTH_RADIUS_KM = 6371.0
+
 # --- Functions imported by diesel_api.py ---
 
 def get_coordinates(place_name: str) -> Tuple[float, float] | Tuple[None, None]:
     """Gets coordinates using Geocode.maps.co API, specifying Nigeria."""
+    return geocode_cache.get_or_compute(
+        ("maps.co", place_name), lambda: _geocode(place_name), cacheable=lambda coords: coords[0] is not None
+    )
+
+def _geocode(place_name: str) -> Tuple[float, float] | Tuple[None, None]:
     search_query = f"{place_name}, Nigeria"
     params = { "q": search_query, "api_key": GEOCODING_API_KEY }
-    logger.info(f"Geocoding query: {search_query}")
+    logger.info("Geocoding query: %s", search_query)
 
     try:
-        response = requests.get(GEOCODING_API_URL, params=params, timeout=10)
+        response = guarded_get("geocode", GEOCODING_API_URL, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
 
@@ -48,10 +64,10 @@ def get_coordinates(place_name: str) -> Tuple[float, float] | Tuple[None, None]:
             lat = float(top_result.get('lat', 0.0))
             lon = float(top_result.get('lon', 0.0))
             if lat == 0.0 and lon == 0.0:
-                 logger.warning(f"Geocoding returned (0,0) for {search_query}. Might be incorrect.")
+                 logger.warning("Geocoding returned (0,0) for %s. Might be incorrect.", search_query)
                  return None, None # Treat (0,0) as invalid for safety
             coords = (lat, lon)
-            logger.info(f"Geocoding result for {search_query}: {coords}")
+            logger.info("Geocoding result for %s: %s", search_query, coords)
             return coords
         else:
             logger.error(f"Unexpected data format or empty list from geocoding API for {search_query}")
@@ -94,7 +110,7 @@ def calculate_distances(start_coords: Tuple[float, float], end_coords: Tuple[flo
     url = f"{MAPBOX_DIRECTIONS_API_URL}{start_lon},{start_lat};{end_lon},{end_lat}"
 
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = guarded_get("mapbox", url, params=params, timeout=15)
         response.raise_for_status()
         route_data = response.json()
 
@@ -163,7 +179,7 @@ def get_route_traffic_data(start_coords: Tuple[float, float], end_coords: Tuple[
     url = f"{MAPBOX_DIRECTIONS_API_URL}{start_lon},{start_lat};{end_lon},{end_lat}"
 
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = guarded_get("mapbox", url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
 
@@ -209,80 +225,122 @@ def get_route_traffic_data(start_coords: Tuple[float, float], end_coords: Tuple[
 
 # --- Weather Functions (ADDED DETAILED LOGGING) ---
 
-def get_weather_data(api_key: str, coordinates_list: List[Tuple[float, float]], target_date: str) -> Tuple[float, str, str]:
-    """Gets forecast weather data for a list of coordinates on a target date."""
-    logger.info(f"Entering get_weather_data for {len(coordinates_list)} points, date: {target_date}")
-
-    if not api_key or not coordinates_list or not target_date:
-        logger.error("Missing API key, coordinates, or target date for weather data.")
-        return 0.0, "Low", "Low"
-
-    temperature_sum = 0
-    snow_sum_cm = 0
-    rain_sum_mm = 0
-    visibility_sum_km = 0
-    valid_coordinates = 0
-
-    try:
-        target_date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
-    except ValueError:
-        logger.error(f"Invalid target date format: {target_date}. Use YYYY-MM-DD.")
-        return 0.0, "Low", "Low"
-
+def weather_cell(lat: float, lon: float) -> Tuple[int, int]:
+    """Forecast grid cell of a point (Config.WEATHER_GRID_DEGREES square)."""
+    return (int(np.floor(lat / Config.WEATHER_GRID_DEGREES)), int(np.floor(lon / Config.WEATHER_GRID_DEGREES)))
+
+
+def sample_weather_points(route_points: Sequence[Tuple[float, float]], spacing_km: float, min_points: int,
+                          max_points: int) -> Tuple[List[Tuple[float, float]], List[float]]:
+    """
+    Picks weather points along the polyline: one every spacing_km of route length (clamped to
+    [min_points, max_points]), evenly spread by distance. Each point carries the km of route it stands for;
+    points in the same forecast grid cell are merged (first point kept, km added up).
+    Returns (points, weights_km), ordered coarse-to-fine rather than along the route.
+    """
+    points = np.asarray(route_points, dtype=float).reshape(-1, 2)
+    if len(points) == 0: return [], []
+    if len(points) == 1: return [tuple(points[0])], [1.0]
+    lat, lon = np.radians(points[:, 0]), np.radians(points[:, 1])
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    cumulative_km = np.concatenate([[0.0], np.cumsum(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0))))])
+    total_km = float(cumulative_km[-1])
+    if total_km <= 0: return [tuple(points[0])], [1.0]
+
+    n = int(np.clip(np.ceil(total_km / spacing_km) + 1, max(min_points, 2), max(max_points, 2)))
+    at_km = np.linspace(0.0, total_km, n)
+    sampled = np.column_stack([np.interp(at_km, cumulative_km, points[:, 0]), np.interp(at_km, cumulative_km, points[:, 1])])
+    # Each point covers half the gap to each neighbour
+    edges = np.concatenate([[0.0], (at_km[:-1] + at_km[1:]) / 2, [total_km]])
+    weights = np.diff(edges)
+
+    merged: Dict[Tuple[int, int], int] = {}
+    result_points, result_weights = [], []
+    for (point_lat, point_lon), weight in zip(sampled.tolist(), weights.tolist()):
+        cell = weather_cell(point_lat, point_lon)
+        if cell in merged:
+            result_weights[merged[cell]] += weight
+            continue
+        merged[cell] = len(result_points)
+        result_points.append((round(point_lat, 5), round(point_lon, 5)))
+        result_weights.append(weight)
+    logger.info("Weather sampling: %.0f km route -> %d points -> %d forecast cells.", total_km, n, len(result_points))
+    # Coarse-to-fine order (ends, middle, quarters, ...): if later calls are shed, the fetched points still span the route
+    order = _coarse_to_fine(len(result_points))
+    return [result_points[i] for i in order], [result_weights[i] for i in order]
+
+
+def _coarse_to_fine(n: int) -> List[int]:
+    if n <= 2: return list(range(n))
+    order, intervals = [0, n - 1], [(0, n - 1)]
+    while intervals:
+        next_intervals = []
+        for lo, hi in intervals:
+            mid = (lo + hi) // 2
+            if mid in (lo, hi): continue
+            order.append(mid)
+            next_intervals += [(lo, mid), (mid, hi)]
+        intervals = next_intervals
+    return order
+
+
+def fetch_weather_forecasts(api_key: str, coordinates_list: List[Tuple[float, float]],
+                            weights: Optional[Sequence[float]] = None) -> Tuple[List[Tuple[List[dict], float]], bool]:
+    """
+    Fetches the 4-day forecast for each coordinate (one call per forecast grid cell, cached across lanes).
+    Returns (('forecastday' list, weight) for every point that answered, complete); weights default to 1.
+    complete is False when the remaining points were skipped (circuit open, rate limited, deadline), so callers can use
+    the partial forecast but must not cache it as the lane's.
+    """
+    forecasts = []
+    complete = True
+    if weights is None or len(weights) != len(coordinates_list): weights = [1.0] * len(coordinates_list)
     # --- Loop through coordinates ---
-    for index, (lat, lon) in enumerate(coordinates_list):
+    for index, ((lat, lon), weight) in enumerate(zip(coordinates_list, weights)):
         # Use DEBUG level for per-point logs to avoid flooding INFO level
-        logger.debug(f"Processing weather for point {index+1}/{len(coordinates_list)}: ({lat}, {lon})")
+        logger.debug("Processing weather for point %d/%d: (%s, %s)", index + 1, len(coordinates_list), lat, lon)
 
         if lat is None or lon is None:
-            logger.warning(f"Skipping invalid coordinate pair (None) at index {index}.")
+            logger.warning("Skipping invalid coordinate pair (None) at index %d.", index)
+            continue
+
+        cell = weather_cell(lat, lon)
+        cached = weather_cell_cache.get(cell)
+        if cached is not None:
+            forecasts.append((cached, weight))
             continue
 
         params = { "key": api_key, "q": f"{lat},{lon}", "days": 4, "aqi": "no", "alerts": "no" }
 
         try:
             # --- Make API call ---
-            logger.debug(f"  Requesting WeatherAPI: q={lat},{lon}")
-            response = requests.get(WEATHER_API_URL, params=params, timeout=10) # Timeout added
+            logger.debug("  Requesting WeatherAPI: q=%s,%s", lat, lon)
+            # Points beyond the minimum are sheddable when the WeatherAPI budget runs low
+            priority = PRIORITY_LOW if len(forecasts) >= Config.WEATHER_MIN_POINTS else PRIORITY_NORMAL
+            response = guarded_get("weather", WEATHER_API_URL, priority=priority, params=params, timeout=10) # Timeout added
             response.raise_for_status() # Check for HTTP errors (4xx, 5xx)
             weather_data = response.json()
-            logger.debug(f"  WeatherAPI call successful for ({lat},{lon})")
+            logger.debug("  WeatherAPI call successful for (%s,%s)", lat, lon)
 
             # --- Process Response ---
             if not weather_data.get('forecast', {}).get('forecastday'):
-                logger.warning(f"  No forecast data found in response for {lat},{lon}")
+                logger.warning("  No forecast data found in response for %s,%s", lat, lon)
                 continue
-
-            forecast_days = weather_data['forecast']['forecastday']
-            found_date = False
-            for day in forecast_days:
-                date_str = day.get('date')
-                if not date_str: continue
-                try: date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-                except ValueError: continue
-
-                if date_obj == target_date_obj:
-                    day_data = day.get('day', {})
-                    if not day_data: continue
-
-                    temperature = day_data.get('avgtemp_c', 0.0)
-                    snow_cm = day_data.get('totalsnow_cm', 0.0)
-                    rain_mm = day_data.get('totalprecip_mm', 0.0)
-                    visibility_km = day_data.get('avgvis_km', 10.0)
-
-                    if isinstance(temperature, (int, float)): temperature_sum += temperature
-                    if isinstance(snow_cm, (int, float)): snow_sum_cm += snow_cm
-                    if isinstance(rain_mm, (int, float)): rain_sum_mm += rain_mm
-                    if isinstance(visibility_km, (int, float)): visibility_sum_km += visibility_km
-
-                    valid_coordinates += 1
-                    found_date = True
-                    logger.debug(f"  Processed data for target date {target_date} at ({lat},{lon})")
-                    break # Found target date
-
-            # if not found_date: # Reduce log noise unless needed
-            #    logger.debug(f"  Target date {target_date} not found in forecast for {lat},{lon}")
-
+            weather_cell_cache.set(cell, weather_data['forecast']['forecastday'])
+            forecasts.append((weather_data['forecast']['forecastday'], weight))
+
+        except CircuitOpenError:
+             logger.warning("  WeatherAPI circuit open; skipping remaining weather points.")
+             complete = False
+             break # Provider is down - don't try the other points
+        except DeadlineExceeded:
+             logger.warning("  Request deadline reached; using %d weather points fetched so far.", len(forecasts))
+             complete = False # Coarse-to-fine order keeps this usable now; a request with a full budget must not inherit it
+             break
+        except RateLimited as e:
+             logger.warning("  %s; using %d weather points fetched so far.", e, len(forecasts))
+             complete = False
+             break
         except requests.exceptions.Timeout:
              logger.error(f"  Timeout retrieving weather data for {lat},{lon}")
              continue # Skip to next coordinate on timeout
@@ -295,26 +353,100 @@ def get_weather_data(api_key: str, coordinates_list: List[Tuple[float, float]],
         except Exception as e:
              logger.error(f"  An unexpected error occurred during weather check for {lat},{lon}: {e}")
              continue # Skip to next coordinate
+    return forecasts, complete
+
+
+def summarize_weather_for_date(forecasts: List[Tuple[List[dict], float]], target_date_obj) -> Tuple[float, str, str]:
+    """Weighted average of the per-point forecasts for one date. Returns (avg_temp_c, snow_class, rain_class)."""
+    temperature_sum = 0
+    snow_sum_cm = 0
+    rain_sum_mm = 0
+    visibility_sum_km = 0
+    weight_sum = 0
+    valid_coordinates = 0
+
+    for forecast_days, weight in forecasts:
+        for day in forecast_days:
+            date_str = day.get('date')
+            if not date_str: continue
+            try: date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+            except ValueError: continue
+
+            if date_obj == target_date_obj:
+                day_data = day.get('day', {})
+                if not day_data: continue
+
+                temperature = day_data.get('avgtemp_c', 0.0)
+                snow_cm = day_data.get('totalsnow_cm', 0.0)
+                rain_mm = day_data.get('totalprecip_mm', 0.0)
+                visibility_km = day_data.get('avgvis_km', 10.0)
+
+                if isinstance(temperature, (int, float)): temperature_sum += temperature * weight
+                if isinstance(snow_cm, (int, float)): snow_sum_cm += snow_cm * weight
+                if isinstance(rain_mm, (int, float)): rain_sum_mm += rain_mm * weight
+                if isinstance(visibility_km, (int, float)): visibility_sum_km += visibility_km * weight
+
+                weight_sum += weight
+                valid_coordinates += 1
+                break # Found target date
 
     # --- Calculate Averages ---
-    logger.info(f"Finished processing weather loop. Found data for {valid_coordinates}/{len(coordinates_list)} points.")
-    if valid_coordinates > 0:
-        average_temperature = temperature_sum / valid_coordinates
-        average_snow_cm = snow_sum_cm / valid_coordinates
-        average_rain_mm = rain_sum_mm / valid_coordinates
-        average_visibility_km = visibility_sum_km / valid_coordinates
+    logger.debug("Found weather data for %d/%d points on %s.", valid_coordinates, len(forecasts), target_date_obj)
+    if valid_coordinates > 0 and weight_sum > 0:
+        average_temperature = temperature_sum / weight_sum
+        average_snow_cm = snow_sum_cm / weight_sum
+        average_rain_mm = rain_sum_mm / weight_sum
+        average_visibility_km = visibility_sum_km / weight_sum
 
-        logger.info(f"Weather Averages: Temp={average_temperature:.1f}C, Snow={average_snow_cm:.1f}cm, Rain={average_rain_mm:.1f}mm, Vis={average_visibility_km:.1f}km")
+        logger.debug("Weather Averages: Temp=%.1fC, Snow=%.1fcm, Rain=%.1fmm, Vis=%.1fkm", average_temperature, average_snow_cm, average_rain_mm, average_visibility_km)
 
         snow_classification = categorize_snow_level(average_snow_cm, average_visibility_km)
         rain_classification = categorize_rain_level(average_rain_mm)
-        logger.info("Weather data processing complete (returning calculated averages).")
         return average_temperature, snow_classification, rain_classification
     else:
         logger.warning("No valid weather data collected for any coordinate.")
-        logger.info("Weather data processing complete (returning defaults).")
         return 0.0, "Low", "Low" # Return defaults if no data found
 
+
+def get_weather_data(api_key: str, coordinates_list: List[Tuple[float, float]], target_date: str,
+                     weights: Optional[Sequence[float]] = None) -> Tuple[float, str, str]:
+    """Gets forecast weather data for a list of coordinates on a target date."""
+    logger.debug("Entering get_weather_data for %d points, date: %s", len(coordinates_list), target_date)
+
+    if not api_key or not coordinates_list or not target_date:
+        logger.error("Missing API key, coordinates, or target date for weather data.")
+        return 0.0, "Low", "Low"
+
+    try:
+        target_date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
+    except ValueError:
+        logger.error(f"Invalid target date format: {target_date}. Use YYYY-MM-DD.")
+        return 0.0, "Low", "Low"
+
+    forecasts, _ = fetch_weather_forecasts(api_key, coordinates_list, weights)
+    logger.info("Weather forecasts for %d/%d points.", len(forecasts), len(coordinates_list))
+    return summarize_weather_for_date(forecasts, target_date_obj)
+
+
+def get_weather_forecast_days(api_key: str, coordinates_list: List[Tuple[float, float]],
+                              weights: Optional[Sequence[float]] = None) -> Tuple[Dict[str, Tuple[float, str, str]], bool]:
+    """
+    Summarises every forecast day returned for the coordinates (WeatherAPI gives 4 days per point)
+    from ONE set of fetches, each point weighted by the route km it represents (equal if no weights).
+    Returns ({"YYYY-MM-DD": (avg_temp_c, snow_class, rain_class)}, complete) - see fetch_weather_forecasts.
+    """
+    if not api_key or not coordinates_list:
+        logger.error("Missing API key or coordinates for weather forecast.")
+        return {}, True
+    forecasts, complete = fetch_weather_forecasts(api_key, coordinates_list, weights)
+    forecast_dates = sorted({day['date'] for forecast_days, _ in forecasts for day in forecast_days if day.get('date')})
+    days = {}
+    for date_str in forecast_dates:
+        try: date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError: continue
+        days[date_str] = summarize_weather_for_date(forecasts, date_obj)
+    return days, complete
+
 # --- Weather Helper Functions (Keep as is) ---
 
 def categorize_snow_level(snow_cm: float, visibility_km: float) -> str:
@@ -0,0 +1,116 @@
+# backend/traffic_cache.py
+# Lane-level traffic snapshots, reused within a time bucket and refreshed stale-while-revalidate.
+
+import threading
+import time
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from cache import TTLCache, CacheBackend
+from rate_limit import background_work
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+# delay_minutes: traffic delay vs typical duration; bucket: time bucket it was fetched in
+TrafficSnapshot = namedtuple('TrafficSnapshot', 'delay_minutes,bucket,fetched_at')
+
+
+class TrafficSnapshotCache:
+    """
+    Caches the traffic delay per lane for the (origin, destination, time bucket) it was fetched in.
+      - snapshot from the current bucket      -> served as is                                    ("fresh")
+      - older snapshot within max_stale       -> served immediately, refreshed in the background ("stale")
+      - no snapshot / older than max_stale    -> fetched synchronously (single-flight per lane)
+        and if that fetch fails               -> the old snapshot ("fallback") or 0.0 ("default")
+    fetch_fn(start_coords, end_coords) must return (route_coords, delay_minutes) like
+    tracking.get_route_traffic_data; an empty route_coords list is treated as a failed fetch.
+    Snapshots live in a TTLCache ("traffic"), so with a shared backend all workers see the same snapshots.
+    """
+
+    def __init__(self, fetch_fn: Callable, bucket_seconds: int = 600, max_stale_seconds: int = 1800, max_workers: int = 2,
+                 backend: Optional[CacheBackend] = None):
+        self.fetch_fn = fetch_fn
+        self.bucket_seconds = bucket_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._snapshots = TTLCache("traffic", max_stale_seconds, backend) # lane -> TrafficSnapshot
+        self._lock = threading.Lock()
+        self._lane_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="traffic-refresh")
+        self.hits = self.stale_hits = self.misses = self.refresh_failures = 0
+
+    def current_bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds)
+
+    def get(self, origin: str, destination: str, start_coords, end_coords) -> Tuple[float, str]:
+        """Returns (traffic_delay_minutes, source) for the lane; source is fresh/stale/fallback/default."""
+        lane = (origin, destination)
+        bucket = self.current_bucket()
+        snapshot = self._snapshots.get_stale(lane)
+        if snapshot is not None and snapshot.bucket == bucket:
+            self.hits += 1
+            return snapshot.delay_minutes, "fresh"
+        if snapshot is not None and time.time() - snapshot.fetched_at <= self.max_stale_seconds:
+            self.stale_hits += 1
+            self._schedule_refresh(lane, start_coords, end_coords)
+            return snapshot.delay_minutes, "stale"
+
+        self.misses += 1
+        with self._lane_lock(lane):
+            # Another request may have refreshed the lane while we waited
+            snapshot = self._snapshots.get_stale(lane)
+            if snapshot is not None and snapshot.bucket == bucket:
+                return snapshot.delay_minutes, "fresh"
+            refreshed = self._refresh(lane, start_coords, end_coords)
+        if refreshed is not None: return refreshed.delay_minutes, "fresh"
+        # Upstream failed: prefer an old snapshot over the 0.0 default
+        if snapshot is not None: return snapshot.delay_minutes, "fallback"
+        return 0.0, "default"
+
+    def put(self, origin: str, destination: str, delay_minutes: float) -> None:
+        self._snapshots.set((origin, destination), TrafficSnapshot(delay_minutes, self.current_bucket(), time.time()))
+
+    def _lane_lock(self, lane) -> threading.Lock:
+        with self._lock:
+            return self._lane_locks.setdefault(lane, threading.Lock())
+
+    def _refresh(self, lane, start_coords, end_coords):
+        route_coords, delay_minutes = self.fetch_fn(start_coords, end_coords)
+        if not route_coords:
+            self.refresh_failures += 1
+            logger.warning(f"Traffic refresh failed for {lane[0]} -> {lane[1]}; keeping previous snapshot.")
+            return None
+        snapshot = TrafficSnapshot(delay_minutes, self.current_bucket(), time.time())
+        self._snapshots.set(lane, snapshot)
+        return snapshot
+
+    def _schedule_refresh(self, lane, start_coords, end_coords) -> None:
+        with self._lock:
+            if lane in self._refreshing: return
+            self._refreshing.add(lane)
+        def run():
+            try:
+                # Nobody waits on a stale-while-revalidate refresh; it must not take tokens live requests need
+                with background_work(), self._lane_lock(lane):
+                    snapshot = self._snapshots.get_stale(lane)
+                    if snapshot is None or snapshot.bucket != self.current_bucket():
+                        self._refresh(lane, start_coords, end_coords)
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.error(f"Background traffic refresh error for {lane[0]} -> {lane[1]}: {e}")
+            finally:
+                with self._lock: self._refreshing.discard(lane)
+        self._executor.submit(run)
+
+    def stats(self) -> dict:
+        now = time.time()
+        ages = {f"{o} -> {d}": round(now - s.fetched_at, 1) for (o, d), _, s in self._snapshots.items()}
+        return {
+            "bucket_seconds": self.bucket_seconds, "max_stale_seconds": self.max_stale_seconds,
+            "lanes": len(ages), "hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+            "refresh_failures": self.refresh_failures, "snapshot_age_seconds": ages,
+            "store": self._snapshots.stats(),
+        }
@@ -0,0 +1,414 @@
+# backend/trip_log.py
+# Append-only log of computed trips in a columnar on-disk layout: each segment is a directory holding one .npy file
+# per column (strings dictionary-encoded per segment), written once and never modified. Records are buffered and
+# flushed by a background thread, so the request path only appends to a list. Analytics read the segments
+# memory-mapped and aggregate them with np.bincount.
+
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config import Config
+
+try:
+    import fcntl # Cross-process compaction lock (POSIX)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+if not logger.hasHandlers():
+     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+
+SEGMENT_VERSION = 1
+
+# Dictionary-encoded string columns (uint16 codes into the segment's own category list)
+CATEGORICAL_COLUMNS = ("origin", "destination", "vehicle", "dispatch_window", "traffic", "rain", "snow")
+NUMERIC_COLUMNS = {
+    "created_at": np.int64,   # Epoch seconds when the trip was computed
+    "journey_day": np.int32,  # Journey date as days since 1970-01-01
+    "pallets": np.float32,
+    "vehicle_age": np.float32,
+    "total_km": np.float32,
+    "city_km": np.float32,
+    "highway_km": np.float32,
+    "traffic_delay_minutes": np.float32,
+    "avg_temperature": np.float32,
+    "efficiency_kml": np.float32,
+    "fuel_litres": np.float32,
+    "fuel_price": np.float32,
+    "fuel_cost": np.float64,
+    "total_cost": np.float64,
+    "degraded": np.uint8,
+}
+COLUMNS = CATEGORICAL_COLUMNS + tuple(NUMERIC_COLUMNS)
+
+GROUP_COLUMNS = ("lane",) + CATEGORICAL_COLUMNS
+PERIODS = ("day", "week", "month")
+AGGREGATE_MEASURES = ("total_km", "fuel_litres", "fuel_cost", "total_cost", "efficiency_kml")
+# Largest groups x periods accumulator an aggregate() will allocate
+MAX_AGGREGATE_CELLS = 4_000_000
+# Lane code = global origin code * LANE_RADIX + global destination code
+LANE_RADIX = 1024
+MAX_MEMOIZED_PARTIALS = 4096
+
+
+def journey_day(value) -> int:
+    """Days since 1970-01-01 for a 'YYYY-MM-DD' string or a date."""
+    if isinstance(value, str): value = date.fromisoformat(value)
+    return (value - date(1970, 1, 1)).days
+
+
+class Segment:
+    """One immutable segment: memory-mapped columns plus its category lists."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "meta.json")) as f: self.meta = json.load(f)
+        self.rows = self.meta["rows"]
+        self.categories: Dict[str, List[str]] = self.meta["categories"]
+        self.columns = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r") for column in COLUMNS}
+        self.remap: Dict[str, np.ndarray] = {} # Segment code -> reader-global code, filled by TripLog._remap
+
+
+def write_segment(directory: str, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]],
+                  replaces: Iterable[str] = ()) -> str:
+    """Writes the columns to a temp directory and renames it into place, so readers never see a partial segment."""
+    rows = len(columns["created_at"])
+    day = columns["journey_day"]
+    name = f"seg-{time.time_ns()}-{os.getpid()}-{threading.get_ident() % 100000}"
+    tmp_path = os.path.join(directory, f".tmp-{name}")
+    os.makedirs(tmp_path)
+    for column in COLUMNS: np.save(os.path.join(tmp_path, f"{column}.npy"), columns[column])
+    meta = {"version": SEGMENT_VERSION, "rows": rows, "categories": categories, "replaces": list(replaces),
+            "min_day": int(day.min()) if rows else None, "max_day": int(day.max()) if rows else None}
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f: json.dump(meta, f)
+    os.rename(tmp_path, os.path.join(directory, name))
+    return name
+
+
+class TripLog:
+    """
+    record(trip) appends to an in-memory buffer; a daemon thread writes the buffer out as a new segment when it
+    holds flush_rows records or every flush_seconds. Once more than compact_segments segments are smaller than
+    segment_rows, one process merges them (the merged segment lists the ones it replaces, so a reader never
+    counts a trip twice). aggregate() answers grouped sums over all segments.
+    """
+
+    def __init__(self, directory: str, flush_rows: int = 500, flush_seconds: float = 5.0,
+                 segment_rows: int = 1_000_000, compact_segments: int = 32):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.segment_rows = segment_rows
+        self.compact_segments = compact_segments
+        os.makedirs(directory, exist_ok=True)
+        self._buffer: List[dict] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._segments: Dict[str, Segment] = {}
+        self._vocab: Dict[str, Dict[str, int]] = {column: {} for column in CATEGORICAL_COLUMNS}
+        self._read_lock = threading.Lock()
+        self._partials: Dict[tuple, dict] = {} # Per-segment aggregate results (segments never change)
+        self.dropped = 0
+        atexit.register(self.flush)
+
+    # --- Writing ---
+    def record(self, trip: dict) -> None:
+        """Queues one trip (keys: COLUMNS; journey_day may be a date string). Never raises into the caller."""
+        try:
+            row = {column: str(trip.get(column) or "") for column in CATEGORICAL_COLUMNS}
+            row.update({column: float(trip.get(column) or 0) for column in NUMERIC_COLUMNS if column not in ("journey_day", "created_at")})
+            day = trip.get("journey_day")
+            row["journey_day"] = journey_day(day) if isinstance(day, (str, date)) else int(day)
+            row["created_at"] = int(trip.get("created_at") or time.time())
+            row["degraded"] = int(bool(trip.get("degraded")))
+        except (TypeError, ValueError) as e:
+            self.dropped += 1
+            logger.warning(f"Trip not logged: {e}")
+            return
+        with self._buffer_lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.flush_rows
+        self._ensure_flusher()
+        if full: self._wakeup.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is not None: return
+        with self._buffer_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._flush_loop, name="trip-log-flusher", daemon=True)
+                self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                self.compact()
+            except Exception as e:
+                logger.error(f"Trip log flush failed: {e}", exc_info=True)
+
+    def flush(self) -> int:
+        """Writes buffered trips as one segment; returns how many were written."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+            if not rows: return 0
+            columns, categories = {}, {}
+            for column in CATEGORICAL_COLUMNS:
+                values = [row[column] for row in rows]
+                categories[column] = sorted(set(values))
+                codes = {value: code for code, value in enumerate(categories[column])}
+                columns[column] = np.fromiter((codes[value] for value in values), dtype=np.uint16, count=len(rows))
+            for column, dtype in NUMERIC_COLUMNS.items():
+                columns[column] = np.fromiter((row[column] for row in rows), dtype=dtype, count=len(rows))
+            name = write_segment(self.directory, columns, categories)
+            logger.info(f"Trip log: wrote {len(rows)} trips to {name}.")
+            return len(rows)
+
+    def compact(self) -> Optional[str]:
+        """Merges small segments into one once there are more than compact_segments of them."""
+        small = [segment for segment in self.segments() if segment.rows < self.segment_rows]
+        if len(small) <= self.compact_segments: return None
+        lock_file = open(os.path.join(self.directory, "compact.lock"), "a")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return None # Another process is compacting
+            small = [segment for segment in self.segments() if segment.rows < self.segment_rows]
+            batch, rows = [], 0
+            for segment in small:
+                if rows + segment.rows > self.segment_rows: break
+                batch.append(segment)
+                rows += segment.rows
+            if len(batch) < 2: return None
+            categories = {column: sorted({value for segment in batch for value in segment.categories[column]})
+                          for column in CATEGORICAL_COLUMNS}
+            columns = {}
+            for column in CATEGORICAL_COLUMNS:
+                codes = {value: code for code, value in enumerate(categories[column])}
+                columns[column] = np.concatenate([
+                    np.array([codes[value] for value in segment.categories[column]], dtype=np.uint16)[segment.columns[column]]
+                    if segment.categories[column] else np.zeros(segment.rows, dtype=np.uint16)
+                    for segment in batch
+                ])
+            for column in NUMERIC_COLUMNS:
+                columns[column] = np.concatenate([segment.columns[column] for segment in batch])
+            name = write_segment(self.directory, columns, categories, replaces=[segment.name for segment in batch])
+            for segment in batch: shutil.rmtree(segment.path, ignore_errors=True)
+            logger.info(f"Trip log: compacted {len(batch)} segments ({rows} trips) into {name}.")
+            return name
+        finally:
+            lock_file.close()
+
+    # --- Reading ---
+    def segments(self) -> List[Segment]:
+        """Live segments, oldest first (mapped once per process; segments are immutable)."""
+        with self._read_lock:
+            names = sorted(name for name in os.listdir(self.directory) if name.startswith("seg-"))
+            for name in names:
+                if name in self._segments: continue
+                try:
+                    self._segments[name] = self._remap(Segment(os.path.join(self.directory, name)))
+                except (FileNotFoundError, NotADirectoryError):
+                    continue # Removed by a compaction since listdir
+            for name in set(self._segments) - set(names): del self._segments[name]
+            for key in [key for key in self._partials if key[0] not in self._segments]: del self._partials[key]
+            replaced = {old for segment in self._segments.values() for old in segment.meta["replaces"]}
+            return [self._segments[name] for name in names if name in self._segments and name not in replaced]
+
+    def _remap(self, segment: Segment) -> Segment:
+        for column in CATEGORICAL_COLUMNS:
+            vocab = self._vocab[column]
+            segment.remap[column] = np.array([vocab.setdefault(value, len(vocab)) for value in segment.categories[column]],
+                                             dtype=np.int64)
+        return segment
+
+    def count(self) -> int:
+        return sum(segment.rows for segment in self.segments())
+
+    def aggregate(self, group_by: Tuple[str, ...] = ("lane",), period: Optional[str] = "week",
+                  since: Optional[int] = None, until: Optional[int] = None,
+                  filters: Optional[Dict[str, str]] = None) -> List[dict]:
+        """
+        Trips grouped by group_by columns (see GROUP_COLUMNS) and journey-date period ('day', 'week' starting Monday,
+        'month' or None), over journey days in [since, until). filters: {categorical column: value}.
+        Each row has the group values, period_start, trips, total_km, fuel_litres, fuel_cost, total_cost and the
+        derived cost_per_km, avg_total_cost, efficiency_kml (km per litre over all trips) and avg_predicted_efficiency.
+        """
+        for column in group_by:
+            if column not in GROUP_COLUMNS: raise ValueError(f"Cannot group by '{column}'")
+        if period is not None and period not in PERIODS: raise ValueError(f"Unknown period '{period}'")
+        filters = filters or {}
+        for column in filters:
+            if column not in CATEGORICAL_COLUMNS: raise ValueError(f"Cannot filter on '{column}'")
+
+        segments = [segment for segment in self.segments() if segment.rows and
+                    (since is None or segment.meta["max_day"] >= since) and (until is None or segment.meta["min_day"] < until)]
+        if not segments: return []
+        # Each segment is reduced to its non-empty cells first (on its own small codes), then the cells are merged
+        partials = [self._segment_partial(segment, group_by, period, since, until, filters) for segment in segments]
+        partials = [partial for partial in partials if len(partial["trips"])]
+        if not partials: return []
+        with self._read_lock:
+            vocab = {column: list(values) for column, values in self._vocab.items()}
+
+        # Merge: cell components (global codes, period index) -> one mixed-radix key
+        component_columns = list(group_by) + (["period"] if period is not None else [])
+        components = np.concatenate([partial["components"] for partial in partials])
+        sizes = [int(components[:, i].max()) + 1 for i in range(components.shape[1])]
+        period_base = int(components[:, -1].min()) if period is not None else 0
+        if period is not None:
+            components[:, -1] -= period_base
+            sizes[-1] = int(components[:, -1].max()) + 1
+        cells = int(np.prod(sizes)) if sizes else 1
+        if cells > MAX_AGGREGATE_CELLS:
+            raise ValueError(f"{cells} groups x periods is too many; narrow the date range or the grouping")
+        key = np.ravel_multi_index(components.T, sizes) if sizes else np.zeros(len(components), dtype=np.int64)
+        trips = np.bincount(key, weights=np.concatenate([partial["trips"] for partial in partials]), minlength=cells)
+        sums = {measure: np.bincount(key, weights=np.concatenate([partial[measure] for partial in partials]), minlength=cells)
+                for measure in AGGREGATE_MEASURES}
+
+        occupied = np.flatnonzero(trips)
+        decoded = np.unravel_index(occupied, sizes) if sizes else []
+        # Derived metrics computed column-wise; tolist() hands back plain floats for JSON
+        count = trips[occupied]
+        total_km, fuel_litres = sums["total_km"][occupied], sums["fuel_litres"][occupied]
+        fuel_cost, total_cost = sums["fuel_cost"][occupied], sums["total_cost"][occupied]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metrics = {
+                "trips": count.astype(np.int64).tolist(),
+                "total_km": np.round(total_km, 2).tolist(), "fuel_litres": np.round(fuel_litres, 2).tolist(),
+                "fuel_cost": np.round(fuel_cost, 2).tolist(), "total_cost": np.round(total_cost, 2).tolist(),
+                "cost_per_km": _rounded_or_none(fuel_cost / total_km, total_km > 0, 2),
+                "avg_total_cost": np.round(total_cost / count, 2).tolist(),
+                "efficiency_kml": _rounded_or_none(total_km / fuel_litres, fuel_litres > 0, 3),
+                "avg_predicted_efficiency": np.round(sums["efficiency_kml"][occupied] / count, 3).tolist(),
+            }
+        labels = []
+        for position, column in enumerate(component_columns):
+            codes = decoded[position].tolist()
+            if column == "lane":
+                labels.append(("lane", [f"{vocab['origin'][code // LANE_RADIX]} -> {vocab['destination'][code % LANE_RADIX]}" for code in codes]))
+            elif column == "period":
+                labels.append(("period_start", [_period_start(code + period_base, period) for code in codes]))
+            else:
+                labels.append((column, [vocab[column][code] for code in codes]))
+        names = [name for name, _ in labels] + list(metrics)
+        return [dict(zip(names, values)) for values in zip(*[values for _, values in labels], *metrics.values())]
+
+    def _segment_partial(self, segment: Segment, group_by: Tuple[str, ...], period: Optional[str],
+                         since: Optional[int], until: Optional[int], filters: Dict[str, str]) -> dict:
+        """
+        Sums per non-empty cell of one segment: {"components": (cells, groups [+ period]) global codes, "trips", measures}.
+        A segment wholly inside [since, until) gives the same answer for any such range, so that result is memoized.
+        """
+        covered = (since is None or segment.meta["min_day"] >= since) and (until is None or segment.meta["max_day"] < until)
+        memo_key = (segment.name, group_by, period, tuple(sorted(filters.items())))
+        if covered:
+            cached = self._partials.get(memo_key)
+            if cached is not None: return cached
+
+        columns, categories = segment.columns, segment.categories
+        mask = None # None = every row
+        if not covered:
+            day = columns["journey_day"]
+            mask = np.ones(segment.rows, dtype=bool)
+            if since is not None: mask &= day >= since
+            if until is not None: mask &= day < until
+        for column, value in filters.items():
+            if value not in categories[column]: return _empty_partial(len(group_by) + (period is not None))
+            match = columns[column] == categories[column].index(value)
+            mask = match if mask is None else mask & match
+        def take(column):
+            return columns[column] if mask is None else columns[column][mask]
+
+        # Local key over the segment's own codes; only the occupied cells are translated to global codes
+        dims, key = [], None
+        for column in group_by:
+            if column == "lane":
+                size = len(categories["origin"]) * len(categories["destination"])
+                codes = take("origin").astype(np.int64) * len(categories["destination"]) + take("destination")
+            else:
+                size = len(categories[column])
+                codes = take(column).astype(np.int64)
+            dims.append(size)
+            key = codes if key is None else key * size + codes
+        if period is not None:
+            periods = _period_index(take("journey_day"), period)
+            first_period = int(periods.min()) if len(periods) else 0
+            dims.append(int(periods.max()) - first_period + 1 if len(periods) else 1)
+            periods -= first_period
+            key = periods if key is None else key * dims[-1] + periods
+        if key is None: key = np.zeros(segment.rows if mask is None else int(mask.sum()), dtype=np.int64)
+
+        cells = int(np.prod(dims)) if dims else 1
+        trips = np.bincount(key, minlength=cells)
+        occupied = np.flatnonzero(trips)
+        partial = {"trips": trips[occupied]}
+        for measure in AGGREGATE_MEASURES:
+            partial[measure] = np.bincount(key, weights=take(measure), minlength=cells)[occupied]
+
+        local = np.unravel_index(occupied, dims) if dims else []
+        components = []
+        for position, column in enumerate(group_by):
+            if column == "lane":
+                origin_code, destination_code = np.divmod(local[position], len(categories["destination"]))
+                components.append(segment.remap["origin"][origin_code] * LANE_RADIX + segment.remap["destination"][destination_code])
+            else:
+                components.append(segment.remap[column][local[position]])
+        if period is not None: components.append(local[-1] + first_period)
+        partial["components"] = np.stack(components, axis=1).astype(np.int64) if components else np.zeros((len(occupied), 0), dtype=np.int64)
+
+        if covered:
+            if len(self._partials) >= MAX_MEMOIZED_PARTIALS: self._partials.clear()
+            self._partials[memo_key] = partial
+        return partial
+
+    def stats(self) -> dict:
+        segments = self.segments()
+        with self._buffer_lock: buffered = len(self._buffer)
+        return {"directory": self.directory, "segments": len(segments), "trips": sum(s.rows for s in segments),
+                "buffered": buffered, "dropped": self.dropped}
+
+
+def _empty_partial(n_components: int) -> dict:
+    partial = {measure: np.zeros(0) for measure in AGGREGATE_MEASURES}
+    partial.update({"trips": np.zeros(0, dtype=np.int64), "components": np.zeros((0, n_components), dtype=np.int64)})
+    return partial
+
+
+def _rounded_or_none(values: np.ndarray, valid: np.ndarray, decimals: int) -> list:
+    return [value if ok else None for value, ok in zip(np.round(values, decimals).tolist(), valid.tolist())]
+
+
+def _period_index(day: np.ndarray, period: Optional[str]) -> np.ndarray:
+    day = day.astype(np.int64)
+    if period is None: return np.zeros_like(day)
+    if period == "day": return day
+    if period == "week": return (day + 3) // 7 # 1970-01-01 was a Thursday; weeks start on Monday
+    return day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _period_start(index: int, period: str) -> str:
+    if period == "day": return str(np.datetime64(index, "D"))
+    if period == "week": return str(np.datetime64(index * 7 - 3, "D"))
+    return str(np.datetime64(index, "M").astype("datetime64[D]"))
+
+
+trip_log: Optional[TripLog] = TripLog(
+    Config.TRIP_LOG_DIR, Config.TRIP_LOG_FLUSH_ROWS, Config.TRIP_LOG_FLUSH_SECONDS,
+    Config.TRIP_LOG_SEGMENT_ROWS, Config.TRIP_LOG_COMPACT_SEGMENTS,
+) if Config.TRIP_LOG_ENABLED else None
@@ -10,6 +10,7 @@ import { AuthContext } from "./AuthContext";
 import LeftBar from "./components/LeftBar"; // Assuming correct path
 import FloatingCards from "./components/FloatingCards"; // Assuming correct path
 import RouteDisplay from "./components/RouteDisplay"; // Assuming correct path
+import FleetRoutesLayer from "./components/FleetRoutesLayer";
 import Loading from "./components/Loading"; // Assuming correct path
 import "./components/Loading.css"; // Assuming correct path
 
@@ -55,6 +56,9 @@ export default function App() {
           url="https://tile.openstreetmap.org/{z}/{x}/{y}.png"
         />
 
+        {/* Every stored fleet route until a journey is processed (RouteDisplay clears other layers) */}
+        {!journeyProcessed && <FleetRoutesLayer />}
+
         {/* Only display route when a journey is processed */}
         {journeyProcessed && selectedOrigin && selectedDestination && (
           <RouteDisplay
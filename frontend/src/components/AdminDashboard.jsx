@@ -4,29 +4,36 @@ import api from '../services/api';
 import logoViolet from '../assets/logo-violet.png';
 
 export default function AdminDashboard() {
-  const [pendingUsers, setPendingUsers] = useState([]);
-  const [approvedUsers, setApprovedUsers] = useState([]);
+  const [users, setUsers] = useState([]); // Loaded pages of the active tab
+  const [nextCursor, setNextCursor] = useState(null);
+  const [counts, setCounts] = useState({ pending: 0, approved: 0 });
   const [activeTab, setActiveTab] = useState('pending'); // 'pending' or 'approved'
+  const [search, setSearch] = useState('');
+  const [query, setQuery] = useState(''); // Submitted search
+  const [selected, setSelected] = useState([]); // Emails ticked for a bulk action
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [message, setMessage] = useState('');
   const [messageType, setMessageType] = useState('');
   
   const { logout } = useContext(AuthContext);
 
-  // Fetch all users when component mounts
+  // Reload the first page whenever the tab or the search changes
   useEffect(() => {
-    fetchAllUsers();
-  }, []);
+    fetchUsers();
+  }, [activeTab, query]);
 
-  const fetchAllUsers = async () => {
+  const fetchUsers = async (after = 0) => {
     try {
-      setLoading(true);
-      const response = await api.getAllUsers();
+      after ? setLoadingMore(true) : setLoading(true);
+      const response = await api.listUsers({ status: activeTab, q: query, after });
       
       if (response.success) {
-        const users = response.users || [];
-        setPendingUsers(users.filter(user => !user.isApproved));
-        setApprovedUsers(users.filter(user => user.isApproved));
+        const page = response.users || [];
+        setUsers(after ? [...users, ...page] : page);
+        setNextCursor(response.nextCursor);
+        if (response.counts) setCounts(response.counts);
+        if (!after) setSelected([]);
       } else {
         setMessage(response.message || 'Failed to fetch users');
         setMessageType('error');
@@ -37,9 +44,22 @@ export default function AdminDashboard() {
       setMessageType('error');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  // Drop users from the loaded list and keep the tab counts in step
+  const removeUsers = (emails, fromTab, toTab = null) => {
+    const removed = users.filter(user => emails.includes(user.email)).length;
+    setUsers(users.filter(user => !emails.includes(user.email)));
+    setSelected(selected.filter(email => !emails.includes(email)));
+    setCounts({
+      ...counts,
+      [fromTab]: Math.max(0, counts[fromTab] - removed),
+      ...(toTab ? { [toTab]: counts[toTab] + removed } : {})
+    });
+  };
+
   const handleApproveUser = async (email) => {
     try {
       const formData = new FormData();
@@ -50,14 +70,7 @@ export default function AdminDashboard() {
       if (response.success) {
         setMessage(`User ${email} approved successfully`);
         setMessageType('success');
-        
-        // Move the user from pending to approved
-        const userToMove = pendingUsers.find(user => user.email === email);
-        if (userToMove) {
-          userToMove.isApproved = true;
-          setApprovedUsers([...approvedUsers, userToMove]);
-          setPendingUsers(pendingUsers.filter(user => user.email !== email));
-        }
+        removeUsers([email], 'pending', 'approved');
       } else {
         setMessage(response.message || 'Failed to approve user');
         setMessageType('error');
@@ -83,13 +96,7 @@ export default function AdminDashboard() {
       if (response.success) {
         setMessage(`User ${email} deleted successfully`);
         setMessageType('success');
-        
-        // Remove user from the appropriate list
-        if (isApproved) {
-          setApprovedUsers(approvedUsers.filter(user => user.email !== email));
-        } else {
-          setPendingUsers(pendingUsers.filter(user => user.email !== email));
-        }
+        removeUsers([email], isApproved ? 'approved' : 'pending');
       } else {
         setMessage(response.message || 'Failed to delete user');
         setMessageType('error');
@@ -101,6 +108,48 @@ export default function AdminDashboard() {
     }
   };
 
+  const handleBulkApprove = async () => {
+    try {
+      const response = await api.bulkApproveUsers(selected);
+      setMessage(response.message || `${response.approved} user(s) approved`);
+      setMessageType(response.success ? 'success' : 'error');
+      if (response.success) removeUsers(selected, 'pending', 'approved');
+    } catch (err) {
+      console.error('Error approving users:', err);
+      setMessage(err.message || 'Failed to approve users');
+      setMessageType('error');
+    }
+  };
+
+  const handleBulkDelete = async () => {
+    if (!confirm(`Are you sure you want to delete ${selected.length} user(s)?`)) {
+      return;
+    }
+
+    try {
+      const response = await api.bulkDeleteUsers(selected);
+      setMessage(response.message || `${response.deleted} user(s) deleted`);
+      setMessageType(response.success ? 'success' : 'error');
+      if (response.success) removeUsers(selected, activeTab);
+    } catch (err) {
+      console.error('Error deleting users:', err);
+      setMessage(err.message || 'Failed to delete users');
+      setMessageType('error');
+    }
+  };
+
+  const toggleSelected = (email) => {
+    setSelected(selected.includes(email) ? selected.filter(e => e !== email) : [...selected, email]);
+  };
+
+  const allSelected = users.length > 0 && users.every(user => selected.includes(user.email));
+  const toggleAll = () => setSelected(allSelected ? [] : users.map(user => user.email));
+
+  const handleSearch = (e) => {
+    e.preventDefault();
+    setQuery(search.trim());
+  };
+
   const handleLogout = async () => {
     await logout();
   };
@@ -135,7 +184,7 @@ export default function AdminDashboard() {
           }}
           onClick={() => setActiveTab('pending')}
         >
-          Pending Users ({pendingUsers.length})
+          Pending Users ({counts.pending})
         </button>
         <button 
           style={{
@@ -144,68 +193,98 @@ export default function AdminDashboard() {
           }}
           onClick={() => setActiveTab('approved')}
         >
-          Approved Users ({approvedUsers.length})
+          Approved Users ({counts.approved})
         </button>
       </div>
       
       <div style={styles.section}>
         <h2>{activeTab === 'pending' ? 'Pending User Approvals' : 'Approved Users'}</h2>
+
+        <div style={styles.toolbar}>
+          <form onSubmit={handleSearch} style={styles.searchForm}>
+            <input
+              type="search"
+              placeholder="Name or email starts with…"
+              value={search}
+              onChange={(e) => setSearch(e.target.value)}
+              style={styles.searchInput}
+            />
+            <button type="submit" style={styles.secondaryButton}>Search</button>
+          </form>
+          {selected.length > 0 && (
+            <div style={styles.bulkActions}>
+              <span>{selected.length} selected</span>
+              {activeTab === 'pending' && (
+                <button style={styles.approveButton} onClick={handleBulkApprove}>
+                  Approve selected
+                </button>
+              )}
+              <button style={styles.deleteButton} onClick={handleBulkDelete}>
+                Delete selected
+              </button>
+            </div>
+          )}
+        </div>
         
         {loading ? (
           <p>Loading users...</p>
-        ) : activeTab === 'pending' && pendingUsers.length === 0 ? (
-          <p>No pending users to approve.</p>
-        ) : activeTab === 'approved' && approvedUsers.length === 0 ? (
-          <p>No approved users.</p>
+        ) : users.length === 0 ? (
+          <p>{query ? 'No users match your search.' : activeTab === 'pending' ? 'No pending users to approve.' : 'No approved users.'}</p>
         ) : (
-          <table style={styles.table}>
-            <thead>
-              <tr>
-                <th style={styles.th}>Username</th>
-                <th style={styles.th}>Email</th>
-                <th style={styles.th}>Actions</th>
-              </tr>
-            </thead>
-            <tbody>
-              {activeTab === 'pending' ? (
-                pendingUsers.map((user) => (
+          <>
+            <table style={styles.table}>
+              <thead>
+                <tr>
+                  <th style={styles.thCheckbox}>
+                    <input type="checkbox" checked={allSelected} onChange={toggleAll} />
+                  </th>
+                  <th style={styles.th}>Username</th>
+                  <th style={styles.th}>Email</th>
+                  <th style={styles.th}>Actions</th>
+                </tr>
+              </thead>
+              <tbody>
+                {users.map((user) => (
                   <tr key={user.id}>
-                    <td style={styles.td}>{user.username}</td>
-                    <td style={styles.td}>{user.email}</td>
-                    <td style={styles.tdActions}>
-                      <button 
-                        style={styles.approveButton}
-                        onClick={() => handleApproveUser(user.email)}
-                      >
-                        Approve
-                      </button>
-                      <button 
-                        style={styles.deleteButton}
-                        onClick={() => handleDeleteUser(user.email, false)}
-                      >
-                        Delete
-                      </button>
+                    <td style={styles.tdCheckbox}>
+                      <input
+                        type="checkbox"
+                        checked={selected.includes(user.email)}
+                        onChange={() => toggleSelected(user.email)}
+                      />
                     </td>
-                  </tr>
-                ))
-              ) : (
-                approvedUsers.map((user) => (
-                  <tr key={user.id}>
                     <td style={styles.td}>{user.username}</td>
                     <td style={styles.td}>{user.email}</td>
                     <td style={styles.tdActions}>
+                      {!user.isApproved && (
+                        <button 
+                          style={styles.approveButton}
+                          onClick={() => handleApproveUser(user.email)}
+                        >
+                          Approve
+                        </button>
+                      )}
                       <button 
                         style={styles.deleteButton}
-                        onClick={() => handleDeleteUser(user.email, true)}
+                        onClick={() => handleDeleteUser(user.email, user.isApproved)}
                       >
                         Delete
                       </button>
                     </td>
                   </tr>
-                ))
-              )}
-            </tbody>
-          </table>
+                ))}
+              </tbody>
+            </table>
+            {nextCursor && (
+              <button
+                style={styles.loadMoreButton}
+                onClick={() => fetchUsers(nextCursor)}
+                disabled={loadingMore}
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
+          </>
         )}
       </div>
     </div>
@@ -284,6 +363,56 @@ const styles = {
     padding: '0.75rem',
     borderBottom: '1px solid #e0e0e0'
   },
+  thCheckbox: {
+    width: '2rem',
+    padding: '0.75rem',
+    borderBottom: '1px solid #e0e0e0',
+    backgroundColor: '#f5f5f5'
+  },
+  tdCheckbox: {
+    width: '2rem',
+    padding: '0.75rem',
+    borderBottom: '1px solid #e0e0e0'
+  },
+  toolbar: {
+    display: 'flex',
+    alignItems: 'center',
+    justifyContent: 'space-between',
+    gap: '1rem',
+    marginBottom: '1rem'
+  },
+  searchForm: {
+    display: 'flex',
+    gap: '0.5rem'
+  },
+  searchInput: {
+    padding: '0.5rem 0.75rem',
+    border: '1px solid #e0e0e0',
+    borderRadius: '4px',
+    minWidth: '260px'
+  },
+  bulkActions: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: '0.5rem'
+  },
+  secondaryButton: {
+    backgroundColor: '#4e7aff',
+    color: 'white',
+    border: 'none',
+    padding: '0.5rem 0.75rem',
+    borderRadius: '4px',
+    cursor: 'pointer'
+  },
+  loadMoreButton: {
+    display: 'block',
+    margin: '1rem auto 0',
+    backgroundColor: '#f5f5f5',
+    border: '1px solid #e0e0e0',
+    padding: '0.5rem 1.5rem',
+    borderRadius: '4px',
+    cursor: 'pointer'
+  },
   tdActions: {
     textAlign: 'left',
     padding: '0.75rem',
@@ -0,0 +1,80 @@
+import { useEffect } from 'react';
+import { useMap } from 'react-leaflet';
+import L from 'leaflet';
+import api from '../services/api';
+
+// Highest zoom the backend tiles; past it the last level's (already near full-resolution) tiles are reused
+const MAX_TILE_ZOOM = 18;
+const TILE_SIZE = 256;
+
+// Draws every stored fleet route from the backend's z/x/y route tiles. Each tile holds only the geometry
+// visible in it, simplified for its zoom, so the whole fleet costs a few small requests instead of one
+// full polyline per lane. Tiles already drawn at the current zoom are not fetched again.
+const FleetRoutesLayer = ({ lanes = [] }) => {
+  const map = useMap();
+  const lanesKey = lanes.map(lane => lane.join('|')).join(',');
+
+  useEffect(() => {
+    const group = L.layerGroup().addTo(map);
+    const requested = new Set(); // "z/x/y" fetched (or in flight) at the current zoom
+    const stationsDrawn = new Set(); // Stations near a tile edge come with both tiles
+    let tileZoom = null;
+    let active = true;
+
+    const drawTile = (tile) => {
+      tile.lanes.forEach(lane => {
+        lane.paths.forEach(path => {
+          L.polyline(path, { color: '#6f42c1', weight: 3, opacity: 1, interactive: false }).addTo(group);
+        });
+        lane.stations.forEach(([lat, lon]) => {
+          const key = `${lat},${lon}`;
+          if (stationsDrawn.has(key)) return;
+          stationsDrawn.add(key);
+          L.circleMarker([lat, lon], { radius: 4, color: '#5e35b1', fillOpacity: 0.9 })
+            .bindPopup(`Diesel Station (${lane.origin} → ${lane.destination})`)
+            .addTo(group);
+        });
+      });
+    };
+
+    const refresh = () => {
+      const zoom = Math.min(Math.round(map.getZoom()), MAX_TILE_ZOOM);
+      if (zoom !== tileZoom) {
+        group.clearLayers();
+        requested.clear();
+        stationsDrawn.clear();
+        tileZoom = zoom;
+      }
+      const bounds = map.getBounds();
+      const topLeft = map.project(bounds.getNorthWest(), zoom).divideBy(TILE_SIZE).floor();
+      const bottomRight = map.project(bounds.getSouthEast(), zoom).divideBy(TILE_SIZE).floor();
+      const last = 2 ** zoom - 1;
+      for (let x = Math.max(topLeft.x, 0); x <= Math.min(bottomRight.x, last); x++) {
+        for (let y = Math.max(topLeft.y, 0); y <= Math.min(bottomRight.y, last); y++) {
+          const key = `${zoom}/${x}/${y}`;
+          if (requested.has(key)) continue;
+          requested.add(key);
+          api.getRouteTile(zoom, x, y, lanes)
+            .then(tile => { if (active && tileZoom === zoom) drawTile(tile); })
+            .catch(error => {
+              requested.delete(key); // Retried on the next pan/zoom
+              console.error(`Route tile ${key} failed:`, error);
+            });
+        }
+      }
+    };
+
+    map.on('moveend', refresh);
+    refresh();
+    return () => {
+      active = false;
+      map.off('moveend', refresh);
+      map.removeLayer(group);
+    };
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [map, lanesKey]);
+
+  return null;
+};
+
+export default FleetRoutesLayer;
@@ -1,4 +1,4 @@
-import React, { useState, useContext } from 'react';
+import React, { useState, useContext, useEffect } from 'react';
 import { AppContext } from '../AppContext';
 import api from '../services/api';
 import { AuthContext } from '../AuthContext';
@@ -98,6 +98,18 @@ export default function StartForm() {
 
   const [error, setError] = useState('');
 
+  // Warm the chosen lane on the server while the rest of the form is filled in, so submitting only
+  // leaves the prediction. Short debounce: changing the origin can briefly pair it with a stand-in destination.
+  useEffect(() => {
+    const { originDepot, destinationDepot } = formData;
+    if (!originDepot || !destinationDepot || originDepot === destinationDepot) return;
+    const timer = setTimeout(() => {
+      api.prefetchLane(originDepot, destinationDepot).catch(() => {}); // Best effort; the submit fetches anything missing
+    }, 400);
+    return () => clearTimeout(timer);
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [formData.originDepot, formData.destinationDepot]);
+
   // Get upcoming dates for the journey date dropdown
   function getUpcomingDates() {
     const dates = [];
@@ -189,13 +201,22 @@ export default function StartForm() {
       apiFormData.append('dispatchTime', formData.dispatchTime);
       apiFormData.append('journeyDate', formData.journeyDate);
       apiFormData.append('fuelAtOrigin', formData.fuelAtOrigin);
+      apiFormData.append('geometry', 'ref'); // Coordinates/stations come from the cacheable lane resource below
 
       // Call the Diesel API endpoint
       const result = await api.calculateDieselRoute(apiFormData);
 
       if (result.success) {
+        // Geometry rarely changes; repeat views of a lane are answered by the browser cache.
+        // The estimate is still valid without it, so a failed lane fetch draws the depots only.
+        const lane = await api
+          .getLane(result.route.origin, result.route.destination, result.route.version)
+          .catch((laneError) => {
+            console.error("Lane geometry unavailable:", laneError);
+            return { coordinates: result.route.coordinates || [], stations: result.route.stations || [] };
+          });
         // Update context with results
-        setRouteData(result.route);
+        setRouteData({ ...result.route, coordinates: lane.coordinates, stations: lane.stations });
         setAnalyticsData(result.analytics);
         setSelectedOrigin(formData.originDepot);
         setSelectedDestination(formData.destinationDepot);
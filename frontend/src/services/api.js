@@ -61,9 +61,40 @@ export const api = {
 
   // Only Diesel route calculation
   calculateDieselRoute: (formData) => apiRequest('/api/diesel/route', 'POST', formData), // Will become /nigeria/api/diesel/route
+  // Route geometry and fuel stations of a lane; HTTP-cached by the browser. Pass the route response's
+  // route.version so a re-routed lane is a new URL rather than a stale cache hit.
+  getLane: (originDepot, destinationDepot, version) => {
+    const path = `/api/lanes/${encodeURIComponent(originDepot)}/${encodeURIComponent(destinationDepot)}`;
+    return apiRequest(version ? `${path}?v=${encodeURIComponent(version)}` : path);
+  },
+  // Warms the lane's route, stations, traffic and weather on the server while the rest of the form is filled in
+  prefetchLane: (originDepot, destinationDepot) => {
+    const formData = new FormData();
+    formData.append('originDepot', originDepot);
+    formData.append('destinationDepot', destinationDepot);
+    return apiRequest('/api/diesel/prefetch', 'POST', formData);
+  },
 
   getAllUsers: () => apiRequest('/api/admin/get-all-users'),
-  deleteUser: (formData) => apiRequest('/api/admin/delete-user', 'POST', formData)
+  deleteUser: (formData) => apiRequest('/api/admin/delete-user', 'POST', formData),
+
+  // Keyset-paginated listing: pass the previous response's nextCursor as `after`
+  listUsers: ({ status = 'all', q = '', after = 0, limit } = {}) => {
+    const params = new URLSearchParams({ status, after: String(after) });
+    if (q) params.set('q', q);
+    if (limit) params.set('limit', String(limit));
+    return apiRequest(`/api/admin/users?${params}`);
+  },
+  bulkApproveUsers: (emails) => apiRequest('/api/admin/users/approve', 'POST', { emails }),
+  bulkDeleteUsers: (emails) => apiRequest('/api/admin/users/delete', 'POST', { emails }),
+
+  // Fleet route overlay tile (simplified for zoom z); lanes = [[origin, destination], ...] or omit for all
+  getRouteTile: (z, x, y, lanes = []) => {
+    const params = new URLSearchParams();
+    lanes.forEach(([origin, destination]) => params.append('lane', `${origin}|${destination}`));
+    const query = params.toString();
+    return apiRequest(`/api/routes/tiles/${z}/${x}/${y}${query ? `?${query}` : ''}`);
+  }
 };
 
 export default api;